@@ -0,0 +1,58 @@
+import sys
+
+# Subcomandos de linha de comando. Nenhum deles importa o PyQt5 (bench só o
+# importa para medir o editor) nem lê config.json; sem subcomando, main()
+# abre o editor de program.py.
+
+
+def _batch(argv):
+    from article_introduction_generator.core import load_llm_config
+    from article_introduction_generator.modules.batch import batch_main
+    return batch_main(argv, load_llm_config())
+
+def _tokens(argv):
+    from article_introduction_generator.modules.token_report import tokens_main
+    return tokens_main(argv)
+
+def _fake_server(argv):
+    from article_introduction_generator.modules.fake_server import fake_server_main
+    return fake_server_main(argv)
+
+def _bench(argv):
+    from article_introduction_generator.modules.benchmark import bench_main
+    return bench_main(argv)
+
+def _stats(argv):
+    from article_introduction_generator.modules.telemetry import stats_main
+    return stats_main(argv)
+
+COMMANDS = {
+    "batch": _batch,
+    "tokens": _tokens,
+    "fake-server": _fake_server,
+    "bench": _bench,
+    "stats": _stats,
+}
+
+
+def run_command(argv):
+    """
+    Executa o subcomando argv[0] e retorna o código de saída,
+    ou None se argv não começar com um subcomando.
+    """
+    if not argv or argv[0] not in COMMANDS:
+        return None
+    return COMMANDS[argv[0]](argv[1:])
+
+
+def main():
+    code = run_command(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    from article_introduction_generator.program import main as editor_main
+    editor_main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Núcleo sem interface gráfica: modelo de dados do *.intro.json, construção
+do prompt e consulta ao LLM. Importar este pacote não carrega o PyQt5 nem
+grava arquivos; openai e httpx só são importados na primeira consulta.
+
+    from article_introduction_generator.core import IntroGenerator
+
+    generator = IntroGenerator()
+    text = generator.generate(json_data)
+"""
+from article_introduction_generator.core.config import CONFIG_LLM_PATH, DEFAULT_LLM_CONTENT, load_llm_config
+from article_introduction_generator.core.paper import (
+    EMPTY_SECTIONS, fill_section, fill_paper, has_content, is_paper_empty, read_paper,
+    serialize_paper, write_paper, write_paper_content
+)
+from article_introduction_generator.core.document import PaperDocument
+from article_introduction_generator.core.generator import IntroGenerator
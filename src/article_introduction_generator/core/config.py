@@ -0,0 +1,64 @@
+import os
+
+import article_introduction_generator.about as about
+import article_introduction_generator.modules.configure as configure
+
+# ---------- Path to config LLM file ----------
+CONFIG_LLM_PATH = os.path.join( os.path.expanduser("~"),
+                                ".config", 
+                                about.__package__, 
+                                "config.llm.json" )
+
+DEFAULT_LLM_CONTENT={
+    "api_key": "",
+    "usage": "https://deepinfra.com/dash/usage",
+    "base_url": "https://api.deepinfra.com/v1/openai",
+    "model": "meta-llama/Meta-Llama-3.1-70B-Instruct",
+    "cache_enabled": True,
+    "cache_max_size_mb": 50,
+    "prompt_encoding": "pretty",
+    "generation_mode": "single",
+    "paragraph_stitch": "transitions",
+    "incremental_regeneration": True,
+    "request_timeout": 120,
+    "total_timeout": 600,
+    "max_retries": 3,
+    "retry_backoff_base": 1.0,
+    "retry_backoff_max": 20.0,
+    "hedge_after": 0,
+    "fallbacks": [],
+    "cassette_mode": "off",
+    "cassette_path": "",
+    "cassette_latency_scale": 1.0,
+    "candidates": [
+        {"temperature": 0.3},
+        {"temperature": 0.7},
+        {"temperature": 1.0}
+    ],
+    "candidates_concurrency": 0,
+    "prices_per_mtoken": {
+        "meta-llama/Meta-Llama-3.1-70B-Instruct": {"input": 0.23, "output": 0.40},
+        "meta-llama/Llama-3.3-70B-Instruct": {"input": 0.23, "output": 0.40},
+        "deepseek-ai/DeepSeek-V3": {"input": 0.35, "output": 0.89},
+        "deepseek-ai/DeepSeek-V3-0324": {"input": 0.35, "output": 0.89}
+    },
+    "telemetry_enabled": True,
+    "stream_usage": False,
+    "default_prompt_token_budget": 30000,
+    "prompt_token_budgets": {
+        "meta-llama/Meta-Llama-3.1-70B-Instruct": 120000,
+        "meta-llama/Llama-3.3-70B-Instruct": 120000,
+        "deepseek-ai/DeepSeek-V3": 150000,
+        "deepseek-ai/DeepSeek-V3-0324": 150000
+    }
+}
+
+
+def load_llm_config(path=CONFIG_LLM_PATH, create=False):
+    """
+    Configuração do LLM de path completada com DEFAULT_LLM_CONTENT.
+    Só cria o arquivo com os valores padrão se create for True.
+    """
+    if create:
+        configure.verify_default_config(path, default_content=DEFAULT_LLM_CONTENT)
+    return configure.load_config(path, default_content=DEFAULT_LLM_CONTENT)
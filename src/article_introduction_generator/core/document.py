@@ -0,0 +1,179 @@
+import json
+
+from article_introduction_generator.core.paper import EMPTY_SECTIONS, fill_paper, has_content
+
+
+def _value(value, depth):
+    # JSON aninhado em depth níveis, como json.dumps(..., indent=2) o escreveria
+    return json.dumps(value, indent=2).replace("\n", "\n" + "  " * depth).encode("utf-8")
+
+
+def _member(key, depth):
+    return ("  " * (depth + 1) + json.dumps(key) + ": ").encode("utf-8")
+
+
+def _object(members, depth):
+    """
+    Pedaços (bytes) de um objeto JSON no formato de json.dumps(..., indent=2),
+    a depth níveis de profundidade; cada membro é a lista de pedaços de um
+    par "chave": valor. Juntar os pedaços uma só vez evita copiar o artigo
+    inteiro a cada nível.
+    """
+    if not members:
+        return [b"{}"]
+    pieces = [b"{\n"]
+    for index, member in enumerate(members):
+        if index:
+            pieces.append(b",\n")
+        pieces.extend(member)
+    pieces.append(b"\n" + b"  " * depth + b"}")
+    return pieces
+
+
+class PaperDocument:
+    """
+    O *.intro.json em memória, seção por seção.
+
+    Cada seção guarda o último valor lido e uma flag de sujeira. Quem edita
+    chama invalidate(caminho), com os caminhos do journal ((seção,) ou
+    ("related_work", "references", chave)); a seção é relida do provedor
+    registrado com bind() só quando alguém pedir o valor. Também ficam em
+    cache, até a próxima invalidação, se cada seção tem conteúdo e o JSON
+    de cada seção e de cada referência, de modo que serialize() refaz só o
+    que mudou. Os observadores são chamados com cada caminho invalidado.
+    """
+    def __init__(self, data=None):
+        self.sections = {}
+        self.providers = {}
+        self.dirty = set()
+        self.observers = []
+        self.version = 0
+        self._content = {}
+        self._fragments = {}
+        self._reference_fragments = {}
+        self._memo = {}
+        self.reset(data or {})
+
+    def reset(self, data):
+        """
+        Passa a representar data (um artigo recém-lido); nada fica sujo.
+        """
+        self.sections = fill_paper(data)
+        self.dirty.clear()
+        self._content.clear()
+        self._fragments.clear()
+        self._reference_fragments.clear()
+        self._changed()
+
+    def bind(self, section, provider):
+        """
+        provider() retorna o valor atual da seção (lido dos widgets).
+        """
+        self.providers[section] = provider
+
+    def set(self, section, value):
+        """
+        Valor posto pelo programa, não pelo usuário: não notifica observadores.
+        """
+        self.sections[section] = value
+        self.dirty.discard(section)
+        self._forget((section,))
+        self._changed()
+
+    def invalidate(self, path, notify=True):
+        path = tuple(path)
+        self.dirty.add(path[0])
+        self._forget(path)
+        self._changed()
+        if notify:
+            for observer in list(self.observers):
+                observer(path)
+
+    def _forget(self, path):
+        section = path[0]
+        self._content.pop(section, None)
+        self._fragments.pop(section, None)
+        if section != "related_work":
+            return
+        if len(path) >= 3 and path[1] == "references":
+            self._reference_fragments.pop(path[2], None)
+        elif len(path) == 1:
+            self._reference_fragments.clear()
+
+    def _changed(self):
+        self.version += 1
+        self._memo.clear()
+
+    # ---------- Leitura ----------
+
+    def section(self, name):
+        if name in self.dirty:
+            provider = self.providers.get(name)
+            if provider is not None:
+                self.sections[name] = provider()
+            self.dirty.discard(name)
+        return self.sections[name]
+
+    def data(self):
+        """
+        Dicionário do artigo, na ordem do *.intro.json. Seções limpas não
+        são relidas dos widgets.
+        """
+        return {name: self.section(name) for name in EMPTY_SECTIONS}
+
+    def has_content(self, name=None):
+        if name is None:
+            return any(self.has_content(section) for section in EMPTY_SECTIONS)
+        value = self.section(name)
+        if name not in self._content:
+            self._content[name] = has_content(value)
+        return self._content[name]
+
+    def is_empty(self):
+        return not self.has_content()
+
+    def memo(self, key, compute):
+        """
+        Resultado de compute() (um prompt, por exemplo) guardado até a
+        próxima alteração do artigo.
+        """
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    # ---------- Serialização ----------
+
+    def _section_pieces(self, name):
+        value = self.section(name)
+        if name in self._fragments:
+            return self._fragments[name]
+
+        references = value.get("references") if name == "related_work" and isinstance(value, dict) else None
+        if not isinstance(references, dict):
+            pieces = [_value(value, 1)]
+        else:
+            fragments = self._reference_fragments
+            for key in list(fragments):
+                if key not in references:
+                    del fragments[key]
+            members = []
+            for key, reference in references.items():
+                if key not in fragments:
+                    fragments[key] = _member(key, 2) + _value(reference, 3)
+                members.append([fragments[key]])
+            pieces = _object(
+                [[_member(key, 1)] + (_object(members, 2) if key == "references" else [_value(sub, 2)])
+                 for key, sub in value.items()],
+                1 )
+
+        self._fragments[name] = pieces
+        return pieces
+
+    def serialize(self):
+        """
+        Bytes do *.intro.json, iguais a core.serialize_paper(self.data()).
+        """
+        return self.memo(   "serialize",
+                            lambda: b"".join(_object(   [[_member(name, 0)] + self._section_pieces(name)
+                                                         for name in EMPTY_SECTIONS],
+                                                        0 )) )
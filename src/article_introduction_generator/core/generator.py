@@ -0,0 +1,113 @@
+from article_introduction_generator.core.config import load_llm_config
+
+# Os módulos de consulta (e com eles openai e httpx) são importados
+# na primeira chamada, não na importação do pacote
+
+
+class IntroGenerator:
+    """
+    Gera a introdução de um artigo (dicionário no formato *.intro.json)
+    com a configuração de LLM system_data; por padrão, a de config.llm.json,
+    lida sem criar o arquivo.
+
+    generate() é síncrono; agenerate() e astream() rodam no event loop do
+    chamador. Depois de cada geração, last_trace guarda o telemetry.Trace
+    com os tempos e os tokens consumidos (ver modules.ledger.usage_entries).
+    """
+    def __init__(self, system_data=None, use_cache=True):
+        self.system_data = system_data if system_data is not None else load_llm_config()
+        self.use_cache = use_cache
+        self.last_trace = None
+
+    @property
+    def paragraphs_mode(self):
+        from article_introduction_generator.modules.paragraphs import MODE_PARAGRAPHS
+        return self.system_data.get("generation_mode") == MODE_PARAGRAPHS
+
+    def prompt(self, json_data):
+        """
+        Prompt completo como texto, já ajustado ao orçamento de tokens.
+        Não precisa de api_key.
+        """
+        from article_introduction_generator.modules.consult import (
+            fit_prompt, consultation_in_text, get_prompt_encoding
+        )
+        json_data, _ = fit_prompt(self.system_data, json_data)
+        return consultation_in_text(json_data, encoding=get_prompt_encoding(self.system_data))
+
+    def _start_trace(self):
+        from article_introduction_generator.modules import telemetry
+        trace = telemetry.Trace(self.system_data, source="core", mode=self.system_data.get("generation_mode"))
+        token = telemetry.activate(trace)
+        self.last_trace = trace
+        return trace, token
+
+    def _finish_trace(self, trace, token, error):
+        from article_introduction_generator.modules import telemetry
+        trace.finish(telemetry.status_of(error))
+        # Chamadas síncronas seguidas não devem herdar o trace desta
+        telemetry.deactivate(token)
+
+    def generate(self, json_data, on_prompt_report=None):
+        if self.paragraphs_mode:
+            import asyncio
+            # Loop próprio; os clientes assíncronos dele são fechados ao final
+            return asyncio.run(self._agenerate_and_close(json_data, on_prompt_report))
+
+        from article_introduction_generator.modules.consult import consultation_in_depth
+        (trace, token), error = self._start_trace(), None
+        try:
+            return consultation_in_depth(   self.system_data,
+                                            json_data,
+                                            use_cache=self.use_cache,
+                                            on_prompt_report=on_prompt_report )
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish_trace(trace, token, error)
+
+    async def _agenerate_and_close(self, json_data, on_prompt_report):
+        from article_introduction_generator.modules.llm_client import close_async_clients
+        try:
+            return await self.agenerate(json_data, on_prompt_report=on_prompt_report)
+        finally:
+            await close_async_clients()
+
+    async def agenerate(self, json_data, on_chunk=None, on_prompt_report=None):
+        """
+        on_chunk(texto) recebe cada pedaço à medida que chega.
+        """
+        OUT = ""
+        async for piece in self.astream(json_data, on_prompt_report=on_prompt_report):
+            OUT += piece
+            if on_chunk is not None:
+                on_chunk(piece)
+        return OUT
+
+    async def astream(self, json_data, on_prompt_report=None):
+        """
+        Gerador assíncrono dos pedaços da introdução. No modo "paragraphs"
+        o texto costurado vem num único pedaço.
+        """
+        (trace, token), error = self._start_trace(), None
+        try:
+            if self.paragraphs_mode:
+                from article_introduction_generator.modules.paragraphs import generate_by_paragraphs
+                yield await generate_by_paragraphs( self.system_data,
+                                                    json_data,
+                                                    use_cache=self.use_cache,
+                                                    on_prompt_report=on_prompt_report )
+                return
+
+            from article_introduction_generator.modules.consult import consultation_in_depth_stream
+            async for piece in consultation_in_depth_stream(self.system_data,
+                                                            json_data,
+                                                            use_cache=self.use_cache,
+                                                            on_prompt_report=on_prompt_report):
+                yield piece
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish_trace(trace, token, error)
@@ -0,0 +1,144 @@
+import os
+import json
+import shutil
+import hashlib
+
+# Estrutura de cada seção do *.intro.json com os valores do editor vazio
+EMPTY_SECTIONS = {
+    "paper_profile": {
+        "title": "",
+        "domain": "",
+        "target_journal": "",
+        "keywords": [],
+        "author_intended_summary": ""
+    },
+    "research_problem": {
+        "research_domain_overview": "",
+        "specific_problem": "",
+        "practical_challenges": [],
+        "why_existing_solutions_are_insufficient": ""
+    },
+    "contributions": [],
+    "related_work": {
+        "references": {},
+        "human_curated_synthesis": {
+            "common_trends": [],
+            "open_problems": [],
+            "explicit_research_gap": ""
+        }
+    },
+    "writing_guidelines": ""
+}
+
+
+def fill_section(value, empty):
+    """
+    value com a estrutura de empty: chaves ausentes ou None recebem o valor vazio.
+    """
+    if isinstance(empty, dict) and empty:
+        value = value if isinstance(value, dict) else {}
+        return {key: fill_section(value.get(key), sub) for key, sub in empty.items()}
+    if value is None:
+        return json.loads(json.dumps(empty))
+    return value
+
+
+def fill_paper(data):
+    """
+    Artigo com todas as seções de EMPTY_SECTIONS, na ordem do editor.
+    """
+    return {section: fill_section(data.get(section), empty) for section, empty in EMPTY_SECTIONS.items()}
+
+
+def has_content(value):
+    if isinstance(value, str):
+        return bool(value.strip())
+    if isinstance(value, list):
+        return any(has_content(v) for v in value)
+    if isinstance(value, dict):
+        return any(has_content(v) for v in value.values())
+    return False
+
+
+def is_paper_empty(data):
+    return not has_content(data)
+
+
+def read_paper(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def serialize_paper(data):
+    """
+    Bytes gravados no *.intro.json.
+    """
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def paper_signature(path):
+    """
+    Tamanho e mtime de path, ou None se ele não existir.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _fsync_directory(directory):
+    # Torna o os.replace durável; nem todo sistema permite abrir diretórios
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_paper(path, data, previous=None):
+    """
+    Grava data em path sem nunca deixar o arquivo pela metade: escreve
+    path + ".tmp", faz fsync e o renomeia sobre path.
+
+    previous é o primeiro valor retornado pela gravação anterior de path;
+    se o arquivo não mudou desde ela e o conteúdo (sha256) é o mesmo, nada
+    é gravado. Retorna (gravação, gravou), onde gravação é
+    {"digest": sha256, "signature": paper_signature(path)}.
+    """
+    return write_paper_content(path, serialize_paper(data), previous)
+
+
+def write_paper_content(path, content, previous=None):
+    """
+    Como write_paper, com o artigo já serializado (PaperDocument.serialize).
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    if (    previous
+        and previous.get("digest") == digest
+        and previous.get("signature") == paper_signature(path) ):
+        return previous, False
+
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+    return {"digest": digest, "signature": paper_signature(path)}, True
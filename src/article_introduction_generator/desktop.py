@@ -1,8 +1,18 @@
 import os
 import subprocess
+import threading
 import article_introduction_generator.about as about
 from article_introduction_generator.modules.resources import resource_path
 
+# Guarda a versão que já criou os atalhos; enquanto for a mesma, main() não mexe neles
+DESKTOP_MARKER_PATH = os.path.join( os.path.expanduser("~"),
+                                    ".config",
+                                    about.__package__,
+                                    "desktop_integration.version" )
+
+APPLICATIONS_PATH = os.path.join("~",".local","share","applications")
+AUTOSTART_PATH    = os.path.join("~",".config","autostart")
+
 
 def update_desktop_database(desktop_path):
     applications_dir = os.path.expanduser(desktop_path)
@@ -17,7 +27,10 @@ def update_desktop_database(desktop_path):
     except FileNotFoundError:
         print("The command 'update-desktop-database' was not found. Verify that the package 'desktop-file-utils' is installed.")
 
-def create_desktop_file(desktop_path, overwrite=False, program_name=None):
+def create_desktop_file(desktop_path, overwrite=False, program_name=None, wait=True):
+    """
+    Com wait=False, update-desktop-database roda numa thread e não atrasa o chamador.
+    """
 
     icon_path = resource_path('icons', 'logo.png')
 
@@ -49,7 +62,12 @@ StartupWMClass={about.__package__}
             f.write(desktop_entry)
         os.chmod(path, 0o755)
         print(f"File {__program_name}.desktop created in {path}.")
-        update_desktop_database(desktop_path)
+        if wait:
+            update_desktop_database(desktop_path)
+        else:
+            threading.Thread(   target=update_desktop_database, 
+                                args=(desktop_path,), 
+                                daemon=True ).start()
     
 def create_desktop_directory(   directory_name = "ResearchTools",
                                 long_name = "Scientific research",
@@ -97,6 +115,38 @@ def create_desktop_menu(directory_name = "ResearchTools",
             f.write(desktop_entry)
         print(f"File {path} created.")
 
+def install_desktop_integration(desktop_path=APPLICATIONS_PATH, overwrite=False, wait=True):
+    create_desktop_directory(overwrite = overwrite)
+    create_desktop_menu(overwrite = overwrite)
+    create_desktop_file(desktop_path, 
+                        overwrite=overwrite, 
+                        program_name=about.__program_name__,
+                        wait=wait)
+
+
+def ensure_desktop_integration(marker_path=DESKTOP_MARKER_PATH):
+    """
+    Cria os atalhos do menu uma vez por versão instalada. Nas demais
+    execuções custa apenas a leitura do marcador.
+    """
+    try:
+        with open(marker_path, "r", encoding="utf-8") as f:
+            if f.read().strip() == about.__version__:
+                return False
+    except OSError:
+        pass
+
+    install_desktop_integration(wait=False)
+
+    try:
+        os.makedirs(os.path.dirname(marker_path), exist_ok=True)
+        with open(marker_path, "w", encoding="utf-8") as f:
+            f.write(about.__version__ + "\n")
+    except OSError as e:
+        print(f"Could not write {marker_path}: {e}")
+    return True
+
+
 if __name__ == '__main__':
     create_desktop_menu()
     create_desktop_directory()
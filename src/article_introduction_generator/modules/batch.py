@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+from article_introduction_generator.modules.consult import consult_many
+from article_introduction_generator.modules.paragraphs import (
+    generate_by_paragraphs, regenerate_by_paragraphs, MODE_SINGLE, MODE_PARAGRAPHS
+)
+from article_introduction_generator.modules.generation_state import load_state, save_state
+from article_introduction_generator.modules.llm_client import close_async_clients
+from article_introduction_generator.modules.ledger import Ledger, usage_entries, format_cost
+from article_introduction_generator.core.config import CONFIG_LLM_PATH
+
+INPUT_SUFFIX  = ".intro.json"
+OUTPUT_SUFFIX = ".intro.txt"
+
+
+def find_intro_json_files(directory, recursive=False):
+    """
+    Retorna a lista ordenada de arquivos *.intro.json dentro de directory.
+    """
+    found = []
+    if recursive:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(INPUT_SUFFIX):
+                    found.append(os.path.join(root, name))
+    else:
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(INPUT_SUFFIX) and os.path.isfile(path):
+                found.append(path)
+    return sorted(found)
+
+
+def output_path_for(path):
+    """
+    paper.intro.json -> paper.intro.txt (no mesmo diretório).
+    """
+    return path[:-len(INPUT_SUFFIX)] + OUTPUT_SUFFIX
+
+
+def write_output(path, out):
+    """
+    Escreve o texto gerado no *.intro.txt ao lado de path.
+    """
+    out_path = output_path_for(path)
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(out)
+    return out_path
+
+
+def run_batch(system_data, paths, max_workers=4, on_done=None, use_cache=True, on_usage=None):
+    """
+    Executa as consultas concorrentemente num único event loop,
+    com no máximo max_workers arquivos em andamento. Com
+    generation_mode "paragraphs", cada arquivo gera seus parágrafos em paralelo.
+
+    Retorna uma lista de tuplas (path, out_path, error) na mesma ordem de paths.
+    on_done(path, out_path, error) é chamado assim que cada arquivo termina.
+    O consumo de tokens de cada arquivo vai para o seu ledger (modules.ledger)
+    e para on_usage(path, entries).
+    """
+    results = {}
+
+    def finish(path, out_path, error):
+        results[path] = (path, out_path, error)
+        if on_done is not None:
+            on_done(path, out_path, error)
+
+    # Lê as entradas; arquivos inválidos falham sem consultar o LLM
+    loaded_paths = []
+    json_data_list = []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                json_data_list.append(json.load(f))
+            loaded_paths.append(path)
+        except (OSError, ValueError) as e:
+            finish(path, None, str(e))
+
+    def on_result(index, out, error):
+        path = loaded_paths[index]
+        if error is None:
+            try:
+                out_path = write_output(path, out)
+            except OSError as e:
+                out_path, error = None, e
+        else:
+            out_path = None
+        finish(path, out_path, None if error is None else str(error))
+
+    def on_prompt_report(index, report):
+        if report.cuts or not report.fits:
+            print(f"[prompt] {loaded_paths[index]}: {report.summary()}", file=sys.stderr)
+
+    def on_trace(index, trace):
+        path = loaded_paths[index]
+        entries = usage_entries(system_data, trace, kind="batch")
+        try:
+            Ledger(path).add(entries)
+        except OSError as e:
+            print(f"[ledger] {path}: {e}", file=sys.stderr)
+        if on_usage is not None:
+            on_usage(path, entries)
+
+    consult_fn = None
+    items = json_data_list
+    if system_data.get("generation_mode") == MODE_PARAGRAPHS:
+        consult_fn = generate_by_paragraphs
+
+        if system_data.get("incremental_regeneration", True):
+            # Cada item leva o seu caminho, onde fica o estado da geração
+            items = list(zip(loaded_paths, json_data_list))
+
+            async def consult_fn(system_data, item, **kwargs):
+                path, json_data = item
+                out, state, _ = await regenerate_by_paragraphs( system_data,
+                                                                json_data,
+                                                                state=load_state(path),
+                                                                **kwargs )
+                try:
+                    save_state(path, state)
+                except OSError as e:
+                    # O artigo foi gerado; só a próxima execução refaz mais parágrafos
+                    print(f"[state] {path}: {e}", file=sys.stderr)
+                return out
+
+    async def run():
+        try:
+            await consult_many( system_data,
+                                items,
+                                max_concurrency=max_workers,
+                                on_result=on_result,
+                                use_cache=use_cache,
+                                on_prompt_report=on_prompt_report,
+                                consult_fn=consult_fn,
+                                on_usage=on_trace )
+        finally:
+            await close_async_clients()
+
+    if json_data_list:
+        asyncio.run(run())
+
+    return [results[p] for p in paths]
+
+
+def batch_main(argv, system_data):
+    """
+    Ponto de entrada de: article-introduction-generator batch <dir>
+    """
+    parser = argparse.ArgumentParser(
+        prog="article-introduction-generator batch",
+        description="Generate an introduction for every *.intro.json file in a directory."
+    )
+    parser.add_argument("directory", help="Directory with *.intro.json files.")
+    parser.add_argument("-j", "--workers", type=int, default=4,
+                        help="Maximum number of simultaneous LLM requests (default: 4).")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Also search subdirectories.")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="Do not regenerate files that already have a *.intro.txt.")
+    parser.add_argument("--mode", choices=(MODE_SINGLE, MODE_PARAGRAPHS),
+                        default=system_data.get("generation_mode", MODE_SINGLE),
+                        help="single request per paper, or one request per paragraph in parallel.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the response cache and always consult the LLM.")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"Not a directory: {args.directory}", file=sys.stderr)
+        return 2
+
+    if not system_data.get("api_key"):
+        print("The LLM api_key is empty. Configure it in " + CONFIG_LLM_PATH + ".", file=sys.stderr)
+        return 2
+
+    paths = find_intro_json_files(args.directory, recursive=args.recursive)
+    if args.skip_existing:
+        paths = [p for p in paths if not os.path.exists(output_path_for(p))]
+
+    if not paths:
+        print("No *.intro.json files to process.")
+        return 0
+
+    def on_done(path, out_path, error):
+        if error is None:
+            print(f"[ok]    {out_path}")
+        else:
+            print(f"[error] {path}: {error}", file=sys.stderr)
+
+    system_data = dict(system_data, generation_mode=args.mode)
+
+    spent = []
+    results = run_batch(system_data,
+                        paths,
+                        max_workers=args.workers,
+                        on_done=on_done,
+                        use_cache=not args.no_cache,
+                        on_usage=lambda path, entries: spent.extend(entries))
+
+    failed = sum(1 for _, _, error in results if error is not None)
+    print(f"{len(results) - failed}/{len(results)} introductions generated.")
+
+    ledger = Ledger()
+    ledger.add(spent)
+    print("Cost: " + format_cost(*ledger.totals()))
+
+    return 1 if failed else 0
@@ -0,0 +1,340 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+
+import article_introduction_generator.about as about
+
+# ---------- Path to benchmark results ----------
+# Fora de ~/.config (medições não são configuração), mas persistente: os
+# resultados de uma versão são comparados com os das seguintes
+RESULTS_DIR = os.path.join( os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"),
+                            about.__package__,
+                            "benchmarks" )
+
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+
+# Quantas trocas de referência são medidas em _load_reference
+MAX_SWITCHES = 200
+
+ROLES = ("foundational", "early_state_of_art", "recent_advances")
+
+LOREM = (   "we", "propose", "a", "novel", "framework", "for", "robust", "representation",
+            "learning", "that", "outperforms", "prior", "methods", "on", "several",
+            "benchmarks", "while", "reducing", "the", "computational", "cost", "of",
+            "training", "and", "inference", "under", "limited", "supervision", "results",
+            "show", "consistent", "gains", "across", "datasets", "domains", "and", "scales" )
+
+
+def _sentence(rng, n_words):
+    words = [rng.choice(LOREM) for _ in range(n_words)]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng, n_words):
+    sentences = []
+    while n_words > 0:
+        size = min(n_words, rng.randint(12, 24))
+        sentences.append(_sentence(rng, size))
+        n_words -= size
+    return " ".join(sentences)
+
+
+def synthetic_paper(n_refs, abstract_words=250, seed=0):
+    """
+    Gera um *.intro.json sintético com n_refs referências de abstracts longos.
+    """
+    rng = random.Random(seed)
+
+    references = {}
+    for i in range(1, n_refs + 1):
+        key = f"author{i}{2000 + i % 25}"
+        references[key] = {
+            "bibtex": ( f"@article{{{key},\n"
+                        f"  author = {{Author {i} and Coauthor {i}}},\n"
+                        f"  title = {{{_sentence(rng, 10)[:-1]}}},\n"
+                        f"  journal = {{Journal of Synthetic Research}},\n"
+                        f"  volume = {{{i % 40 + 1}}},\n"
+                        f"  pages = {{{i}--{i + 12}}},\n"
+                        f"  year = {{{2000 + i % 25}}},\n"
+                        f"  doi = {{10.0000/synthetic.{i}}}\n"
+                        f"}}" ),
+            "abstract": _paragraph(rng, abstract_words),
+            "methodological_category": rng.choice(("deep_learning", "statistical", "hybrid")),
+            "central_technical_idea": _paragraph(rng, 40),
+            "author_reported_strengths": [_sentence(rng, 6) for _ in range(2)],
+            "reported_limitations": [_sentence(rng, 6) for _ in range(2)],
+            "relevance_to_our_work": _paragraph(rng, 30),
+            "introduction_paragraph_role": ROLES[i % len(ROLES)],
+        }
+
+    return {
+        "paper_profile": {
+            "title": _sentence(rng, 10)[:-1],
+            "domain": "Computer Vision / Machine Learning",
+            "target_journal": "IEEE T-PAMI",
+            "keywords": [rng.choice(LOREM) for _ in range(5)],
+            "author_intended_summary": _paragraph(rng, 80)
+        },
+        "research_problem": {
+            "research_domain_overview": _paragraph(rng, 120),
+            "specific_problem": _paragraph(rng, 80),
+            "practical_challenges": [_sentence(rng, 8) for _ in range(4)],
+            "why_existing_solutions_are_insufficient": _paragraph(rng, 80)
+        },
+        "contributions": [_sentence(rng, 15) for _ in range(4)],
+        "related_work": {
+            "references": references,
+            "human_curated_synthesis": {
+                "common_trends": [_sentence(rng, 12) for _ in range(3)],
+                "open_problems": [_sentence(rng, 12) for _ in range(3)],
+                "explicit_research_gap": _paragraph(rng, 60)
+            }
+        },
+        "writing_guidelines": _paragraph(rng, 40)
+    }
+
+
+def time_it(fn, repeat):
+    """
+    Executa fn repeat vezes; retorna os tempos em milissegundos.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return times
+
+
+def _summary(times, per=1):
+    return {"median_ms": statistics.median(times) / per,
+            "min_ms": min(times) / per,
+            "runs": len(times)}
+
+
+def bench_core(json_data, repeat):
+    from article_introduction_generator.modules.consult import consultation_in_text
+    from article_introduction_generator.modules.prompt_encoding import DEFAULT_ENCODING
+
+    return {
+        "consultation_in_text": _summary(time_it(
+            lambda: consultation_in_text(json_data, encoding=DEFAULT_ENCODING), repeat
+        ))
+    }
+
+
+def bench_gui(json_path, n_refs, repeat):
+    """
+    Mede as operações do editor sobre uma janela real (plataforma Qt "offscreen"
+    se não houver display). Retorna {nome: resumo}.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PyQt5.QtWidgets import QApplication
+    import article_introduction_generator.program as program
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {}
+
+    class BenchEditor(program.JsonIntroductionEditor):
+        def _prewarm_llm(self):
+            pass  # nenhuma conexão com o LLM durante as medições
+
+    def startup():
+        # Até o primeiro paint da janela vazia
+        window = BenchEditor()
+        window.show()
+        window.repaint()
+        app.processEvents()
+        window.close()
+        window.deleteLater()
+
+    startup()  # a primeira janela também paga a importação de estilos e fontes
+    results["window_startup"] = _summary(time_it(startup, repeat))
+    app.processEvents()
+
+    win = BenchEditor()
+
+    # Todas as abas construídas: cada leitura preenche todos os widgets,
+    # inclusive a lista de referências
+    for index in range(len(win.tab_specs)):
+        win._ensure_tab(index)
+
+    def load():
+        win.load_json_file(json_path)
+        app.processEvents()
+
+    results["load_json"] = _summary(time_it(load, repeat))
+
+    # Sem invalidar, o PaperDocument responde do cache e nada é medido
+    def invalidate_all():
+        for section in win.tab_specs:
+            win.document.invalidate((section[0],), notify=False)
+
+    def obtaining_data():
+        invalidate_all()
+        return win._obtaining_data()
+
+    def is_data_empty():
+        invalidate_all()
+        return win.document.is_empty()  # a verificação feita por generate_cmd
+
+    data = win._obtaining_data()
+    results["_obtaining_data"] = _summary(time_it(obtaining_data, repeat))
+
+    # Uma referência editada: só ela é serializada de novo (ver PaperDocument)
+    edited = ("related_work", "references", next(iter(data["related_work"]["references"]), ""))
+
+    def serialize_edit():
+        win.document.invalidate(edited, notify=False)
+        win.document.serialize()
+
+    win.document.serialize()  # a primeira serialização monta o cache
+    results["serialize_after_edit"] = _summary(time_it(serialize_edit, repeat))
+    results["is_data_empty"] = _summary(time_it(is_data_empty, repeat))
+
+    # Um arquivo novo por execução: o mesmo conteúdo no mesmo arquivo não é regravado
+    saves = iter(range(repeat))
+    results["save_as_json"] = _summary(time_it(
+        lambda: win.save_json_file(f"{json_path}.saved{next(saves)}.intro.json"), repeat))
+    results["save_unchanged"] = _summary(time_it(lambda: win.save_json_file(win.current_path), repeat))
+
+    switches = min(n_refs, MAX_SWITCHES)
+    if switches > 1:
+        win.tabs.setCurrentIndex(win.section_tabs["related_work"])
+        app.processEvents()
+        rows = [i % n_refs for i in range(1, switches + 1)]
+
+        def switch():
+            for row in rows:
+                win.ref_list.setCurrentIndex(win.ref_proxy.index(row, 0))
+            app.processEvents()
+
+        results["_load_reference"] = _summary(time_it(switch, repeat), per=switches)
+
+    win.close()
+    win.deleteLater()
+    app.processEvents()
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=5, gui=True, abstract_words=250, on_result=None):
+    """
+    Executa a suíte para cada tamanho; retorna {tamanho: {nome: resumo}}.
+    on_result(n_refs, nome, resumo) é chamado a cada medição.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_refs in sizes:
+            json_data = synthetic_paper(n_refs, abstract_words=abstract_words)
+            json_path = os.path.join(tmp, f"synthetic_{n_refs}.intro.json")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(json_data, f, indent=2)
+
+            size_results = bench_core(json_data, repeat)
+            if gui:
+                size_results.update(bench_gui(json_path, n_refs, repeat))
+
+            results[str(n_refs)] = size_results
+            if on_result is not None:
+                for name, summary in size_results.items():
+                    on_result(n_refs, name, summary)
+    return results
+
+
+def results_path(version, directory=RESULTS_DIR):
+    return os.path.join(directory, f"{version}.json")
+
+
+def save_results(results, version=about.__version__, directory=RESULTS_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = results_path(version, directory)
+    payload = { "version": version,
+                "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def load_previous_results(version=about.__version__, directory=RESULTS_DIR):
+    """
+    Resultados salvos mais recentes de outra versão, ou None.
+    """
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(".json") and n != f"{version}.json"]
+    except FileNotFoundError:
+        return None
+    if not names:
+        return None
+
+    latest = max(names, key=lambda n: os.path.getmtime(os.path.join(directory, n)))
+    with open(os.path.join(directory, latest), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_comparison(results, previous):
+    lines = [f"{'refs':>6} {'operation':<22} {'now ms':>10} {previous['version'] + ' ms':>12} {'change':>8}"]
+    for n_refs, size_results in results.items():
+        old_results = previous["results"].get(n_refs, {})
+        for name, summary in size_results.items():
+            old = old_results.get(name)
+            if old is None:
+                continue
+            now, before = summary["median_ms"], old["median_ms"]
+            change = 100.0 * (now - before) / before if before else 0.0
+            lines.append(f"{n_refs:>6} {name:<22} {now:>10.3f} {before:>12.3f} {change:>+7.1f}%")
+    return "\n".join(lines)
+
+
+def bench_main(argv):
+    """
+    Ponto de entrada de: article-introduction-generator bench
+    """
+    parser = argparse.ArgumentParser(
+        prog="article-introduction-generator bench",
+        description="Time prompt building, JSON I/O and editor population on synthetic papers."
+    )
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Numbers of references (default: 10 100 1000 5000).")
+    parser.add_argument("-n", "--repeat", type=int, default=5,
+                        help="Runs of each measurement; the median is reported (default: 5).")
+    parser.add_argument("--abstract-words", type=int, default=250,
+                        help="Words in each synthetic abstract (default: 250).")
+    parser.add_argument("--no-gui", action="store_true",
+                        help="Only time the functions that do not need the editor window.")
+    parser.add_argument("--results-dir", "--output-dir", dest="results_dir", default=RESULTS_DIR,
+                        help="Where results are stored, one file per version "
+                             "(default: " + RESULTS_DIR + ").")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the results.")
+    args = parser.parse_args(argv)
+
+    print(f"{'refs':>6} {'operation':<22} {'median ms':>10} {'min ms':>10}")
+
+    def on_result(n_refs, name, summary):
+        print(f"{n_refs:>6} {name:<22} {summary['median_ms']:>10.3f} {summary['min_ms']:>10.3f}", flush=True)
+
+    results = run_benchmarks(   sizes=args.sizes,
+                                repeat=max(1, args.repeat),
+                                gui=not args.no_gui,
+                                abstract_words=args.abstract_words,
+                                on_result=on_result )
+
+    previous = load_previous_results(directory=args.results_dir)
+    if previous is not None:
+        print()
+        print(format_comparison(results, previous))
+
+    if not args.no_save:
+        print()
+        print("Results saved to: " + save_results(results, directory=args.results_dir))
+
+    return 0
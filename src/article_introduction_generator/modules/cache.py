@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+import article_introduction_generator.about as about
+
+# ---------- Path to cache directory ----------
+CACHE_DIR = os.path.join(   os.path.expanduser("~"),
+                            ".config",
+                            about.__package__,
+                            "cache" )
+
+CACHE_SUFFIX = ".txt"
+TMP_SUFFIX   = ".tmp"
+
+# Temporários mais velhos que isso sobraram de uma gravação interrompida
+STALE_TMP_SECONDS = 3600
+
+
+# Parâmetros de amostragem repassados ao LLM quando presentes no config
+SAMPLING_KEYS = ("temperature", "top_p", "max_tokens")
+
+
+def sampling_params(system_data):
+    return {k: system_data[k] for k in SAMPLING_KEYS if system_data.get(k) is not None}
+
+
+def cache_key(base_url, model, system_prompt, user_prompt, json_data, sampling=None):
+    """
+    Hash sha256 dos parâmetros que determinam a resposta do LLM.
+    O json_data é canonicalizado (chaves ordenadas, sem espaços) para que
+    a mesma informação gere sempre a mesma chave. sampling (ver
+    sampling_params) só entra na chave quando não é vazio.
+    """
+    parts = [ (base_url or "").strip(), model, system_prompt, user_prompt, json_data ]
+    if sampling:
+        parts.append(sampling)
+    payload = json.dumps(
+        parts,
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache persistente de respostas, um arquivo por chave.
+
+    A data de modificação de cada arquivo é usada como instante do último
+    acesso, assim a evicção LRU não depende de atime (muitas vezes desativado).
+    Quando o tamanho total passa de max_size_mb, os menos usados são removidos.
+    """
+    def __init__(self, directory=CACHE_DIR, max_size_mb=50):
+        self.directory = directory
+        self.max_size = int(max_size_mb * 1024 * 1024)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # marca como usado recentemente
+        except OSError:
+            return None
+        return text
+
+    def put(self, key, text):
+        """
+        Grava a entrada via um temporário de nome único (várias threads podem
+        gravar a mesma chave ao mesmo tempo). Erros de disco sobem como OSError.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(prefix=key + ".", suffix=TMP_SUFFIX, dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        self.evict()
+
+    def entries(self):
+        """
+        Lista (mtime, size, path) de cada entrada, da menos para a mais recente.
+        """
+        found = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(CACHE_SUFFIX):
+                        st = entry.stat()
+                        found.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return sorted(found)
+
+    def _remove_stale_tmp(self):
+        limit = time.time() - STALE_TMP_SECONDS
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(TMP_SUFFIX) and entry.stat().st_mtime < limit:
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        self._remove_stale_tmp()
+
+        found = self.entries()
+        total = sum(size for _, size, _ in found)
+
+        for _, size, path in found:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,97 @@
+import asyncio
+
+from article_introduction_generator.modules.consult import consultation_in_depth_stream
+from article_introduction_generator.modules import telemetry
+
+# Usado quando config.llm.json não tem "candidates": o modelo atual com três temperaturas
+DEFAULT_CANDIDATES = [
+    {"temperature": 0.3},
+    {"temperature": 0.7},
+    {"temperature": 1.0}
+]
+
+
+def _number(value):
+    # Valores escritos à mão no config.llm.json podem vir como texto ("0.7")
+    try:
+        return f"{float(value):g}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def candidate_label(config):
+    label = config.get("model", "?").split("/")[-1]
+    if config.get("temperature") is not None:
+        label += " · T=" + _number(config["temperature"])
+    if config.get("top_p") is not None:
+        label += " · p=" + _number(config["top_p"])
+    return label
+
+
+def candidate_configs(system_data):
+    """
+    Lista de (rótulo, config) de cada candidato. Cada entrada de
+    system_data["candidates"] substitui as chaves do config base
+    (por exemplo "model", "base_url", "temperature") e pode ter um "label".
+    """
+    configs = []
+    for entry in system_data.get("candidates") or DEFAULT_CANDIDATES:
+        if not isinstance(entry, dict):
+            continue
+        entry = dict(entry)
+        label = entry.pop("label", None)
+        config = dict(system_data, **entry)
+        configs.append((label or candidate_label(config), config))
+    return configs
+
+
+async def generate_candidates( configs,
+                               json_data,
+                               max_concurrency=0,
+                               on_chunk=None,
+                               on_done=None,
+                               on_prompt_report=None,
+                               use_cache=True,
+                               on_usage=None ):
+    """
+    Gera uma introdução por config ao mesmo tempo, no event loop corrente.
+
+    on_chunk(index, texto) recebe os pedaços de cada candidato à medida que
+    chegam e on_done(index, texto, erro) é chamado quando cada um termina.
+    on_usage(index, trace) recebe o telemetry.Trace de cada candidato.
+    max_concurrency limita as consultas simultâneas (0 = todas).
+    Retorna a lista de textos (ou exceções) na ordem de configs.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency if max_concurrency > 0 else max(1, len(configs)))
+
+    async def one(index, config):
+        async with semaphore:
+            trace = telemetry.Trace(config, source="candidates")
+            telemetry.activate(trace)
+
+            OUT, error = "", None
+            try:
+                async for piece in consultation_in_depth_stream(config,
+                                                                json_data,
+                                                                use_cache=use_cache,
+                                                                on_prompt_report=on_prompt_report):
+                    OUT += piece
+                    if on_chunk is not None:
+                        on_chunk(index, piece)
+            except Exception as e:
+                error = e
+            except BaseException as e:
+                # Cancelado: o que já foi consumido também entra na conta
+                trace.finish(telemetry.status_of(e))
+                if on_usage is not None:
+                    on_usage(index, trace)
+                raise
+            trace.finish(telemetry.status_of(error))
+            if on_usage is not None:
+                on_usage(index, trace)
+
+        if on_done is not None:
+            on_done(index, OUT, error)
+        return error if error is not None else OUT
+
+    return await asyncio.gather(*(one(i, config) for i, config in enumerate(configs)))
@@ -0,0 +1,195 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import threading
+
+import article_introduction_generator.about as about
+from article_introduction_generator.modules.cache import cache_key, sampling_params
+
+CASSETTE_OFF    = "off"
+CASSETTE_RECORD = "record"
+CASSETTE_REPLAY = "replay"
+
+CASSETTE_MODES = (CASSETTE_OFF, CASSETTE_RECORD, CASSETTE_REPLAY)
+
+# ---------- Path to default cassette ----------
+DEFAULT_CASSETTE_PATH = os.path.join(   os.path.expanduser("~"),
+                                        ".config",
+                                        about.__package__,
+                                        "cassettes",
+                                        "default.jsonl.gz" )
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+class Cassette:
+    """
+    Gravação de consultas ao LLM num arquivo JSONL (gzip se terminar em .gz).
+
+    Cada linha é uma consulta:
+        {"k": chave, "m": modelo, "n": caracteres do prompt,
+         "c": [[ms desde o pedaço anterior, texto], ...]}
+    O primeiro intervalo é medido desde o envio da requisição, assim o
+    replay reproduz tanto a latência até o primeiro token quanto o ritmo
+    do streaming, multiplicados por latency_scale.
+    """
+    def __init__(self, path, latency_scale=1.0):
+        self.path = path
+        self.latency_scale = max(0.0, latency_scale)
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _open(self, mode):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self):
+        entries = {}
+        try:
+            with self._open("r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # linha truncada por uma gravação interrompida
+                    entries[entry["k"]] = entry  # a gravação mais recente vale
+        except FileNotFoundError:
+            pass
+        except (EOFError, gzip.BadGzipFile):
+            pass  # fim do gzip truncado; fica o que foi lido
+        return entries
+
+    def entries(self):
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            return self._entries
+
+    def get(self, key):
+        entry = self.entries().get(key)
+        if entry is None:
+            raise CassetteMiss(f"No recorded LLM response for this request in {self.path}")
+        return entry
+
+    def record(self, key, model, prompt_chars, chunks):
+        """
+        chunks: lista de (segundos desde o pedaço anterior, texto).
+        """
+        entry = {   "k": key,
+                    "m": model,
+                    "n": prompt_chars,
+                    "c": [[round(delay * 1000), text] for delay, text in chunks] }
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._open("a") as f:
+                f.write(line)
+            if self._entries is not None:
+                self._entries[key] = entry
+
+    def _delays(self, entry):
+        for ms, text in entry["c"]:
+            yield ms / 1000.0 * self.latency_scale, text
+
+    async def replay_stream(self, key):
+        for delay, text in self._delays(self.get(key)):
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield text
+
+    def replay_text(self, key):
+        OUT = ""
+        for delay, text in self._delays(self.get(key)):
+            if delay > 0:
+                time.sleep(delay)
+            OUT += text
+        return OUT
+
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(system_data):
+    """
+    Cassette configurado em system_data (cassette_mode, cassette_path,
+    cassette_latency_scale), ou None se cassette_mode for "off".
+    """
+    mode = system_data.get("cassette_mode", CASSETTE_OFF)
+    if mode not in (CASSETTE_RECORD, CASSETTE_REPLAY):
+        return None
+
+    path = os.path.expanduser(system_data.get("cassette_path") or DEFAULT_CASSETTE_PATH)
+    scale = float(system_data.get("cassette_latency_scale", 1.0))
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = Cassette(path, scale)
+            _cassettes[path] = cassette
+        else:
+            cassette.latency_scale = max(0.0, scale)
+    return cassette
+
+
+def interaction_key(system_data, system_msg, user_msg):
+    # O base_url fica de fora: uma gravação do provedor real serve para qualquer endpoint
+    return cache_key("", system_data["model"], system_msg, user_msg, None, sampling_params(system_data))
+
+
+async def cassette_stream(system_data, system_msg, user_msg, stream_fn):
+    """
+    Gerador assíncrono que grava ou reproduz os pedaços de stream_fn()
+    conforme cassette_mode. Com o cassette desligado, apenas repassa stream_fn().
+    """
+    cassette = get_cassette(system_data)
+    if cassette is None:
+        async for piece in stream_fn():
+            yield piece
+        return
+
+    key = interaction_key(system_data, system_msg, user_msg)
+    if system_data.get("cassette_mode") == CASSETTE_REPLAY:
+        async for piece in cassette.replay_stream(key):
+            yield piece
+        return
+
+    chunks = []
+    last = time.monotonic()
+    async for piece in stream_fn():
+        now = time.monotonic()
+        chunks.append((now - last, piece))
+        last = now
+        yield piece
+    cassette.record(key, system_data["model"], len(system_msg) + len(user_msg), chunks)
+
+
+def cassette_complete(system_data, system_msg, user_msg, stream_fn):
+    """
+    Versão síncrona de cassette_stream; stream_fn() devolve um iterador
+    de pedaços e o texto completo é retornado.
+    """
+    cassette = get_cassette(system_data)
+    if cassette is None:
+        return "".join(stream_fn())
+
+    key = interaction_key(system_data, system_msg, user_msg)
+    if system_data.get("cassette_mode") == CASSETTE_REPLAY:
+        return cassette.replay_text(key)
+
+    chunks = []
+    last = time.monotonic()
+    for piece in stream_fn():
+        now = time.monotonic()
+        chunks.append((now - last, piece))
+        last = now
+    cassette.record(key, system_data["model"], len(system_msg) + len(user_msg), chunks)
+    return "".join(piece for _, piece in chunks)
@@ -1,6 +1,14 @@
 
-import json
-from deep_consultation.core import consult_with_deepchat
+import asyncio
+
+from article_introduction_generator.modules.cache import ResponseCache, cache_key, sampling_params
+from article_introduction_generator.modules.resilience import RetryPolicy, resilient_stream
+from article_introduction_generator.modules.cassette import get_cassette, cassette_stream, cassette_complete
+from article_introduction_generator.modules import telemetry
+from article_introduction_generator.modules.prompt_builder import fit_to_budget, estimate_tokens
+from article_introduction_generator.modules.prompt_encoding import (
+    ENCODINGS, ENCODING_PRETTY, DEFAULT_ENCODING, encode_json_data, system_prompt_addendum
+)
 
     
 SYSTEM_PROMPT = """
@@ -57,34 +65,393 @@ Here is the JSON input:
 
 """
 
-def consultation_in_depth(system_data, json_data):
-
-    json_data_string = json.dumps(
-        json_data,
-        ensure_ascii=False,  # mantém acentos
-        indent=2              # deixa bonito e legível
-    )
+def build_user_message(json_data, encoding=ENCODING_PRETTY):
+    language, json_data_string = encode_json_data(json_data, encoding)
     
-    msg = USER_PROMPT + "```json\n" + json_data_string + "\n```"
+    return USER_PROMPT + "```" + language + "\n" + json_data_string + "\n```"
+
+def build_system_prompt(encoding=ENCODING_PRETTY):
+    return SYSTEM_PROMPT + system_prompt_addendum(encoding)
+
+def get_prompt_encoding(system_data):
+    encoding = system_data.get("prompt_encoding", DEFAULT_ENCODING)
+    return encoding if encoding in ENCODINGS else DEFAULT_ENCODING
+
+def encoding_token_report(json_data):
+    """
+    Tokens estimados (system, user, total) do prompt em cada codificação.
+    Retorna uma lista de tuplas (encoding, system, user, total).
+    """
+    rows = []
+    for encoding in ENCODINGS:
+        system_tokens = estimate_tokens(build_system_prompt(encoding))
+        user_tokens = estimate_tokens(build_user_message(json_data, encoding))
+        rows.append((encoding, system_tokens, user_tokens, system_tokens + user_tokens))
+    return rows
+
+def get_prompt_token_budget(system_data):
+    """
+    Orçamento de tokens do prompt para o modelo de system_data,
+    ou None se não houver limite configurado.
+    """
+    budgets = system_data.get("prompt_token_budgets") or {}
+    budget = budgets.get(system_data.get("model"), system_data.get("default_prompt_token_budget"))
+    return int(budget) if budget else None
+
+def fit_prompt(system_data, json_data):
+    """
+    Degrada json_data até o prompt caber no orçamento do modelo.
+    Retorna (json_data, PromptReport).
+    """
+    encoding = get_prompt_encoding(system_data)
+    return fit_to_budget(   json_data,
+                            get_prompt_token_budget(system_data),
+                            lambda data: build_user_message(data, encoding),
+                            fixed_tokens=estimate_tokens(build_system_prompt(encoding)) )
+
+def get_response_cache(system_data, use_cache=True):
+    """
+    Retorna o ResponseCache configurado em system_data,
+    ou None se o cache estiver desativado.
+    Com um cassette ativo o cache é ignorado, para que toda consulta
+    seja gravada ou reproduzida.
+    """
+    if not use_cache or not system_data.get("cache_enabled", True):
+        return None
+    if get_cassette(system_data) is not None:
+        return None
+    return ResponseCache(max_size_mb=system_data.get("cache_max_size_mb", 50))
+
+def consultation_cache_key(system_data, json_data):
+    # pretty e minified só diferem em espaços; compartilham as entradas
+    return cache_key(   system_data.get("base_url"),
+                        system_data["model"],
+                        build_system_prompt(get_prompt_encoding(system_data)),
+                        USER_PROMPT,
+                        json_data,
+                        sampling_params(system_data) )
+
+def consultation_in_depth(system_data, json_data, use_cache=True, on_prompt_report=None):
+
+    with telemetry.span("prompt_build"):
+        json_data, report = fit_prompt(system_data, json_data)
+    if on_prompt_report is not None:
+        on_prompt_report(report)
+
+    cache = get_response_cache(system_data, use_cache)
+    if cache is not None:
+        key = consultation_cache_key(system_data, json_data)
+        OUT = cache.get(key)
+        if OUT is not None:
+            telemetry.set_attr("cached", True)
+            return OUT
+
+    with telemetry.span("prompt_encode"):
+        encoding = get_prompt_encoding(system_data)
+        system_msg = build_system_prompt(encoding)
+        msg = build_user_message(json_data, encoding)
     
-    OUT=consult_with_deepchat(  system_data["base_url"],
-                                system_data["api_key"],
-                                system_data["model"],
-                                msg,
-                                SYSTEM_PROMPT)
+    OUT=chat_complete_sync( system_data,
+                            system_msg,
+                            msg )
+
+    if cache is not None and OUT:
+        try:
+            cache.put(key, OUT)
+        except OSError:
+            pass  # a resposta já foi recebida; só não fica no cache
     return OUT
     
-def consultation_in_text(json_data):
+def consultation_in_text(json_data, encoding=ENCODING_PRETTY):
+    """
+    Prompt completo como texto. Para aplicar o orçamento de tokens,
+    passe antes o json_data por fit_prompt.
+    """
 
-    json_data_string = json.dumps(
-        json_data,
-        ensure_ascii=False,  # mantém acentos
-        indent=2              # deixa bonito e legível
-    )
-    
     msg  = "System PROMPT:\n" 
-    msg += SYSTEM_PROMPT + "\n"
+    msg += build_system_prompt(encoding) + "\n"
     msg += "User PROMPT:\n" 
-    msg += USER_PROMPT + "```json\n" + json_data_string + "\n```"
+    msg += build_user_message(json_data, encoding)
     
     return msg
+
+def chat_complete_sync(system_data, system_msg, user_msg):
+    """
+    Versão síncrona de chat_complete, com o cliente compartilhado do base_url.
+    Usa request_timeout e max_retries da política, sem fallbacks nem hedging.
+    """
+    return cassette_complete(   system_data,
+                                system_msg,
+                                user_msg,
+                                lambda: _chat_iter_sync(system_data, system_msg, user_msg) )
+
+def _stream_options(system_data):
+    # Pede o uso de tokens no último evento do stream (para a telemetria)
+    if system_data.get("stream_usage", False):
+        return {"stream_options": {"include_usage": True}}
+    return {}
+
+def _rejects_stream_options(error, options):
+    # Provedores que não aceitam stream_options respondem 400: repete sem ele
+    return bool(options) and getattr(error, "status_code", None) == 400
+
+class _StreamUsage:
+    """
+    Contabiliza os eventos de um stream de chat no trace da consulta:
+    uso de tokens, primeiro token e texto recebido. Comum às versões
+    síncrona e assíncrona.
+    """
+    def __init__(self, trace, system_msg, user_msg, wait_usage):
+        self.trace = trace
+        self.system_msg = system_msg
+        self.user_msg = user_msg
+        self.wait_usage = wait_usage
+        self.text = ""
+        self.usage_seen = False
+
+    def feed(self, event):
+        """
+        Retorna (pedaço de texto ou None, se o stream terminou).
+        """
+        usage = getattr(event, "usage", None)
+        if usage is not None:
+            self.trace.add_usage(usage.prompt_tokens, usage.completion_tokens)
+            self.usage_seen = True
+        if not event.choices:
+            return None, False
+
+        piece = getattr(event.choices[0].delta, "content", None) or None
+        if piece:
+            self.trace.first_token()
+            self.text += piece
+
+        # Com stream_usage o uso chega depois do finish_reason
+        return piece, bool(event.choices[0].finish_reason) and not self.wait_usage
+
+    def finish(self):
+        # Também estima o que já foi gerado se a consulta for interrompida
+        if not self.usage_seen:
+            self.trace.add_usage(   estimate_tokens(self.system_msg) + estimate_tokens(self.user_msg),
+                                    estimate_tokens(self.text),
+                                    estimated=True )
+
+def _chat_iter_sync(system_data, system_msg, user_msg):
+    from article_introduction_generator.modules.llm_client import get_client
+
+    policy = RetryPolicy(system_data)
+    client = get_client(system_data).with_options(max_retries=policy.max_retries)
+    options = _stream_options(system_data)
+
+    def create(**options):
+        return client.chat.completions.create(
+            model=system_data["model"],
+            messages=[
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": user_msg},
+            ],
+            stream=True,
+            timeout=policy.request_timeout,
+            **options,
+            **sampling_params(system_data)
+        )
+
+    with telemetry.request_trace(system_data) as trace:
+        trace.add("connect", 0)
+        with telemetry.http_tracing(trace):
+            try:
+                stream = create(**options)
+            except Exception as error:
+                if not _rejects_stream_options(error, options):
+                    raise
+                options = {}
+                stream = create()
+        account = _StreamUsage(trace, system_msg, user_msg, wait_usage=bool(options))
+        try:
+            with stream:
+                for event in stream:
+                    piece, done = account.feed(event)
+                    if piece:
+                        yield piece
+                    if done:
+                        break
+        finally:
+            account.finish()
+
+# ---------- Async API ----------
+
+async def chat_stream(system_data, system_msg, user_msg, client=None, on_target=None):
+    """
+    Gerador assíncrono com os pedaços de texto de uma única consulta
+    (system_msg + user_msg) ao modelo de system_data, com timeouts,
+    retries e fallbacks de modules.resilience, gravada ou reproduzida
+    por modules.cassette quando cassette_mode estiver ativo.
+    Se client for None, usa o cliente compartilhado do base_url (llm_client).
+    on_target(target) recebe o system_data ou o fallback que respondeu
+    (não é chamado quando a resposta vem do cassette).
+    """
+    def open_stream(target, target_client, timeout):
+        return _chat_stream_once(target, system_msg, user_msg, target_client, timeout)
+
+    async for piece in cassette_stream( system_data,
+                                        system_msg,
+                                        user_msg,
+                                        lambda: resilient_stream(system_data, open_stream, client=client, on_target=on_target) ):
+        yield piece
+
+async def _chat_stream_once(system_data, system_msg, user_msg, client, timeout):
+    if client is None:
+        from article_introduction_generator.modules.llm_client import get_async_client
+        client = get_async_client(system_data)
+    options = _stream_options(system_data)
+
+    def create(**options):
+        # Os retries ficam a cargo de resilient_stream
+        return client.with_options(max_retries=0).chat.completions.create(
+            model=system_data["model"],
+            messages=[
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": user_msg},
+            ],
+            stream=True,
+            timeout=timeout,
+            **options,
+            **sampling_params(system_data)
+        )
+
+    with telemetry.request_trace(system_data) as trace:
+        trace.add("connect", 0)
+        with telemetry.http_tracing(trace):
+            try:
+                stream = await create(**options)
+            except Exception as error:
+                if not _rejects_stream_options(error, options):
+                    raise
+                options = {}
+                stream = await create()
+        account = _StreamUsage(trace, system_msg, user_msg, wait_usage=bool(options))
+        try:
+            async with stream:
+                async for event in stream:
+                    piece, done = account.feed(event)
+                    if piece:
+                        yield piece
+                    if done:
+                        break
+        finally:
+            account.finish()
+
+async def chat_complete(system_data, system_msg, user_msg, client=None, on_target=None):
+    """
+    Texto completo de uma única consulta; ver chat_stream.
+    """
+    OUT = ""
+    async for piece in chat_stream(system_data, system_msg, user_msg, client=client, on_target=on_target):
+        OUT += piece
+    return OUT
+
+async def consultation_in_depth_stream(system_data, json_data, client=None, use_cache=True, on_prompt_report=None):
+    """
+    Gerador assíncrono que entrega o texto da introdução à medida que chega.
+    Em caso de acerto no cache, a resposta inteira é entregue num único pedaço.
+    Se client for None, usa o cliente compartilhado do base_url (llm_client).
+    on_prompt_report(report) recebe o PromptReport do prompt enviado.
+    """
+    with telemetry.span("prompt_build"):
+        json_data, report = fit_prompt(system_data, json_data)
+    if on_prompt_report is not None:
+        on_prompt_report(report)
+
+    cache = get_response_cache(system_data, use_cache)
+    if cache is not None:
+        key = consultation_cache_key(system_data, json_data)
+        OUT = cache.get(key)
+        if OUT is not None:
+            telemetry.set_attr("cached", True)
+            yield OUT
+            return
+
+    with telemetry.span("prompt_encode"):
+        encoding = get_prompt_encoding(system_data)
+        system_msg = build_system_prompt(encoding)
+        user_msg = build_user_message(json_data, encoding)
+
+    # Resposta de um fallback não vai para o cache, cuja chave é do modelo principal
+    answered = []
+
+    OUT = ""
+    async for piece in chat_stream( system_data,
+                                    system_msg,
+                                    user_msg,
+                                    client=client,
+                                    on_target=answered.append ):
+        OUT += piece
+        yield piece
+
+    if cache is not None and OUT and all(target is system_data for target in answered):
+        try:
+            cache.put(key, OUT)
+        except OSError:
+            pass  # a resposta já foi recebida; só não fica no cache
+
+async def consultation_in_depth_async(system_data, json_data, client=None, use_cache=True, on_prompt_report=None):
+    """
+    Versão assíncrona de consultation_in_depth.
+    Se client for None, usa o cliente compartilhado do base_url (llm_client).
+    """
+    OUT = ""
+    async for chunk in consultation_in_depth_stream(system_data,
+                                                    json_data,
+                                                    client=client,
+                                                    use_cache=use_cache,
+                                                    on_prompt_report=on_prompt_report):
+        OUT += chunk
+    return OUT
+
+async def consult_many(system_data, json_data_list, max_concurrency=8, on_result=None, use_cache=True, on_prompt_report=None, consult_fn=None, on_usage=None):
+    """
+    Envia várias consultas ao mesmo tempo num único event loop,
+    com no máximo max_concurrency requisições em andamento.
+
+    Retorna uma lista na mesma ordem de json_data_list, onde cada elemento
+    é o texto gerado ou a exceção levantada por aquela consulta.
+    on_result(index, result, error) é chamado assim que cada consulta termina.
+    on_prompt_report(index, report) recebe o PromptReport de cada prompt.
+    Cada consulta é registrada como uma geração na telemetria e
+    on_usage(index, trace) recebe o seu telemetry.Trace ao terminar.
+    consult_fn troca a consulta usada em cada json_data (por padrão
+    consultation_in_depth_async) e deve aceitar os mesmos argumentos; os
+    elementos de json_data_list são repassados a ela como estão.
+    """
+    from article_introduction_generator.modules.llm_client import get_async_client
+
+    if consult_fn is None:
+        consult_fn = consultation_in_depth_async
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    client = get_async_client(system_data)
+
+    async def one(index, json_data):
+        report_cb = None
+        if on_prompt_report is not None:
+            report_cb = lambda report: on_prompt_report(index, report)
+
+        async with semaphore:
+            trace = telemetry.Trace(system_data, source="batch", mode=system_data.get("generation_mode"))
+            telemetry.activate(trace)
+            try:
+                result, error = await consult_fn(   system_data,
+                                                    json_data,
+                                                    client=client,
+                                                    use_cache=use_cache,
+                                                    on_prompt_report=report_cb ), None
+            except Exception as e:
+                result, error = e, e
+            trace.finish(telemetry.status_of(error))
+            if on_usage is not None:
+                on_usage(index, trace)
+
+        if on_result is not None:
+            on_result(index, None if error else result, error)
+        return result
+
+    return await asyncio.gather(*(one(i, jd) for i, jd in enumerate(json_data_list)))
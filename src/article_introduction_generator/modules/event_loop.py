@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+
+class BackgroundEventLoop:
+    """
+    Um único event loop asyncio rodando numa thread daemon.
+
+    Permite que a GUI envie várias consultas ao mesmo tempo sem criar
+    uma thread do sistema operacional por requisição.
+    """
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread( target=self._run,
+                                            name="consultation-loop",
+                                            daemon=True )
+            self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """
+        Agenda a coroutine no loop e retorna um concurrent.futures.Future.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def shutdown(self, timeout=None, cleanup=None):
+        """
+        Cancela as tarefas em andamento, espera que terminem (fechando suas
+        requisições), executa a coroutine cleanup() se dada e para o loop.
+        """
+        with self._lock:
+            loop = self.loop
+        if loop is None or not loop.is_running():
+            self.stop(timeout)
+            return
+
+        async def finish():
+            current = asyncio.current_task()
+            tasks = [t for t in asyncio.all_tasks() if t is not current]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if cleanup is not None:
+                await cleanup()
+
+        try:
+            asyncio.run_coroutine_threadsafe(finish(), loop).result(timeout)
+        except Exception:
+            pass  # o loop é parado de qualquer forma
+        self.stop(timeout)
+
+    def stop(self, timeout=None):
+        with self._lock:
+            if self.thread is None:
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout)
+            if not self.thread.is_alive():
+                self.loop.close()
+            self.thread = None
+            self.loop = None
+
+
+_BACKGROUND_LOOP = BackgroundEventLoop()
+
+def get_background_loop():
+    """
+    Retorna o loop compartilhado por todo o programa, iniciando-o se necessário.
+    """
+    _BACKGROUND_LOOP.start()
+    return _BACKGROUND_LOOP
+
+def shutdown_background_loop(timeout=None, cleanup=None):
+    """
+    Encerra o loop compartilhado, se estiver rodando (ver BackgroundEventLoop.shutdown).
+    """
+    _BACKGROUND_LOOP.shutdown(timeout, cleanup)
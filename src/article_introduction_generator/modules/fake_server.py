@@ -0,0 +1,308 @@
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+WORDS = (   "deep", "learning", "models", "have", "recently", "achieved", "remarkable",
+            "results", "in", "many", "tasks", "however", "their", "performance", "under",
+            "realistic", "conditions", "remains", "limited", "by", "data", "scarcity",
+            "and", "computational", "cost", "this", "work", "addresses", "the", "gap" )
+
+
+def fake_text(n_words, seed=0):
+    """
+    Texto determinístico com n_words palavras, dividido em parágrafos.
+    """
+    rng = random.Random(seed)
+    words = []
+    for i in range(n_words):
+        word = rng.choice(WORDS)
+        if i % 80 == 79:
+            word += ".\n\n"
+        elif i % 16 == 15:
+            word += "."
+        words.append(word)
+    return " ".join(words).replace("\n\n ", "\n\n")
+
+
+class FakeChatServer(ThreadingHTTPServer):
+    """
+    Servidor local compatível com a API de chat completions da OpenAI,
+    para testes e benchmarks sem rede. Responde texto sintético com
+    latência, ritmo de streaming e falhas configuráveis.
+
+    latency: segundos até o primeiro pedaço (ou até a resposta não-stream).
+    tokens_per_second: ritmo de geração; 0 entrega tudo de uma vez.
+    chunk_tokens: palavras (~tokens) por pedaço do stream.
+    response_tokens: tamanho da resposta em palavras.
+    error_429, error_500, error_timeout: probabilidade de cada falha.
+    fail_first: as primeiras N requisições falham com fail_status.
+    hang: segundos que uma requisição "timeout" fica sem responder.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(   self,
+                    host=DEFAULT_HOST,
+                    port=DEFAULT_PORT,
+                    latency=0.5,
+                    tokens_per_second=50.0,
+                    chunk_tokens=4,
+                    response_tokens=600,
+                    error_429=0.0,
+                    error_500=0.0,
+                    error_timeout=0.0,
+                    fail_first=0,
+                    fail_status=429,
+                    hang=300.0,
+                    seed=None,
+                    verbose=False ):
+        super().__init__((host, port), FakeChatHandler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.response_tokens = response_tokens
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.error_timeout = error_timeout
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.hang = hang
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def next_request(self):
+        """
+        Numera a requisição e sorteia a falha injetada: None, 429, 500 ou "timeout".
+        """
+        with self.lock:
+            self.request_count += 1
+            number = self.request_count
+            if number <= self.fail_first:
+                return number, self.fail_status
+            draw = self.rng.random()
+
+        if draw < self.error_429:
+            return number, 429
+        draw -= self.error_429
+        if draw < self.error_500:
+            return number, 500
+        draw -= self.error_500
+        if draw < self.error_timeout:
+            return number, "timeout"
+        return number, None
+
+
+class FakeChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        payload = b"data: " + data + b"\n\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(payload), payload))
+        self.wfile.flush()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {
+                "object": "list",
+                "data": [{"id": "fake-model", "object": "model", "created": 0, "owned_by": "fake"}]
+            })
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "not_found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON", "type": "invalid_request_error"}})
+            return
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "not_found"}})
+            return
+
+        server = self.server
+        number, failure = server.next_request()
+
+        if failure == "timeout":
+            time.sleep(server.hang)
+            self.close_connection = True
+            return
+        if failure == 429:
+            self._send_json(429,
+                            {"error": {"message": "Rate limit reached (injected)", "type": "rate_limit"}},
+                            headers={"Retry-After": "1"})
+            return
+        if failure is not None:
+            self._send_json(failure, {"error": {"message": "Server error (injected)", "type": "server_error"}})
+            return
+
+        model = request.get("model", "fake-model")
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+        words = fake_text(server.response_tokens, seed=number).split(" ")
+        usage = {   "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(words),
+                    "total_tokens": prompt_tokens + len(words) }
+        completion_id = f"chatcmpl-fake-{number}"
+
+        time.sleep(server.latency)
+
+        if not request.get("stream"):
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{   "index": 0,
+                                "message": {"role": "assistant", "content": " ".join(words)},
+                                "finish_reason": "stop" }],
+                "usage": usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta, finish_reason=None, **extra):
+            return json.dumps(dict({"id": completion_id,
+                                    "object": "chat.completion.chunk",
+                                    "created": int(time.time()),
+                                    "model": model,
+                                    "choices": [{   "index": 0,
+                                                    "delta": delta,
+                                                    "finish_reason": finish_reason }]},
+                                   **extra)).encode("utf-8")
+
+        step = server.chunk_tokens
+        interval = step / server.tokens_per_second if server.tokens_per_second > 0 else 0
+        try:
+            self._send_chunk(event({"role": "assistant", "content": ""}))
+            for i in range(0, len(words), step):
+                if i and interval:
+                    time.sleep(interval)
+                piece = " ".join(words[i:i + step])
+                self._send_chunk(event({"content": piece if i == 0 else " " + piece}))
+            self._send_chunk(event({}, "stop"))
+            if (request.get("stream_options") or {}).get("include_usage"):
+                self._send_chunk(json.dumps({   "id": completion_id,
+                                                "object": "chat.completion.chunk",
+                                                "created": int(time.time()),
+                                                "model": model,
+                                                "choices": [],
+                                                "usage": usage }).encode("utf-8"))
+            self._send_chunk(b"[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # O cliente desistiu (por exemplo, a cópia perdedora de uma requisição hedged)
+            self.close_connection = True
+
+
+def start_fake_server(**options):
+    """
+    Inicia um FakeChatServer numa thread daemon e o retorna.
+    Use port=0 para uma porta livre; a URL fica em server.base_url.
+    Pare com server.shutdown().
+    """
+    server = FakeChatServer(**options)
+    threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True).start()
+    return server
+
+
+def fake_server_main(argv):
+    """
+    Ponto de entrada de: article-introduction-generator fake-server
+    """
+    parser = argparse.ArgumentParser(
+        prog="article-introduction-generator fake-server",
+        description="Run a local OpenAI-compatible chat completions server that answers synthetic "
+                    "text, for offline tests and load benchmarks."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Interface to listen on (default: {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT}).")
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="Seconds before the first chunk (default: 0.5).")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0,
+                        help="Streaming rate; 0 sends everything at once (default: 50).")
+    parser.add_argument("--chunk-tokens", type=int, default=4,
+                        help="Tokens per streamed chunk (default: 4).")
+    parser.add_argument("--response-tokens", type=int, default=600,
+                        help="Length of each answer in tokens (default: 600).")
+    parser.add_argument("--error-429", type=float, default=0.0,
+                        help="Probability of answering 429 Too Many Requests.")
+    parser.add_argument("--error-500", type=float, default=0.0,
+                        help="Probability of answering 500 Internal Server Error.")
+    parser.add_argument("--error-timeout", type=float, default=0.0,
+                        help="Probability of never answering (see --hang).")
+    parser.add_argument("--fail-first", type=int, default=0,
+                        help="Fail the first N requests with --fail-status.")
+    parser.add_argument("--fail-status", type=int, default=429,
+                        help="HTTP status used by --fail-first (default: 429).")
+    parser.add_argument("--hang", type=float, default=300.0,
+                        help="Seconds a timed out request stays open (default: 300).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for error injection.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+
+    try:
+        server = FakeChatServer(host=args.host,
+                                port=args.port,
+                                latency=args.latency,
+                                tokens_per_second=args.tokens_per_second,
+                                chunk_tokens=args.chunk_tokens,
+                                response_tokens=args.response_tokens,
+                                error_429=args.error_429,
+                                error_500=args.error_500,
+                                error_timeout=args.error_timeout,
+                                fail_first=args.fail_first,
+                                fail_status=args.fail_status,
+                                hang=args.hang,
+                                seed=args.seed,
+                                verbose=args.verbose)
+    except OSError as e:
+        print(f"Cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 2
+
+    print(f"Fake LLM server at {server.base_url}  (set it as base_url in config.llm.json)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -0,0 +1,41 @@
+import os
+import json
+import hashlib
+
+import article_introduction_generator.about as about
+
+# ---------- Path to generation state directory ----------
+STATE_DIR = os.path.join(   os.path.expanduser("~"),
+                            ".config",
+                            about.__package__,
+                            "generations" )
+
+
+def state_path_for(paper_path, directory=STATE_DIR):
+    """
+    Arquivo onde fica o estado da última geração de paper_path.
+    """
+    digest = hashlib.sha1(os.path.abspath(paper_path).encode("utf-8")).hexdigest()
+    return os.path.join(directory, digest + ".json")
+
+
+def load_state(paper_path, directory=STATE_DIR):
+    """
+    Estado salvo por save_state, ou None se não existir ou estiver corrompido.
+    """
+    try:
+        with open(state_path_for(paper_path, directory), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def save_state(paper_path, state, directory=STATE_DIR):
+    os.makedirs(directory, exist_ok=True)
+
+    path = state_path_for(paper_path, directory)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(dict(state, paper_path=os.path.abspath(paper_path)), f, ensure_ascii=False)
+    os.replace(tmp_path, path)
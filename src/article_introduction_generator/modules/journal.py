@@ -0,0 +1,163 @@
+import os
+import json
+import hashlib
+
+import article_introduction_generator.about as about
+
+# ---------- Path to edit journals ----------
+JOURNAL_DIR = os.path.join( os.path.expanduser("~"),
+                            ".config",
+                            about.__package__,
+                            "journals" )
+
+
+def journal_path_for(paper_path, directory=JOURNAL_DIR):
+    """
+    Arquivo JSONL com as edições de paper_path ainda não gravadas nele.
+    """
+    digest = hashlib.sha1(os.path.abspath(paper_path).encode("utf-8")).hexdigest()
+    return os.path.join(directory, digest + ".jsonl")
+
+
+def file_signature(path):
+    """
+    Tamanho e mtime de path: identifica a versão do arquivo sobre a qual
+    as edições do journal foram feitas.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def apply_ops(data, ops):
+    """
+    Aplica a data (o dicionário do *.intro.json) as operações do journal:
+        {"op": "set",    "path": [...], "value": valor}
+        {"op": "del",    "path": [...]}
+        {"op": "rename", "path": [..., chave], "to": nova_chave}
+    rename mantém a posição da chave no dicionário.
+    """
+    for op in ops:
+        path = op.get("path") or []
+        if not path:
+            continue
+
+        parent = data
+        for key in path[:-1]:
+            if not isinstance(parent.get(key), dict):
+                parent[key] = {}
+            parent = parent[key]
+        last = path[-1]
+
+        if op["op"] == "set":
+            parent[last] = op.get("value")
+        elif op["op"] == "del":
+            parent.pop(last, None)
+        elif op["op"] == "rename" and last in parent:
+            items = [((op["to"] if k == last else k), v) for k, v in parent.items()]
+            parent.clear()
+            parent.update(items)
+    return data
+
+
+def _read(path):
+    header, ops = None, []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # última linha truncada por uma queda
+                if entry.get("op") == "base":
+                    header = entry
+                else:
+                    ops.append(entry)
+    except OSError:
+        pass
+    return header, ops
+
+
+class Journal:
+    """
+    Edições de um artigo gravadas como pequenas operações num arquivo
+    append-only, sem reescrever o *.intro.json. A primeira linha guarda a
+    assinatura do arquivo base; compactar é gravar o artigo e chamar clear().
+    """
+    def __init__(self, paper_path, directory=JOURNAL_DIR):
+        self.paper_path = paper_path
+        self.path = journal_path_for(paper_path, directory)
+        self.count = 0
+
+    def replay(self, data):
+        """
+        Aplica a data as edições pendentes e retorna quantas eram. Um journal
+        feito sobre outra versão do arquivo (já compactado, ou alterado fora
+        do programa) é descartado.
+        """
+        header, ops = _read(self.path)
+        if header is None:
+            self.clear()
+            return 0
+        if header.get("base") != file_signature(self.paper_path):
+            self.clear()
+            return 0
+
+        apply_ops(data, ops)
+        self.count = len(ops)
+        return self.count
+
+    def append(self, ops):
+        if not ops:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        lines = []
+        if not os.path.exists(self.path):
+            lines.append({  "op": "base",
+                            "paper": os.path.abspath(self.paper_path),
+                            "base": file_signature(self.paper_path) })
+        lines.extend(ops)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in lines:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.count += len(ops)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.count = 0
+
+
+def pending_journals(directory=JOURNAL_DIR):
+    """
+    Artigos com edições não compactadas (o programa foi fechado sem gravá-las),
+    do journal mais recente para o mais antigo. Journals de arquivos que não
+    existem mais ou que mudaram depois deles são removidos.
+    """
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(".jsonl")]
+    except FileNotFoundError:
+        return []
+
+    found = []
+    for name in names:
+        path = os.path.join(directory, name)
+        header, ops = _read(path)
+        paper = header.get("paper") if header else None
+        if not ops or not paper or header.get("base") != file_signature(paper):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        found.append((os.path.getmtime(path), paper))
+
+    return [paper for _, paper in sorted(found, reverse=True)]
@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import hashlib
+
+import article_introduction_generator.about as about
+
+# ---------- Path to ledger directory ----------
+LEDGER_DIR = os.path.join(  os.path.expanduser("~"),
+                            ".config",
+                            about.__package__,
+                            "ledgers" )
+
+
+def ledger_path_for(paper_path, directory=LEDGER_DIR):
+    """
+    Arquivo JSONL com o consumo de tokens de paper_path.
+    """
+    digest = hashlib.sha1(os.path.abspath(paper_path).encode("utf-8")).hexdigest()
+    return os.path.join(directory, digest + ".jsonl")
+
+
+def price(system_data, model, prompt_tokens, completion_tokens):
+    """
+    Custo em dólares pela tabela prices_per_mtoken de system_data
+    ({modelo: {"input": $/Mtoken, "output": $/Mtoken}}), ou None se o
+    modelo não estiver na tabela.
+    """
+    prices = (system_data.get("prices_per_mtoken") or {}).get(model)
+    if not isinstance(prices, dict):
+        return None
+    return ( prompt_tokens * float(prices.get("input", 0))
+           + completion_tokens * float(prices.get("output", 0)) ) / 1e6
+
+
+def usage_entries(system_data, trace, kind="generation"):
+    """
+    Uma entrada do ledger por modelo usado na geração de trace
+    (ver modules.telemetry.Trace.usage_by_model), já com o custo.
+    """
+    entries = []
+    for model, (prompt_tokens, completion_tokens, estimated) in trace.usage_by_model.items():
+        entry = {   "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "kind": kind,
+                    "model": model,
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "cost": price(system_data, model, prompt_tokens, completion_tokens) }
+        if estimated:
+            entry["estimated"] = True
+        entries.append(entry)
+    return entries
+
+
+class Ledger:
+    """
+    Consumo acumulado de um artigo. Sem paper_path, as entradas ficam só
+    em memória até attach() associá-lo a um arquivo.
+    """
+    def __init__(self, paper_path=None, directory=LEDGER_DIR):
+        self.directory = directory
+        self.paper_path = None
+        self.entries = []
+        self._pending = []
+        if paper_path:
+            self.attach(paper_path, carry_pending=False)
+
+    def _load(self):
+        entries = []
+        try:
+            with open(ledger_path_for(self.paper_path, self.directory), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return entries
+
+    def _write(self, entries):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(ledger_path_for(self.paper_path, self.directory), "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def attach(self, paper_path, carry_pending=True):
+        """
+        Passa a gravar no ledger de paper_path. Com carry_pending, as entradas
+        ainda não gravadas (artigo sem arquivo) são levadas junto.
+        """
+        pending = self._pending if carry_pending else []
+        self.paper_path = paper_path
+        self.entries = self._load()
+        self._pending = []
+        self.add(pending)
+
+    def add(self, entries):
+        if not entries:
+            return
+        self.entries.extend(entries)
+        if self.paper_path:
+            self._write(entries)
+        else:
+            self._pending.extend(entries)
+
+    def totals(self):
+        """
+        (custo, tokens, custo_completo): custo_completo é False se algum
+        modelo não tinha preço na tabela.
+        """
+        cost, tokens, complete = 0.0, 0, True
+        for entry in self.entries:
+            tokens += entry.get("prompt_tokens", 0) + entry.get("completion_tokens", 0)
+            if entry.get("cost") is None:
+                complete = False
+            else:
+                cost += entry["cost"]
+        return cost, tokens, complete
+
+
+def format_cost(cost, tokens, complete=True):
+    if tokens >= 1000:
+        tokens_text = f"{tokens / 1000:.1f}k"
+    else:
+        tokens_text = str(tokens)
+    return f"${cost:.4f}{'' if complete else '+?'} · {tokens_text} tokens"
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+
+from article_introduction_generator.modules.telemetry import httpx_request_hook, httpx_async_request_hook
+
+# Pool de conexões keep-alive compartilhado por todas as consultas a um base_url
+POOL_LIMITS = httpx.Limits( max_connections=64,
+                            max_keepalive_connections=16,
+                            keepalive_expiry=300 )
+
+_lock = threading.Lock()
+
+# (base_url, api_key) -> OpenAI
+_clients = {}
+
+# event loop -> {(base_url, api_key) -> (AsyncOpenAI, httpx.AsyncClient)}
+# Clientes assíncronos ficam presos ao loop em que foram criados.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _client_key(system_data):
+    base_url = (system_data.get("base_url") or "").strip()
+    return base_url, system_data["api_key"]
+
+
+def _client_kwargs(key):
+    base_url, api_key = key
+    kwargs = {"api_key": api_key}
+    if base_url:
+        kwargs["base_url"] = base_url
+    return kwargs
+
+
+def get_client(system_data):
+    """
+    Cliente OpenAI síncrono de longa duração para o base_url de system_data.
+    É compartilhado e não deve ser fechado por quem o usa.
+    """
+    key = _client_key(system_data)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            http_client = httpx.Client( limits=POOL_LIMITS,
+                                        event_hooks={"request": [httpx_request_hook]} )
+            client = OpenAI(http_client=http_client, **_client_kwargs(key))
+            _clients[key] = client
+    return client
+
+
+def _get_async_pair(system_data):
+    loop = asyncio.get_running_loop()
+    key = _client_key(system_data)
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        pair = clients.get(key)
+        if pair is None:
+            http_client = httpx.AsyncClient(limits=POOL_LIMITS,
+                                            event_hooks={"request": [httpx_async_request_hook]})
+            pair = (AsyncOpenAI(http_client=http_client, **_client_kwargs(key)), http_client)
+            clients[key] = pair
+    return pair
+
+
+def get_async_client(system_data):
+    """
+    Cliente AsyncOpenAI de longa duração para o base_url de system_data,
+    um por event loop. Deve ser chamado de dentro do loop que vai usá-lo.
+    É compartilhado e não deve ser fechado por quem o usa.
+    """
+    return _get_async_pair(system_data)[0]
+
+
+async def prewarm_async(system_data):
+    """
+    Abre antecipadamente a conexão (DNS, TCP e TLS) com o base_url no pool
+    do cliente assíncrono, para que a primeira consulta não pague esse custo.
+    Erros são ignorados: o objetivo é só deixar a conexão pronta.
+    """
+    if not system_data.get("api_key"):
+        return False
+
+    client, http_client = _get_async_pair(system_data)
+    try:
+        # HEAD não tem corpo: a conexão volta logo para o pool
+        await http_client.head(str(client.base_url), timeout=10)
+    except httpx.HTTPError:
+        return False
+    return True
+
+
+async def close_async_clients():
+    """
+    Fecha os clientes assíncronos do loop corrente.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.pop(loop, {})
+    for client, _ in clients.values():
+        await client.close()
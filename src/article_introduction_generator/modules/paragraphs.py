@@ -0,0 +1,465 @@
+import re
+import json
+import asyncio
+import hashlib
+
+from article_introduction_generator.modules.cache import cache_key, sampling_params
+from article_introduction_generator.modules.prompt_builder import fit_to_budget, estimate_tokens
+from article_introduction_generator.modules.consult import (
+    SYSTEM_PROMPT,
+    build_system_prompt, get_prompt_encoding, get_prompt_token_budget,
+    get_response_cache, chat_complete
+)
+from article_introduction_generator.modules.prompt_encoding import encode_json_data
+from article_introduction_generator.modules.llm_client import get_async_client
+from article_introduction_generator.modules import telemetry
+
+# Modos de geração (chave "generation_mode" de config.llm.json)
+MODE_SINGLE     = "single"      # uma única consulta para toda a introdução
+MODE_PARAGRAPHS = "paragraphs"  # uma consulta por parágrafo, em paralelo
+
+# Costura final (chave "paragraph_stitch" de config.llm.json)
+STITCH_NONE        = "none"         # apenas junta os parágrafos
+STITCH_TRANSITIONS = "transitions"  # o LLM reescreve só as frases de abertura
+STITCH_REWRITE     = "rewrite"      # o LLM reescreve o texto inteiro
+
+EARLY_ROLES = ("foundational", "early_state_of_art")
+
+# Seções enviadas a todos os parágrafos
+COMMON_SECTIONS = ( ("paper_profile", "title"),
+                    ("paper_profile", "author_intended_summary"),
+                    ("writing_guidelines",) )
+
+# Plano de parágrafos do USER_PROMPT e as seções do JSON que cada um usa
+PARAGRAPH_PLAN = (
+    {
+        "id": "context",
+        "count": "one paragraph",
+        "instruction": "General context of the topic. Broad research domain overview and importance.",
+        "sections": ( ("paper_profile", "domain"),
+                      ("paper_profile", "keywords"),
+                      ("research_problem", "research_domain_overview") ),
+    },
+    {
+        "id": "problem",
+        "count": "one paragraph",
+        "instruction": "Specific problem within the topic that the text focuses on. "
+                       "Narrow down to the specific problem and practical challenges.",
+        "sections": ( ("research_problem", "specific_problem"),
+                      ("research_problem", "practical_challenges") ),
+    },
+    {
+        "id": "state_of_art_early",
+        "count": "one or two paragraphs",
+        "instruction": "First part of the integrated state of the art discussion: "
+                       "foundational and early state of the art works. "
+                       "Highlight limitations where relevant.",
+        "sections": ( ("related_work", "references"), ),
+        "roles": EARLY_ROLES,
+    },
+    {
+        "id": "state_of_art_recent",
+        "count": "one or two paragraphs",
+        "instruction": "Second part of the integrated state of the art discussion: "
+                       "recent advances and works that contrast with ours. "
+                       "Highlight limitations where relevant.",
+        "sections": ( ("related_work", "references"), ),
+        "exclude_roles": EARLY_ROLES,
+    },
+    {
+        "id": "synthesis",
+        "count": "one paragraph",
+        "instruction": "Synthesize common trends and open problems of the literature.",
+        "sections": ( ("related_work", "human_curated_synthesis", "common_trends"),
+                      ("related_work", "human_curated_synthesis", "open_problems"),
+                      ("research_problem", "why_existing_solutions_are_insufficient") ),
+    },
+    {
+        "id": "solution",
+        "count": "one paragraph",
+        "instruction": "Proposed solution of the paper. Explicitly state the research gap "
+                       "and position the paper's contributions as a response to this gap. "
+                       "Integrate the contributions naturally, not as a list.",
+        "sections": ( ("related_work", "human_curated_synthesis", "explicit_research_gap"),
+                      ("contributions",) ),
+    },
+)
+
+REFERENCES_PATH = ("related_work", "references")
+
+# Todos os caminhos de seção usados pelo plano
+PLAN_PATHS = set(COMMON_SECTIONS)
+for _entry in PARAGRAPH_PLAN:
+    PLAN_PATHS.update(_entry["sections"])
+
+PARAGRAPH_USER_PROMPT = """
+The INTRODUCTION section of the paper is being written one part at a time,
+and the other parts are written separately. Using the JSON below, write only
+the part described here.
+
+Part {position} of {total}: {instruction}
+
+Write {count}. Use LaTeX-style bibliographic formatting for citations.
+Output only the paragraph text.
+
+Here is the JSON input:
+
+"""
+
+STITCH_TRANSITIONS_PROMPT = """
+Below are the paragraphs of the INTRODUCTION section of a paper, in order.
+They were written independently. Improve the coherence of the text by
+rewriting only the FIRST sentence of the paragraphs that need a better
+transition from the previous paragraph or that repeat previous information.
+Keep every citation and fact; do not add new information.
+
+Answer only with a JSON object whose keys are the paragraph numbers and whose
+values are the new first sentences, for example {"3": "New first sentence."}.
+Answer {} if no change is needed.
+
+"""
+
+STITCH_REWRITE_PROMPT = """
+Below are the paragraphs of the INTRODUCTION section of a paper, in order.
+They were written independently. Merge them into one coherent introduction:
+add transitions and remove redundant information. Keep every citation and fact;
+do not add new information. Output only the final text.
+
+"""
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+JSON_OBJECT  = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def _has_content(value):
+    if isinstance(value, str):
+        return bool(value.strip())
+    if isinstance(value, list):
+        return any(_has_content(v) for v in value)
+    if isinstance(value, dict):
+        return any(_has_content(v) for v in value.values())
+    return False
+
+
+def select_sections(json_data, paths):
+    """
+    Sub-documento de json_data contendo apenas os caminhos pedidos
+    (e apenas os que têm conteúdo), na mesma estrutura aninhada.
+    """
+    result = {}
+    for path in paths:
+        value = json_data
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if not _has_content(value):
+            continue
+
+        target = result
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    return result
+
+
+def _filter_references(section_data, roles=None, exclude_roles=None):
+    refs = section_data.get("related_work", {}).get("references")
+    if not isinstance(refs, dict):
+        return
+
+    kept = {}
+    for key, ref in refs.items():
+        role = ref.get("introduction_paragraph_role", "") if isinstance(ref, dict) else ""
+        role = (role or "").strip()
+        if roles is not None and role not in roles:
+            continue
+        if exclude_roles is not None and role in exclude_roles:
+            continue
+        kept[key] = ref
+
+    if kept:
+        section_data["related_work"]["references"] = kept
+    else:
+        del section_data["related_work"]["references"]
+        if not section_data["related_work"]:
+            del section_data["related_work"]
+
+
+def paragraph_inputs(json_data):
+    """
+    Lista de (entrada do PARAGRAPH_PLAN, json_data restrito às suas seções).
+    Parágrafos sem nenhuma seção própria preenchida são omitidos.
+    """
+    inputs = []
+    for entry in PARAGRAPH_PLAN:
+        own = select_sections(json_data, entry["sections"])
+        _filter_references(own, entry.get("roles"), entry.get("exclude_roles"))
+        if not _has_content(own):
+            continue
+
+        section_data = select_sections(json_data, COMMON_SECTIONS)
+        for key, value in own.items():
+            if isinstance(value, dict) and isinstance(section_data.get(key), dict):
+                section_data[key].update(value)
+            else:
+                section_data[key] = value
+        inputs.append((entry, section_data))
+    return inputs
+
+
+def build_paragraph_message(entry, position, total, section_data, encoding):
+    language, text = encode_json_data(section_data, encoding)
+    prompt = PARAGRAPH_USER_PROMPT.format(  position=position,
+                                            total=total,
+                                            instruction=entry["instruction"],
+                                            count=entry["count"] )
+    return prompt + "```" + language + "\n" + text + "\n```"
+
+
+async def _cached_complete(system_data, system_msg, prompt_id, key_data, user_msg, client, use_cache):
+    """
+    chat_complete com o cache de respostas; a chave usa prompt_id e key_data
+    no lugar do USER_PROMPT e do json_data da consulta completa.
+    """
+    cache = get_response_cache(system_data, use_cache)
+    if cache is not None:
+        key = cache_key(system_data.get("base_url"),
+                        system_data["model"],
+                        system_msg,
+                        prompt_id,
+                        key_data,
+                        sampling_params(system_data))
+        OUT = cache.get(key)
+        if OUT is not None:
+            return OUT
+
+    # Resposta de um fallback não vai para o cache, cuja chave é do modelo principal
+    answered = []
+    OUT = await chat_complete(  system_data,
+                                system_msg,
+                                user_msg,
+                                client=client,
+                                on_target=answered.append )
+
+    if cache is not None and OUT and all(target is system_data for target in answered):
+        try:
+            cache.put(key, OUT)
+        except OSError:
+            pass  # a resposta já foi recebida; só não fica no cache
+    return OUT
+
+
+async def generate_paragraph(system_data, entry, position, total, section_data, client=None, use_cache=True, on_prompt_report=None):
+    """
+    Gera um único parágrafo do plano a partir das suas seções do JSON.
+    """
+    with telemetry.span("prompt_build"):
+        encoding = get_prompt_encoding(system_data)
+        system_msg = build_system_prompt(encoding)
+
+        render = lambda data: build_paragraph_message(entry, position, total, data, encoding)
+        section_data, report = fit_to_budget(   section_data,
+                                                get_prompt_token_budget(system_data),
+                                                render,
+                                                fixed_tokens=estimate_tokens(system_msg) )
+        user_msg = render(section_data)
+    if on_prompt_report is not None:
+        on_prompt_report(report)
+
+    OUT = await _cached_complete(   system_data,
+                                    system_msg,
+                                    PARAGRAPH_USER_PROMPT + entry["id"] + f":{position}/{total}",
+                                    section_data,
+                                    user_msg,
+                                    client,
+                                    use_cache )
+    return OUT.strip()
+
+
+def split_first_sentence(paragraph):
+    m = SENTENCE_END.search(paragraph)
+    if m is None:
+        return paragraph, ""
+    return paragraph[:m.start()], paragraph[m.end():]
+
+
+def apply_transitions(paragraphs, reply):
+    """
+    Troca a primeira frase dos parágrafos indicados na resposta JSON do LLM.
+    Respostas que não puderem ser interpretadas deixam o texto como está.
+    """
+    paragraphs = list(paragraphs)
+
+    m = JSON_OBJECT.search(reply or "")
+    if m is None:
+        return paragraphs
+    try:
+        changes = json.loads(m.group(0))
+    except ValueError:
+        return paragraphs
+    if not isinstance(changes, dict):
+        return paragraphs
+
+    for number, sentence in changes.items():
+        try:
+            index = int(number) - 1
+        except (TypeError, ValueError):
+            continue
+        if not (0 <= index < len(paragraphs)) or not isinstance(sentence, str) or not sentence.strip():
+            continue
+        _, rest = split_first_sentence(paragraphs[index])
+        paragraphs[index] = sentence.strip() + (" " + rest if rest else "")
+    return paragraphs
+
+
+def _numbered(paragraphs):
+    return "\n\n".join(f"[{i}]\n{p}" for i, p in enumerate(paragraphs, start=1))
+
+
+async def stitch_paragraphs(system_data, paragraphs, client=None, use_cache=True):
+    """
+    Junta os parágrafos numa introdução, com a costura de "paragraph_stitch".
+    """
+    mode = system_data.get("paragraph_stitch", STITCH_TRANSITIONS)
+    if mode == STITCH_NONE or len(paragraphs) < 2:
+        return "\n\n".join(paragraphs)
+
+    prompt = STITCH_REWRITE_PROMPT if mode == STITCH_REWRITE else STITCH_TRANSITIONS_PROMPT
+    reply = await _cached_complete( system_data,
+                                    SYSTEM_PROMPT,
+                                    prompt,
+                                    paragraphs,
+                                    prompt + _numbered(paragraphs),
+                                    client,
+                                    use_cache )
+
+    if mode == STITCH_REWRITE:
+        return reply.strip()
+    return "\n\n".join(apply_transitions(paragraphs, reply))
+
+
+def _sha(value):
+    payload = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def section_hashes(section_data):
+    """
+    Hash de cada seção de section_data, com o caminho "a.b.c" como chave.
+    Cada referência é uma seção própria, assim editar uma referência só
+    afeta os parágrafos que a citam.
+    """
+    hashes = {}
+
+    def walk(value, path):
+        if path == REFERENCES_PATH and isinstance(value, dict):
+            for key, ref in value.items():
+                hashes[".".join(path + (key,))] = _sha(ref)
+        elif path in PLAN_PATHS or not isinstance(value, dict):
+            hashes[".".join(path)] = _sha(value)
+        else:
+            for key, item in value.items():
+                walk(item, path + (key,))
+
+    walk(section_data, ())
+    return hashes
+
+
+def settings_hash(system_data):
+    """
+    Hash das configurações que mudam o texto de todos os parágrafos ou a
+    costura entre eles.
+    """
+    return _sha([   (system_data.get("base_url") or "").strip(),
+                    system_data.get("model"),
+                    get_prompt_encoding(system_data),
+                    SYSTEM_PROMPT,
+                    PARAGRAPH_USER_PROMPT,
+                    sampling_params(system_data),
+                    system_data.get("paragraph_stitch", STITCH_TRANSITIONS) ])
+
+
+async def regenerate_by_paragraphs(system_data, json_data, state=None, client=None, use_cache=True, on_prompt_report=None, on_paragraph=None):
+    """
+    Como generate_by_paragraphs, mas reaproveita literalmente os parágrafos de
+    state (resultado de uma execução anterior) cujas seções de entrada não
+    mudaram, e só consulta o LLM para os demais.
+
+    Retorna (introdução, novo state, lista de ids regenerados).
+    """
+    inputs = paragraph_inputs(json_data)
+    total = len(inputs)
+
+    settings = settings_hash(system_data)
+    previous = {}
+    if state and state.get("settings") == settings:
+        previous = state.get("paragraphs", {})
+
+    hashes = [section_hashes(section_data) for _, section_data in inputs]
+    regenerated = [ entry["id"]
+                    for (entry, _), h in zip(inputs, hashes)
+                    if previous.get(entry["id"], {}).get("sections") != h ]
+
+    order = [entry["id"] for entry, _ in inputs]
+    if not regenerated and state and state.get("order") == order and state.get("introduction"):
+        return state["introduction"], state, []
+
+    if client is None:
+        client = get_async_client(system_data)
+
+    done = 0
+
+    async def one(position, entry, section_data):
+        nonlocal done
+        if entry["id"] in regenerated:
+            text = await generate_paragraph(system_data,
+                                            entry,
+                                            position,
+                                            total,
+                                            section_data,
+                                            client=client,
+                                            use_cache=use_cache,
+                                            on_prompt_report=on_prompt_report )
+        else:
+            text = previous[entry["id"]]["text"]
+        done += 1
+        if on_paragraph is not None:
+            on_paragraph(done, total, entry["id"])
+        return text
+
+    paragraphs = await asyncio.gather(*(
+        one(position, entry, section_data)
+        for position, (entry, section_data) in enumerate(inputs, start=1)
+    ))
+    introduction = await stitch_paragraphs( system_data,
+                                            [p for p in paragraphs if p],
+                                            client=client,
+                                            use_cache=use_cache )
+
+    new_state = {
+        "settings": settings,
+        "order": order,
+        "paragraphs": {
+            entry["id"]: {"sections": h, "text": text}
+            for (entry, _), h, text in zip(inputs, hashes, paragraphs)
+        },
+        "introduction": introduction,
+    }
+    return introduction, new_state, regenerated
+
+
+async def generate_by_paragraphs(system_data, json_data, client=None, use_cache=True, on_prompt_report=None, on_paragraph=None):
+    """
+    Gera cada parágrafo do plano numa consulta separada, todas ao mesmo tempo,
+    e depois faz uma consulta curta de costura. O tempo total acompanha o
+    parágrafo mais lento, não a introdução inteira.
+
+    on_paragraph(done, total, paragraph_id) é chamado quando cada parágrafo fica pronto.
+    Aceita os mesmos argumentos de consultation_in_depth_async.
+    """
+    introduction, _, _ = await regenerate_by_paragraphs(system_data,
+                                                        json_data,
+                                                        client=client,
+                                                        use_cache=use_cache,
+                                                        on_prompt_report=on_prompt_report,
+                                                        on_paragraph=on_paragraph )
+    return introduction
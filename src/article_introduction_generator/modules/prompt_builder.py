@@ -0,0 +1,209 @@
+import re
+import copy
+
+# Palavras, sinais de pontuação, quebras de linha com indentação
+# e sequências de espaços (um espaço simples se junta à palavra seguinte)
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\n[ \t]*| {2,}", re.UNICODE)
+
+# Tamanho médio (em caracteres) de um token BPE para palavras longas
+CHARS_PER_TOKEN = 4
+
+# Limites sucessivos de truncamento dos abstracts
+ABSTRACT_LIMITS = (1500, 800, 400, 200)
+
+# Campos de cada referência removidos, nesta ordem, quando ainda não cabe
+LOW_PRIORITY_FIELDS = ( "abstract",
+                        "author_reported_strengths",
+                        "methodological_category" )
+
+# Textos longos de cada referência truncados no último passo
+LONG_REFERENCE_FIELDS = ( "central_technical_idea",
+                          "relevance_to_our_work" )
+LONG_REFERENCE_LIMIT = 300
+
+# Campos de BibTeX mantidos quando as entradas são compactadas
+BIBTEX_ESSENTIAL_FIELDS = ("author", "title", "year", "journal", "booktitle")
+
+BIBTEX_HEADER = re.compile(r"^\s*(@\w+\s*\{\s*[^,\s]+\s*),", re.DOTALL)
+BIBTEX_FIELD  = re.compile(
+    r"(\w+)\s*=\s*(\{(?:[^{}]|\{[^{}]*\})*\}|\"[^\"]*\"|[^,}\n]+)",
+    re.DOTALL
+)
+
+
+def estimate_tokens(text):
+    """
+    Estimativa offline do número de tokens de um texto.
+
+    Cada sinal de pontuação, quebra de linha (com sua indentação) ou
+    sequência de espaços conta como um token e cada palavra como
+    ceil(len/CHARS_PER_TOKEN) tokens, o que acompanha de perto os
+    tokenizadores BPE usados pelos modelos compatíveis com OpenAI,
+    sem depender de nenhum deles.
+    """
+    total = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        if piece[0].isspace():
+            total += 1
+        else:
+            total += (len(piece) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return total
+
+
+class PromptReport:
+    """
+    Resultado de fit_to_budget: tokens estimados, orçamento e o que foi cortado.
+    """
+    def __init__(self, estimated_tokens, budget, cuts):
+        self.estimated_tokens = estimated_tokens
+        self.budget = budget
+        self.cuts = cuts
+
+    @property
+    def fits(self):
+        return self.budget is None or self.estimated_tokens <= self.budget
+
+    def summary(self):
+        if self.budget is None:
+            text = f"~{self.estimated_tokens} prompt tokens"
+        else:
+            text = f"~{self.estimated_tokens}/{self.budget} prompt tokens"
+        if self.cuts:
+            text += "; " + "; ".join(self.cuts)
+        if not self.fits:
+            text += "; still over budget"
+        return text
+
+
+def _references(json_data):
+    related = json_data.get("related_work")
+    if not isinstance(related, dict):
+        return {}
+    refs = related.get("references")
+    return refs if isinstance(refs, dict) else {}
+
+
+def _truncate(text, limit):
+    if not isinstance(text, str) or len(text) <= limit:
+        return text
+    return text[:limit].rstrip() + "…"
+
+
+def compact_bibtex(entry):
+    """
+    Reduz uma entrada BibTeX ao tipo, chave e campos essenciais.
+    Entradas que não puderem ser interpretadas são devolvidas sem mudanças.
+    """
+    if not isinstance(entry, str):
+        return entry
+
+    header = BIBTEX_HEADER.match(entry)
+    if header is None:
+        return entry
+
+    fields = []
+    for name, value in BIBTEX_FIELD.findall(entry[header.end():]):
+        if name.lower() in BIBTEX_ESSENTIAL_FIELDS:
+            fields.append(f"{name.lower()}={value.strip()}")
+
+    head = re.sub(r"\s+", "", header.group(1))
+    return head + ", " + ", ".join(fields) + "}" if fields else head + "}"
+
+
+def _truncate_field(field, limit):
+    def step(json_data):
+        changed = False
+        for ref in _references(json_data).values():
+            if not isinstance(ref, dict):
+                continue
+            value = _truncate(ref.get(field), limit)
+            if value != ref.get(field):
+                ref[field] = value
+                changed = True
+        return changed
+    return step
+
+
+def _drop_field(field):
+    def step(json_data):
+        changed = False
+        for ref in _references(json_data).values():
+            if isinstance(ref, dict) and field in ref:
+                del ref[field]
+                changed = True
+        return changed
+    return step
+
+
+def _compact_bibtex_step(json_data):
+    changed = False
+    for ref in _references(json_data).values():
+        if not isinstance(ref, dict):
+            continue
+        value = compact_bibtex(ref.get("bibtex"))
+        if value != ref.get("bibtex"):
+            ref["bibtex"] = value
+            changed = True
+    return changed
+
+
+def _truncate_long_fields_step(json_data):
+    changed = False
+    for field in LONG_REFERENCE_FIELDS:
+        changed = _truncate_field(field, LONG_REFERENCE_LIMIT)(json_data) or changed
+    return changed
+
+
+def degradation_steps():
+    """
+    Lista ordenada de (grupo, descrição, função) aplicadas até o prompt caber.
+    Cada função altera o json_data recebido e retorna True se mudou algo;
+    passos seguidos do mesmo grupo aparecem uma única vez no relatório.
+    """
+    steps = []
+    for limit in ABSTRACT_LIMITS:
+        steps.append((  "abstract",
+                        f"abstracts truncated to {limit} characters",
+                        _truncate_field("abstract", limit) ))
+    steps.append((  "bibtex",
+                    "bibtex reduced to " + "/".join(BIBTEX_ESSENTIAL_FIELDS),
+                    _compact_bibtex_step ))
+    for field in LOW_PRIORITY_FIELDS:
+        steps.append((  "drop_" + field,
+                        f"dropped references.{field}",
+                        _drop_field(field) ))
+    steps.append((  "long_fields",
+                    f"reference texts truncated to {LONG_REFERENCE_LIMIT} characters",
+                    _truncate_long_fields_step ))
+    return steps
+
+
+def fit_to_budget(json_data, budget, render, fixed_tokens=0):
+    """
+    Degrada json_data até que render(json_data) + fixed_tokens caiba em budget.
+
+    render recebe o json_data e devolve o texto que será enviado; fixed_tokens
+    conta as partes constantes (por exemplo, o system prompt).
+    O json_data original nunca é alterado. Retorna (json_data, PromptReport);
+    se budget for None ou o prompt já couber, o próprio json_data é devolvido.
+    """
+    tokens = fixed_tokens + estimate_tokens(render(json_data))
+    if budget is None or tokens <= budget:
+        return json_data, PromptReport(tokens, budget, [])
+
+    fitted = copy.deepcopy(json_data)
+    cuts = []
+    last_group = None
+    for group, description, step in degradation_steps():
+        if not step(fitted):
+            continue
+        if group == last_group:
+            cuts[-1] = description
+        else:
+            cuts.append(description)
+        last_group = group
+        tokens = fixed_tokens + estimate_tokens(render(fitted))
+        if tokens <= budget:
+            break
+
+    return fitted, PromptReport(tokens, budget, cuts)
@@ -0,0 +1,153 @@
+import re
+import json
+
+# Formas de enviar o json_data ao LLM
+ENCODING_PRETTY      = "pretty"       # JSON com indent=2 (formato original)
+ENCODING_MINIFIED    = "minified"     # JSON sem espaços
+ENCODING_ABBREVIATED = "abbreviated"  # JSON sem espaços com chaves abreviadas
+ENCODING_COMPACT     = "compact"      # forma indentada "chave: valor", tipo YAML
+
+ENCODINGS = (   ENCODING_PRETTY,
+                ENCODING_MINIFIED,
+                ENCODING_ABBREVIATED,
+                ENCODING_COMPACT )
+
+DEFAULT_ENCODING = ENCODING_PRETTY
+
+# Abreviação dos nomes de campos do formato *.intro.json
+KEY_ABBREVIATIONS = {
+    "paper_profile": "pp",
+    "title": "ti",
+    "domain": "dom",
+    "target_journal": "tj",
+    "keywords": "kw",
+    "author_intended_summary": "sum",
+    "research_problem": "rp",
+    "research_domain_overview": "ov",
+    "specific_problem": "sp",
+    "practical_challenges": "pc",
+    "why_existing_solutions_are_insufficient": "wi",
+    "contributions": "co",
+    "related_work": "rw",
+    "references": "refs",
+    "bibtex": "bib",
+    "abstract": "abs",
+    "methodological_category": "mc",
+    "central_technical_idea": "cti",
+    "author_reported_strengths": "st",
+    "reported_limitations": "lim",
+    "relevance_to_our_work": "rel",
+    "introduction_paragraph_role": "role",
+    "human_curated_synthesis": "hcs",
+    "common_trends": "ct",
+    "open_problems": "op",
+    "explicit_research_gap": "gap",
+    "writing_guidelines": "wg",
+}
+
+# Dicionários cujas chaves são dados do usuário (chaves de citação)
+# e portanto nunca são abreviadas
+USER_KEYED_FIELDS = ("references",)
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def abbreviate_keys(value, parent_key=None):
+    """
+    Troca os nomes de campos conhecidos por KEY_ABBREVIATIONS, recursivamente.
+    """
+    if isinstance(value, list):
+        return [abbreviate_keys(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+
+    result = {}
+    for key, item in value.items():
+        if parent_key in USER_KEYED_FIELDS:
+            new_key = key
+        else:
+            new_key = KEY_ABBREVIATIONS.get(key, key)
+        result[new_key] = abbreviate_keys(item, parent_key=None if parent_key in USER_KEYED_FIELDS else key)
+    return result
+
+
+def abbreviation_legend():
+    return ", ".join(f"{short}={long}" for long, short in KEY_ABBREVIATIONS.items())
+
+
+def _is_empty(value):
+    if isinstance(value, str):
+        return not value.strip()
+    if isinstance(value, (list, dict)):
+        return len(value) == 0
+    return value is None
+
+
+def _compact_scalar(value):
+    if isinstance(value, str):
+        return WHITESPACE.sub(" ", value).strip()
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _compact_lines(value, depth, lines):
+    pad = " " * depth
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if _is_empty(item):
+                continue
+            if isinstance(item, (dict, list)):
+                lines.append(f"{pad}{key}:")
+                _compact_lines(item, depth + 1, lines)
+            else:
+                lines.append(f"{pad}{key}: {_compact_scalar(item)}")
+    elif isinstance(value, list):
+        for item in value:
+            if _is_empty(item):
+                continue
+            if isinstance(item, (dict, list)):
+                lines.append(f"{pad}-")
+                _compact_lines(item, depth + 1, lines)
+            else:
+                lines.append(f"{pad}- {_compact_scalar(item)}")
+    else:
+        lines.append(pad + _compact_scalar(value))
+
+
+def to_compact_text(json_data):
+    """
+    Forma indentada "chave: valor" (um espaço por nível), sem aspas,
+    sem campos vazios e com espaços em branco colapsados.
+    """
+    lines = []
+    _compact_lines(json_data, 0, lines)
+    return "\n".join(lines)
+
+
+def encode_json_data(json_data, encoding=DEFAULT_ENCODING):
+    """
+    Retorna (linguagem do bloco de código, texto) do json_data na codificação pedida.
+    """
+    if encoding == ENCODING_PRETTY:
+        return "json", json.dumps(json_data, ensure_ascii=False, indent=2)
+    if encoding == ENCODING_MINIFIED:
+        return "json", json.dumps(json_data, ensure_ascii=False, separators=(",", ":"))
+    if encoding == ENCODING_ABBREVIATED:
+        return "json", json.dumps(  abbreviate_keys(json_data),
+                                    ensure_ascii=False,
+                                    separators=(",", ":") )
+    if encoding == ENCODING_COMPACT:
+        return "yaml", to_compact_text(json_data)
+    raise ValueError(f"Unknown prompt encoding: {encoding!r}. Use one of: {', '.join(ENCODINGS)}")
+
+
+def system_prompt_addendum(encoding=DEFAULT_ENCODING):
+    """
+    Texto a acrescentar ao system prompt para que o LLM entenda a codificação.
+    """
+    if encoding == ENCODING_ABBREVIATED:
+        return ("\nThe keys of the user input JSON are abbreviated. "
+                "Legend (abbreviation=field): " + abbreviation_legend() + ".\n")
+    if encoding == ENCODING_COMPACT:
+        return ("\nThe user input JSON is given in an equivalent compact indented "
+                "\"key: value\" form (one space per nesting level, \"-\" for list items).\n")
+    return ""
@@ -0,0 +1,207 @@
+import sys
+import random
+import asyncio
+
+# Valores usados quando a chave não existe no config.llm.json
+DEFAULT_POLICY = {
+    "request_timeout": 120,     # segundos até o primeiro pedaço e entre pedaços
+    "total_timeout": 600,       # segundos para a consulta inteira, com retries
+    "max_retries": 3,           # novas tentativas por modelo antes do próximo fallback
+    "retry_backoff_base": 1.0,  # segundos; dobra a cada tentativa
+    "retry_backoff_max": 20.0,
+    "hedge_after": 0,           # segundos sem resposta até enviar uma cópia; 0 desativa
+    "fallbacks": []             # lista de {"model": ..., "base_url": ..., "api_key": ...}
+}
+
+
+class RetryPolicy:
+    """
+    Política de timeouts, retries com backoff exponencial (com jitter),
+    failover entre modelos e requisições "hedged", lida de system_data.
+    """
+    def __init__(self, system_data):
+        def get(name):
+            value = system_data.get(name)
+            return DEFAULT_POLICY[name] if value is None else value
+
+        self.request_timeout = float(get("request_timeout"))
+        self.total_timeout = float(get("total_timeout"))
+        self.max_retries = max(0, int(get("max_retries")))
+        self.backoff_base = float(get("retry_backoff_base"))
+        self.backoff_max = float(get("retry_backoff_max"))
+        self.hedge_after = float(get("hedge_after"))
+        self.targets = [system_data]
+        for fallback in get("fallbacks"):
+            if isinstance(fallback, dict) and fallback.get("model"):
+                self.targets.append(dict(system_data, **fallback))
+
+    def backoff(self, attempt, error=None):
+        """
+        Espera antes da tentativa attempt (0 = primeira repetição):
+        "full jitter" sobre base*2^attempt, respeitando o Retry-After do servidor.
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    """
+    429, 5xx, timeouts e erros de conexão podem passar numa nova tentativa;
+    os demais (chave inválida, modelo inexistente...) não.
+    """
+    import openai
+
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _describe(target):
+    return target.get("model", "?")
+
+
+async def _open(open_stream, target, client, timeout):
+    """
+    Abre o stream e espera o primeiro pedaço. Retorna (stream, pedaço);
+    pedaço é None se a resposta veio vazia.
+    """
+    stream = open_stream(target, client, timeout)
+    try:
+        first = await asyncio.wait_for(stream.__anext__(), timeout)
+    except StopAsyncIteration:
+        return stream, None
+    except BaseException:
+        await stream.aclose()
+        raise
+    return stream, first
+
+
+async def _open_hedged(open_stream, target, client, timeout, hedge_after):
+    """
+    Como _open, mas se o primeiro pedaço não chegar em hedge_after segundos
+    envia uma cópia da requisição e fica com a que responder primeiro.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    tasks = [asyncio.ensure_future(_open(open_stream, target, client, timeout))]
+    winner = None
+    try:
+        if 0 < hedge_after < timeout:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                tasks.append(asyncio.ensure_future(
+                    _open(open_stream, target, client, deadline - loop.time())
+                ))
+
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait( pending,
+                                                timeout=max(0, deadline - loop.time()),
+                                                return_when=asyncio.FIRST_COMPLETED )
+            if not done:
+                raise asyncio.TimeoutError()
+            for task in done:
+                if task.exception() is None:
+                    winner = task
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if task is winner:
+                continue
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            elif not task.cancelled() and task.exception() is None:
+                await task.result()[0].aclose()
+
+
+async def resilient_stream(system_data, open_stream, client=None, on_target=None):
+    """
+    Gerador assíncrono que aplica RetryPolicy(system_data) a open_stream.
+
+    open_stream(target, client, timeout) deve devolver um gerador assíncrono
+    com os pedaços de texto de uma consulta a target (system_data ou um dos
+    fallbacks). client, se dado, só é usado para o próprio system_data.
+    on_target(target) recebe o alvo que respondeu, antes do primeiro pedaço.
+
+    Só se repete antes do primeiro pedaço: depois dele o texto já foi
+    entregue e um erro é repassado a quem chamou.
+    """
+    policy = RetryPolicy(system_data)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + policy.total_timeout
+
+    def remaining():
+        return deadline - loop.time()
+
+    stream = first = None
+    error = None
+    for target in policy.targets:
+        target_client = client if target is system_data else None
+
+        for attempt in range(policy.max_retries + 1):
+            timeout = min(policy.request_timeout, remaining())
+            if timeout <= 0:
+                break
+            try:
+                stream, first = await _open_hedged( open_stream,
+                                                    target,
+                                                    target_client,
+                                                    timeout,
+                                                    policy.hedge_after )
+                break
+            except Exception as e:
+                error = e
+                if not is_retryable(e) or attempt == policy.max_retries:
+                    break
+                delay = policy.backoff(attempt, e)
+                if delay >= remaining():
+                    break
+                print(  f"LLM {_describe(target)}: {type(e).__name__}, "
+                        f"retrying in {delay:.1f}s ({attempt + 1}/{policy.max_retries})",
+                        file=sys.stderr )
+                await asyncio.sleep(delay)
+
+        if stream is not None or remaining() <= 0:
+            break
+        if target is not policy.targets[-1]:
+            print(f"LLM {_describe(target)} failed, trying the next fallback", file=sys.stderr)
+
+    if stream is None:
+        if error is None or remaining() <= 0:
+            raise asyncio.TimeoutError(f"No LLM response within total_timeout ({policy.total_timeout:g}s)")
+        raise error
+
+    if on_target is not None:
+        on_target(target)
+
+    try:
+        if first is None:
+            return
+        yield first
+        while True:
+            try:
+                piece = await asyncio.wait_for(stream.__anext__(), max(0, remaining()))
+            except StopAsyncIteration:
+                return
+            yield piece
+    finally:
+        await stream.aclose()
@@ -0,0 +1,359 @@
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import article_introduction_generator.about as about
+
+# ---------- Path to telemetry log ----------
+TELEMETRY_PATH = os.path.join(  os.path.expanduser("~"),
+                                ".config",
+                                about.__package__,
+                                "telemetry.jsonl" )
+
+KIND_GENERATION = "generation"
+KIND_REQUEST    = "request"
+
+# Métricas (em ms, exceto tokens_per_s) mostradas pelo comando stats
+STATS_METRICS = (   "collect_ms", "prompt_build_ms", "prompt_encode_ms", "connect_ms",
+                    "ttfb_ms", "ttft_ms", "decode_ms", "total_ms", "tokens_per_s" )
+
+_write_lock = threading.Lock()
+
+# Geração em andamento no contexto (task asyncio ou thread) atual
+_current_trace = contextvars.ContextVar("telemetry_trace", default=None)
+
+# Requisição HTTP em andamento, lida pelo hook do httpx (ver llm_client)
+_current_request = contextvars.ContextVar("telemetry_request", default=None)
+
+
+def _now_ms():
+    return time.perf_counter() * 1000.0
+
+
+def append_record(record, path=TELEMETRY_PATH):
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+    with _write_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class Trace:
+    """
+    Tempos (spans, em ms) e atributos de uma geração ou de uma requisição
+    ao LLM. finish() grava o registro como uma linha de TELEMETRY_PATH,
+    a menos que a telemetria esteja desativada em system_data.
+    """
+    def __init__(self, system_data, kind=KIND_GENERATION, parent=None, **attrs):
+        self.enabled = system_data.get("telemetry_enabled", True)
+        self.path = os.path.expanduser(system_data.get("telemetry_path") or TELEMETRY_PATH)
+        self.kind = kind
+        self.parent = parent
+        self.id = uuid.uuid4().hex[:12]
+        self.start = _now_ms()
+        self.spans = {}
+        self.attrs = dict(  model=system_data.get("model"),
+                            host=urlparse(system_data.get("base_url") or "").netloc or None,
+                            **attrs )
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.usage_estimated = False
+        # modelo -> [prompt_tokens, completion_tokens, estimado]
+        self.usage_by_model = {}
+        self.first_token_at = None
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return _now_ms() - self.start
+
+    def add(self, name, ms):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + ms
+
+    def set_once(self, name, ms):
+        with self._lock:
+            self.spans.setdefault(name, ms)
+
+    @contextmanager
+    def span(self, name):
+        start = _now_ms()
+        try:
+            yield self
+        finally:
+            self.add(name, _now_ms() - start)
+
+    def first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = _now_ms()
+            self.set_once("ttft", self.first_token_at - self.start)
+            if self.parent is not None:
+                self.parent.first_token()
+
+    def add_usage(self, prompt_tokens, completion_tokens, estimated=False, model=None):
+        if model is None:
+            model = self.attrs.get("model")
+        with self._lock:
+            self.prompt_tokens = (self.prompt_tokens or 0) + (prompt_tokens or 0)
+            self.completion_tokens = (self.completion_tokens or 0) + (completion_tokens or 0)
+            self.usage_estimated = self.usage_estimated or estimated
+            usage = self.usage_by_model.setdefault(model, [0, 0, False])
+            usage[0] += prompt_tokens or 0
+            usage[1] += completion_tokens or 0
+            usage[2] = usage[2] or estimated
+        if self.parent is not None:
+            self.parent.add_usage(prompt_tokens, completion_tokens, estimated, model)
+
+    def record(self, status):
+        total = self.elapsed()
+        record = { "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "kind": self.kind,
+                   "id": self.id,
+                   "status": status }
+        if self.parent is not None:
+            record["parent"] = self.parent.id
+        record.update({k: v for k, v in self.attrs.items() if v is not None})
+
+        with self._lock:
+            spans = dict(self.spans)
+        for name, ms in spans.items():
+            record[name + "_ms"] = round(ms, 2)
+        record["total_ms"] = round(total, 2)
+
+        if self.first_token_at is not None:
+            decode = _now_ms() - self.first_token_at
+            record["decode_ms"] = round(decode, 2)
+            if self.completion_tokens and decode > 0:
+                record["tokens_per_s"] = round(self.completion_tokens / (decode / 1000.0), 2)
+
+        if self.prompt_tokens is not None:
+            record["prompt_tokens"] = self.prompt_tokens
+            record["completion_tokens"] = self.completion_tokens
+            if self.usage_estimated:
+                record["usage_estimated"] = True
+        return record
+
+    def finish(self, status="ok"):
+        if self.finished:
+            return
+        self.finished = True
+        if not self.enabled:
+            return
+        try:
+            append_record(self.record(status), self.path)
+        except OSError as e:
+            print(f"Telemetry: {e}", file=sys.stderr)
+
+
+def activate(trace):
+    """
+    Torna trace a geração corrente do contexto atual (task asyncio ou thread).
+    Retorna o token a passar para deactivate() ao fim da geração.
+    """
+    return _current_trace.set(trace)
+
+
+def deactivate(token):
+    """
+    Restaura a geração corrente de antes do activate() que deu o token.
+    """
+    try:
+        _current_trace.reset(token)
+    except ValueError:
+        # Gerador assíncrono fechado em outro contexto: lá não há o que restaurar
+        pass
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name):
+    """
+    Mede um trecho como span da geração corrente; sem geração, não faz nada.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name):
+        yield trace
+
+
+def set_attr(name, value):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attrs[name] = value
+
+
+def status_of(error):
+    if error is None:
+        return "ok"
+    if isinstance(error, (GeneratorExit, KeyboardInterrupt, asyncio.CancelledError)):
+        return "cancelled"
+    return "error"
+
+
+@contextmanager
+def request_trace(system_data):
+    """
+    Trace de uma requisição ao LLM, filha da geração corrente.
+    É gravado ao sair do bloco, com o status correspondente.
+    """
+    trace = Trace(system_data, KIND_REQUEST, parent=_current_trace.get())
+    try:
+        yield trace
+    except BaseException as e:
+        trace.finish(status_of(e))
+        raise
+    trace.finish("ok")
+
+
+@contextmanager
+def http_tracing(trace):
+    """
+    Durante o bloco, as requisições httpx do contexto atual reportam
+    conexão e TTFB a trace (ver httpx_request_hook).
+    """
+    token = _current_request.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_request.reset(token)
+
+
+class _HttpTrace:
+    """
+    Recebe os eventos da extensão "trace" do httpcore: tempo de conexão
+    (TCP + TLS, zero quando uma conexão do pool é reaproveitada) e
+    tempo até os cabeçalhos da resposta (TTFB).
+    """
+    def __init__(self, trace):
+        self.trace = trace
+        self.started = {}
+
+    def event(self, name, info):
+        now = _now_ms()
+        step, _, phase = name.rpartition(".")
+        if phase == "started":
+            self.started[step] = now
+        elif phase == "complete":
+            begin = self.started.pop(step, None)
+            if begin is None:
+                return
+            if step in ("connection.connect_tcp", "connection.start_tls", "connection.connect_unix_socket"):
+                for trace in self._traces():
+                    trace.add("connect", now - begin)
+            elif step.endswith(".receive_response_headers"):
+                for trace in self._traces():
+                    trace.set_once("ttfb", now - trace.start)
+
+    def _traces(self):
+        # A requisição e a geração a que ela pertence
+        yield self.trace
+        if self.trace.parent is not None:
+            yield self.trace.parent
+
+    async def async_event(self, name, info):
+        self.event(name, info)
+
+
+def httpx_request_hook(request):
+    trace = _current_request.get()
+    if trace is not None:
+        request.extensions["trace"] = _HttpTrace(trace).event
+
+
+async def httpx_async_request_hook(request):
+    trace = _current_request.get()
+    if trace is not None:
+        request.extensions["trace"] = _HttpTrace(trace).async_event
+
+
+# ---------- stats ----------
+
+def percentile(values, q):
+    """
+    Percentil q (0-100) por interpolação linear entre os valores ordenados.
+    """
+    values = sorted(values)
+    if not values:
+        return None
+    pos = (len(values) - 1) * q / 100.0
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def read_records(path=TELEMETRY_PATH):
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def format_stats(records, kind=None):
+    """
+    Tabela com p50/p95/p99 de cada métrica, por tipo de registro e modelo.
+    Só entram registros com status "ok".
+    """
+    groups = {}
+    for record in records:
+        if record.get("status") != "ok" or (kind and record.get("kind") != kind):
+            continue
+        groups.setdefault((record.get("kind"), record.get("model") or "?"), []).append(record)
+
+    lines = []
+    for (record_kind, model), items in sorted(groups.items()):
+        lines.append(f"{record_kind} · {model} · {len(items)} records")
+        lines.append(f"  {'metric':<16} {'p50':>10} {'p95':>10} {'p99':>10} {'n':>6}")
+        for metric in STATS_METRICS:
+            values = [r[metric] for r in items if isinstance(r.get(metric), (int, float))]
+            if not values:
+                continue
+            p50, p95, p99 = (percentile(values, q) for q in (50, 95, 99))
+            lines.append(f"  {metric:<16} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f} {len(values):>6}")
+        lines.append("")
+    return "\n".join(lines).rstrip()
+
+
+def stats_main(argv):
+    """
+    Ponto de entrada de: article-introduction-generator stats
+    """
+    parser = argparse.ArgumentParser(
+        prog="article-introduction-generator stats",
+        description="Print p50/p95/p99 of the recorded generation timings per model."
+    )
+    parser.add_argument("--kind", choices=(KIND_GENERATION, KIND_REQUEST),
+                        help="Only generations or only individual LLM requests.")
+    parser.add_argument("--last", type=int, default=0,
+                        help="Only the last N records (default: all).")
+    parser.add_argument("--path", default=TELEMETRY_PATH, help="Telemetry log (JSONL).")
+    args = parser.parse_args(argv)
+
+    records = read_records(args.path)
+    if args.last > 0:
+        records = records[-args.last:]
+    if not records:
+        print(f"No telemetry records in {args.path}")
+        return 0
+
+    print(format_stats(records, kind=args.kind))
+    return 0
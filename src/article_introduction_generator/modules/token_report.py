@@ -0,0 +1,48 @@
+import sys
+import json
+import argparse
+
+from article_introduction_generator.modules.consult import encoding_token_report
+from article_introduction_generator.modules.prompt_encoding import ENCODING_PRETTY
+
+
+def format_token_report(rows):
+    """
+    Tabela de texto com os tokens de cada codificação e a economia
+    em relação à codificação pretty (JSON com indent=2).
+    """
+    baseline = next(total for encoding, _, _, total in rows if encoding == ENCODING_PRETTY)
+
+    lines = [f"{'encoding':<12} {'system':>8} {'user':>8} {'total':>8} {'saving':>8}"]
+    for encoding, system_tokens, user_tokens, total in rows:
+        saving = 100.0 * (baseline - total) / baseline if baseline else 0.0
+        lines.append(f"{encoding:<12} {system_tokens:>8} {user_tokens:>8} {total:>8} {saving:>7.1f}%")
+    return "\n".join(lines)
+
+
+def tokens_main(argv):
+    """
+    Ponto de entrada de: article-introduction-generator tokens <file.intro.json>
+    """
+    parser = argparse.ArgumentParser(
+        prog="article-introduction-generator tokens",
+        description="Report the estimated prompt tokens of a *.intro.json file for each prompt encoding."
+    )
+    parser.add_argument("paths", nargs="+", help="*.intro.json files.")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                json_data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            status = 1
+            continue
+
+        print(path)
+        print(format_token_report(encoding_token_report(json_data)))
+        print()
+
+    return status
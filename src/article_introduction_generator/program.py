@@ -1,28 +1,48 @@
-import json
 import sys
 import os
 import subprocess
 import signal
+import asyncio
 import traceback
+import functools
+import contextlib
+import concurrent.futures
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QTextEdit, QLineEdit, QPushButton, QFileDialog, QFrame, 
     QTabWidget, QListWidget, QMessageBox, QStatusBar, QToolBar,
-    QComboBox, QScrollArea, QListWidgetItem, QSizePolicy, QAction, QDialog
+    QComboBox, QScrollArea, QListWidgetItem, QSizePolicy, QAction, QDialog,
+    QDockWidget, QListView, QProgressBar
 )
 
-from PyQt5.QtGui  import QIcon, QDesktopServices
-from PyQt5.QtCore import Qt, QUrl, QSize
-from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from PyQt5.QtGui  import QIcon, QDesktopServices, QTextCursor, QKeySequence
+from PyQt5.QtCore import Qt, QUrl, QSize, QFileSystemWatcher, QTimer
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QSortFilterProxyModel
 
 import article_introduction_generator.about as about
 import article_introduction_generator.modules.configure as configure 
 from   article_introduction_generator.modules.resources import resource_path
 from   article_introduction_generator.modules.wabout    import show_about_window
-from   article_introduction_generator.desktop import create_desktop_file, create_desktop_directory, create_desktop_menu
+from   article_introduction_generator.desktop import install_desktop_integration, ensure_desktop_integration
+from   article_introduction_generator.cli import run_command
+from   article_introduction_generator.desktop import APPLICATIONS_PATH, AUTOSTART_PATH
 
-from article_introduction_generator.modules.consult import consultation_in_depth, consultation_in_text
+from article_introduction_generator.modules.consult import (
+    consultation_in_depth_stream, consultation_in_text, fit_prompt, get_prompt_encoding, get_prompt_token_budget
+)
+from article_introduction_generator.modules.paragraphs import regenerate_by_paragraphs, MODE_PARAGRAPHS
+from article_introduction_generator.modules.candidates import candidate_configs, generate_candidates
+from article_introduction_generator.modules.generation_state import load_state, save_state
+from article_introduction_generator.modules.event_loop import get_background_loop, shutdown_background_loop
+from article_introduction_generator.modules.llm_client import prewarm_async, close_async_clients
+from article_introduction_generator.modules import telemetry
+from article_introduction_generator.modules.ledger import Ledger, usage_entries, format_cost
+from article_introduction_generator.modules.journal import Journal, pending_journals
+from article_introduction_generator.core import CONFIG_LLM_PATH, DEFAULT_LLM_CONTENT, load_llm_config
+from article_introduction_generator.core import EMPTY_SECTIONS, fill_section, has_content, read_paper
+from article_introduction_generator.core import PaperDocument, write_paper_content
 
 # ---------- Path to config file ----------
 CONFIG_PATH = os.path.join( os.path.expanduser("~"),
@@ -33,10 +53,16 @@ CONFIG_PATH = os.path.join( os.path.expanduser("~"),
 DEFAULT_CONTENT={   
     "toolbar_load_json": "Load JSON",
     "toolbar_load_json_tooltip": "Load data from a JSON file with the *.intro.json extension.",
+    "toolbar_save": "Save",
+    "toolbar_save_tooltip": "Save all data in the current *.intro.json file (asks for a file if there is none yet).",
     "toolbar_save_as": "Save as JSON",
     "toolbar_save_as_tooltip": "Save all data as a JSON file with the extension *.intro.json.",
     "toolbar_gen_intro": "Generate intro.",
     "toolbar_gen_intro_tooltip": "Generate an introduction using an LLM API key. Before using this button, you need to configure your LLM API key.",
+    "toolbar_gen_candidates": "Candidates",
+    "toolbar_gen_candidates_tooltip": "Generate several introductions at once, one for each candidate (model or temperature) listed in the LLM configuration, and compare them side by side.",
+    "toolbar_cancel": "Cancel",
+    "toolbar_cancel_tooltip": "Stop the introduction being generated. The request to the LLM is aborted.",
     "toolbar_gen_prompt": "Generate prompt",
     "toolbar_gen_prompt_tooltip": "Generate only the query message (prompt). You don’t need to provide an API key or configure the LLM. This prompt can be pasted into any preferred LLM chat interface.",
     "toolbar_llm_conf": "LLM Conf.",
@@ -103,6 +129,7 @@ DEFAULT_CONTENT={
     "related_references_invalid_key_tip": "Reference key cannot be empty.",
     "related_references_duplicate_key": "Duplicate key",
     "related_references_duplicate_key_tip": "This reference key already exists.",
+    "related_references_filter": "Filter references (key or BibTeX)",
     "related_synthesis": "Human Curated Synthesis",
     "related_synthesis_tooltip": "Synthesis of your trends and observations from the references",
     "related_synthesis_trends": "Common Trends",
@@ -115,66 +142,223 @@ DEFAULT_CONTENT={
     "guidelines_entry_tooltip": "Explicit instructions to be followed by the LLM when generating text.",
     "error_missing_data": "Missing data",
     "error_missing_data_msg": "Please fill at least one relevant field before generating the introduction.",
+    "error_load_json": "Could not load the file",
+    "error_save_json": "Could not save the file",
+    "status_loading_tooltip": "References still being added to the list. The loaded fields can already be edited.",
     "message_error": "Error",
     "message_information": "Information",
     "message_done": "Done",
     "message_open": "Open",
     "message_prompt": "Prompt",
     "message_saved_to": "Saved to",
+    "message_saving": "Saving",
+    "message_save_unchanged": "No changes since the last save",
     "message_loaded_from": "Loaded from",
+    "message_loading": "Loading",
+    "message_journal_replayed": "Unsaved edits recovered",
+    "message_recover_title": "Recover unsaved edits",
+    "message_recover_msg": "The program was closed before the last edits of this paper were saved. Open it with those edits?",
+    "message_autosave_error": "Autosave failed",
     "message_llm_response": "LLM response",
     "message_llm_consulting": "Consulting LLM… please wait",
+    "message_llm_receiving": "Receiving LLM response…",
+    "message_llm_cancelled": "Generation cancelled",
+    "status_cost": "Cost",
+    "status_cost_tooltip": "Tokens used and cost of all the generations of this paper, priced with prices_per_mtoken of the LLM configuration.",
+    "message_prompt_trimmed": "Prompt trimmed to fit the model budget",
+    "message_paragraphs_ready": "Paragraphs ready",
+    "message_paragraphs_regenerated": "Regenerated paragraphs",
+    "message_paragraphs_none": "none",
     "message_dialog_error": "An error occurred",
     "message_dialog_information": "Information message",
     "message_dialog_ok": "OK",
     "message_dialog_copy_clipboard": "Copy to clipboard",
+    "dock_llm_output": "LLM output",
+    "dock_llm_output_tooltip": "Introduction generated by the LLM, shown as it arrives.",
+    "dock_candidates": "Candidates",
+    "dock_candidates_tooltip": "One introduction per candidate, shown as it arrives.",
+    "message_candidates_ready": "Candidates ready",
     "list_editor_placeholder": "Click 'Add' to insert a new entry",
     "list_editor_add": "Add",
     "list_editor_add_tooltip": "Add an element to the list",
     "list_editor_remove": "Remove",
     "list_editor_remove_tooltip": "Remove an element to the list",
+    "autosave_delay_ms": 1500,
+    "autosave_compact_every": 200,
+    "autosave_compact_interval_s": 300,
     "window_width": 1024,
     "window_height": 800
 }
 
-configure.verify_default_config(CONFIG_PATH,default_content=DEFAULT_CONTENT)
+CONFIG = dict(DEFAULT_CONTENT)
 
-CONFIG=configure.load_config(CONFIG_PATH)
+# Valores padrão até load_configs(), chamada em main(): importar este módulo não grava nada
+CONFIG_LLM = dict(DEFAULT_LLM_CONTENT)
 
-# ---------- Path to config LLM file ----------
-CONFIG_LLM_PATH = os.path.join( os.path.expanduser("~"),
-                                ".config", 
-                                about.__package__, 
-                                "config.llm.json" )
 
-DEFAULT_LLM_CONTENT={
-    "api_key": "",
-    "usage": "https://deepinfra.com/dash/usage",
-    "base_url": "https://api.deepinfra.com/v1/openai",
-    "model": "meta-llama/Meta-Llama-3.1-70B-Instruct"
-}
+def load_configs():
+    """
+    Cria (se preciso) e lê config.json e config.llm.json.
+    """
+    global CONFIG, CONFIG_LLM
 
-configure.verify_default_config(CONFIG_LLM_PATH,default_content=DEFAULT_LLM_CONTENT)
+    configure.verify_default_config(CONFIG_PATH,default_content=DEFAULT_CONTENT)
+    CONFIG = configure.load_config(CONFIG_PATH, default_content=DEFAULT_CONTENT)
 
-CONFIG_LLM = configure.load_config(CONFIG_LLM_PATH)
+    CONFIG_LLM = load_llm_config(create=True)
 
 
 # -------- Worker --------
+@functools.lru_cache(maxsize=None)
+def get_icon(name):
+    """
+    QIcon de icons/name, lido do disco uma única vez.
+    """
+    return QIcon(resource_path('icons', name))
+
+
 class ConsultationWorker(QObject):
+    """
+    Executa a consulta no event loop compartilhado (modules.event_loop),
+    assim vários workers podem estar ativos sem uma QThread para cada um.
+    Os sinais são emitidos a partir da thread do loop e entregues na GUI
+    por conexão enfileirada. Cada pedaço de texto recebido é emitido em chunk;
+    finished recebe o texto completo. No modo "paragraphs", generation_state
+    recebe o novo estado (ver modules.paragraphs) e os ids regenerados.
+    Os tempos de cada etapa vão para trace (ver modules.telemetry).
+    cancel() aborta a consulta em andamento; cancelled é emitido no lugar de finished.
+    usage recebe as entradas do ledger (modules.ledger) com os tokens consumidos.
+    """
+    chunk = pyqtSignal(str)
+    progress = pyqtSignal(str)
+    generation_state = pyqtSignal(object, list)
+    prompt_report = pyqtSignal(str)
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    usage = pyqtSignal(object)
 
-    def __init__(self, config, data):
+    def __init__(self, config, data, state=None, trace=None):
         super().__init__()
         self.config = config
         self.data = data
+        self.state = state
+        self.trace = trace if trace is not None else telemetry.Trace(config, source="gui")
+        self.future = None
 
     def run(self):
+        self.future = get_background_loop().submit(self._consume())
+        self.future.add_done_callback(self._on_done)
+
+    def cancel(self):
+        """
+        Cancela a task no event loop: a requisição HTTP é interrompida e
+        a resposta fechada, liberando a vaga no pool de conexões.
+        """
+        if self.future is not None:
+            self.future.cancel()
+
+    async def _consume(self):
+        telemetry.activate(self.trace)
         try:
-            result = consultation_in_depth(self.config, self.data)
-            self.finished.emit(result)
-        except Exception as e:
+            return await self._generate()
+        except asyncio.CancelledError:
+            # Aqui a requisição já foi fechada e os tokens gastos, contados
+            self.trace.finish("cancelled")
+            self._emit_usage()
+            raise
+
+    async def _generate(self):
+        if self.config.get("generation_mode") == MODE_PARAGRAPHS:
+            state = self.state if self.config.get("incremental_regeneration", True) else None
+            OUT, state, regenerated = await regenerate_by_paragraphs(   self.config,
+                                                                        self.data,
+                                                                        state=state,
+                                                                        on_prompt_report=self._on_prompt_report,
+                                                                        on_paragraph=self._on_paragraph )
+            self.generation_state.emit(state, regenerated)
+            self.chunk.emit(OUT)
+            return OUT
+
+        OUT = ""
+        async for piece in consultation_in_depth_stream(self.config,
+                                                        self.data,
+                                                        on_prompt_report=self._on_prompt_report):
+            OUT += piece
+            self.chunk.emit(piece)
+        return OUT
+
+    def _on_paragraph(self, done, total, paragraph_id):
+        self.progress.emit(f"{done}/{total}")
+
+    def _on_prompt_report(self, report):
+        if report.cuts or not report.fits:
+            self.prompt_report.emit(report.summary())
+
+    def _on_done(self, future):
+        try:
+            result = future.result()
+        except concurrent.futures.CancelledError:
+            self.cancelled.emit()
+            return
+        except BaseException as e:
+            self.trace.finish(telemetry.status_of(e))
+            self._emit_usage()
             self.error.emit(str(e))
+            return
+        self.trace.finish()
+        self._emit_usage()
+        self.finished.emit(result)
+
+    def _emit_usage(self):
+        kind = self.config.get("generation_mode") or "single"
+        self.usage.emit(usage_entries(self.config, self.trace, kind=kind))
+
+class CandidatesWorker(QObject):
+    """
+    Gera um candidato por config ao mesmo tempo no event loop compartilhado
+    (ver modules.candidates). chunk e candidate_done trazem o índice do
+    candidato; finished é emitido quando todos terminam.
+    """
+    chunk = pyqtSignal(int, str)
+    candidate_done = pyqtSignal(int, str, str)
+    finished = pyqtSignal()
+    cancelled = pyqtSignal()
+    usage = pyqtSignal(object)
+
+    def __init__(self, configs, data, max_concurrency=0):
+        super().__init__()
+        self.configs = configs
+        self.data = data
+        self.max_concurrency = max_concurrency
+        self.future = None
+
+    def run(self):
+        self.future = get_background_loop().submit(generate_candidates(
+            self.configs,
+            self.data,
+            max_concurrency=self.max_concurrency,
+            on_chunk=self.chunk.emit,
+            on_done=self._on_candidate_done,
+            on_usage=self._on_usage
+        ))
+        self.future.add_done_callback(self._on_done)
+
+    def cancel(self):
+        if self.future is not None:
+            self.future.cancel()
+
+    def _on_usage(self, index, trace):
+        self.usage.emit(usage_entries(self.configs[index], trace, kind="candidate"))
+
+    def _on_candidate_done(self, index, text, error):
+        self.candidate_done.emit(index, text, "" if error is None else str(error))
+
+    def _on_done(self, future):
+        if future.cancelled():
+            self.cancelled.emit()
+        else:
+            self.finished.emit()
 
 # -------- Error dialog --------
 class MessageDialog(QDialog):
@@ -229,9 +413,12 @@ class MessageDialog(QDialog):
         clipboard.setText(self.text_edit.toPlainText())
 
 def show_error_dialog(  message, 
-                        title_message = CONFIG["message_dialog_error"], 
+                        title_message = None, 
                         width = 800,
                         height = 600 ):
+    # CONFIG só é lido de config.json em load_configs(), depois da importação
+    if title_message is None:
+        title_message = CONFIG["message_dialog_error"]
     dialog = MessageDialog( message, 
                             window_title = CONFIG["message_error"], 
                             title_message = title_message,
@@ -244,9 +431,12 @@ def show_error_dialog(  message,
     dialog.exec_()
     
 def show_info_dialog(   message, 
-                        title_message = CONFIG["message_dialog_information"], 
+                        title_message = None, 
                         width = 800,
                         height = 600 ):
+    # CONFIG só é lido de config.json em load_configs(), depois da importação
+    if title_message is None:
+        title_message = CONFIG["message_dialog_information"]
     dialog = MessageDialog( message, 
                             window_title = CONFIG["message_information"], 
                             title_message = title_message,
@@ -258,15 +448,99 @@ def show_info_dialog(   message,
     
     dialog.exec_()
 
+# -------- LLM output pane --------
+class OutputDock(QDockWidget):
+    """Dockable pane where the LLM response is written as it arrives"""
+    def __init__(self, title, tooltip="", button_copy_text="Copy to clipboard", parent=None):
+        super().__init__(title, parent)
+        self.setObjectName("llm_output_dock")
+
+        w = QWidget()
+        layout = QVBoxLayout(w)
+
+        self.text_edit = QTextEdit()
+        self.text_edit.setToolTip(tooltip)
+        self.text_edit.setLineWrapMode(QTextEdit.WidgetWidth)
+        layout.addWidget(self.text_edit)
+
+        copy_button = QPushButton(button_copy_text)
+        copy_button.clicked.connect(self.copy_to_clipboard)
+        layout.addWidget(copy_button)
+
+        self.setWidget(w)
+
+    def clear(self):
+        self.text_edit.clear()
+
+    def append_text(self, text):
+        self.text_edit.moveCursor(QTextCursor.End)
+        self.text_edit.insertPlainText(text)
+        self.text_edit.ensureCursorVisible()
+
+    def copy_to_clipboard(self):
+        clipboard = QApplication.clipboard()
+        clipboard.setText(self.text_edit.toPlainText())
+
+class CandidatesDock(QDockWidget):
+    """Dockable pane with one tab per candidate introduction"""
+    RUNNING = " …"
+    FAILED  = " ✗"
+
+    def __init__(self, title, tooltip="", button_copy_text="Copy to clipboard", parent=None):
+        super().__init__(title, parent)
+        self.setObjectName("llm_candidates_dock")
+
+        w = QWidget()
+        layout = QVBoxLayout(w)
+
+        self.tabs = QTabWidget()
+        self.tabs.setToolTip(tooltip)
+        layout.addWidget(self.tabs)
+
+        copy_button = QPushButton(button_copy_text)
+        copy_button.clicked.connect(self.copy_to_clipboard)
+        layout.addWidget(copy_button)
+
+        self.setWidget(w)
+        self.labels = []
+
+    def set_candidates(self, labels):
+        self.tabs.clear()
+        self.labels = list(labels)
+        for label in self.labels:
+            text_edit = QTextEdit()
+            text_edit.setLineWrapMode(QTextEdit.WidgetWidth)
+            self.tabs.addTab(text_edit, label + self.RUNNING)
+
+    def append_text(self, index, text):
+        text_edit = self.tabs.widget(index)
+        text_edit.moveCursor(QTextCursor.End)
+        text_edit.insertPlainText(text)
+
+    def set_done(self, index, error=""):
+        if error:
+            self.append_text(index, ("\n\n" if not self.tabs.widget(index).document().isEmpty() else "") + error)
+            self.tabs.setTabText(index, self.labels[index] + self.FAILED)
+        else:
+            self.tabs.setTabText(index, self.labels[index])
+
+    def copy_to_clipboard(self):
+        text_edit = self.tabs.currentWidget()
+        if text_edit is not None:
+            QApplication.clipboard().setText(text_edit.toPlainText())
+
 # ---------- Reusable Widgets ----------
 
 class LabeledTextEdit(QWidget):
+    changed = pyqtSignal()
+
     def __init__(self, label, tooltip=""):
         super().__init__()
         layout = QHBoxLayout()
         self.label = QLabel(label)
         self.text = QTextEdit()
         self.text.setToolTip(tooltip)
+        self.text.textChanged.connect(self.changed)
         self.text.setMinimumHeight(80)
         layout.addWidget(self.label, 1)
         layout.addWidget(self.text, 4)
@@ -280,12 +554,15 @@ class LabeledTextEdit(QWidget):
 
 
 class LabeledLineEdit(QWidget):
+    changed = pyqtSignal()
+
     def __init__(self, label, tooltip=""):
         super().__init__()
         layout = QHBoxLayout()
         self.label = QLabel(label)
         self.line = QLineEdit()
         self.line.setToolTip(tooltip)
+        self.line.textChanged.connect(self.changed)
         layout.addWidget(self.label, 1)
         layout.addWidget(self.line, 4)
         self.setLayout(layout)
@@ -298,6 +575,8 @@ class LabeledLineEdit(QWidget):
 
 
 class StringListEditor(QWidget):
+    changed = pyqtSignal()
+
     def __init__(self, label, tooltip=""):
         super().__init__()
         layout = QVBoxLayout()
@@ -314,10 +593,10 @@ class StringListEditor(QWidget):
 
         btn_layout = QHBoxLayout()
         add_btn = QPushButton(CONFIG["list_editor_add"])
-        add_btn.setIcon(QIcon(resource_path('icons', 'button_add_green.png')))
+        add_btn.setIcon(get_icon('button_add_green.png'))
         add_btn.setToolTip(CONFIG["list_editor_add_tooltip"])
         remove_btn = QPushButton(CONFIG["list_editor_remove"])
-        remove_btn.setIcon(QIcon(resource_path('icons', 'button_remove_red.png')))
+        remove_btn.setIcon(get_icon('button_remove_red.png'))
         remove_btn.setToolTip(CONFIG["list_editor_remove_tooltip"])
         btn_layout.addWidget(add_btn)
         btn_layout.addWidget(remove_btn)
@@ -333,6 +612,7 @@ class StringListEditor(QWidget):
         self.list.setEditTriggers(
             self.list.DoubleClicked | self.list.SelectedClicked
         )
+        self.list.itemChanged.connect(self.changed)
 
     def add_item(self, text=None):
         from PyQt5.QtWidgets import QListWidgetItem
@@ -351,6 +631,7 @@ class StringListEditor(QWidget):
         item.setFlags(item.flags() | Qt.ItemIsEditable)
         self.list.addItem(item)
         self.list.editItem(item)
+        self.changed.emit()
 
 
     def remove_item(self):
@@ -359,6 +640,7 @@ class StringListEditor(QWidget):
 
         if self.list.count() == 0:
             self._add_placeholder()
+        self.changed.emit()
 
 
     def get(self):
@@ -393,6 +675,215 @@ class StringListEditor(QWidget):
         self.list.addItem(placeholder)
 
 
+# Referências acrescentadas à lista por vez ao carregar um arquivo
+REFERENCES_BATCH = 500
+
+
+def read_paper_files(path):
+    """
+    Artigo (com as edições do journal ainda não gravadas nele), estado da
+    geração por parágrafos, ledger e journal de path.
+    """
+    data = read_paper(path)
+    journal = Journal(path)
+    journal.replay(data)
+    return data, load_state(path), Ledger(path), journal
+
+
+class PaperLoader(QObject):
+    """
+    Lê os arquivos de um artigo (read_paper_files) numa thread do executor
+    do event loop compartilhado, sem travar a GUI. loaded recebe o caminho e
+    a tupla lida; failed, o caminho e a mensagem de erro.
+    """
+    loaded = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+    def load(self, path):
+        future = get_background_loop().submit(asyncio.to_thread(read_paper_files, path))
+        future.add_done_callback(lambda future: self._on_done(path, future))
+
+    def _on_done(self, path, future):
+        try:
+            self.loaded.emit(path, future.result())
+        except Exception as e:
+            self.failed.emit(path, str(e))
+
+
+class PaperSaver(QObject):
+    """
+    Grava um artigo já serializado (core.write_paper_content) numa thread
+    do executor do event loop compartilhado. saved recebe o caminho, a
+    gravação e se o arquivo foi de fato escrito (False: conteúdo igual ao
+    da gravação anterior); failed, o caminho e a mensagem de erro. Os dois
+    são emitidos na thread da GUI, uma única vez por gravação.
+    """
+    saved = pyqtSignal(str, object, bool)
+    failed = pyqtSignal(str, str)
+
+    # Emitido na thread do event loop; conectado a finish (fila da GUI)
+    _done = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = None
+        self._done.connect(self.finish)
+
+    def save(self, path, content, previous=None):
+        future = get_background_loop().submit(asyncio.to_thread(write_paper_content, path, content, previous))
+        self.pending = (path, future)
+        future.add_done_callback(self._done.emit)
+
+    def finish(self, future=None):
+        """
+        Conclui a gravação pendente, esperando-a se ainda não terminou.
+        Com future, só se ela for a pendente (o aviso de uma gravação já
+        concluída antes é ignorado).
+        """
+        if self.pending is None or (future is not None and future is not self.pending[1]):
+            return
+        path, future = self.pending
+        self.pending = None
+        try:
+            record, written = future.result()
+        except Exception as e:
+            self.failed.emit(path, str(e))
+            return
+        self.saved.emit(path, record, written)
+
+
+class ReferenceListModel(QAbstractListModel):
+    """
+    Chaves de um dicionário de referências (o mesmo objeto salvo no JSON),
+    na ordem do dicionário. Renomear uma chave pela view renomeia no dicionário.
+    """
+    # Texto usado pelo filtro: chave + BibTeX
+    SearchRole = Qt.UserRole + 1
+
+    key_renamed   = pyqtSignal(str, str)
+    rename_rejected = pyqtSignal(str)   # "invalid" ou "duplicate"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.references = {}
+        self.keys = []
+        self.visible = 0
+        self.next_index = 1
+
+    @staticmethod
+    def _index_of(key):
+        prefix, _, number = key.partition("_")
+        if prefix == "ref" and number.isdigit():
+            return int(number)
+        return 0
+
+    def set_references(self, references, visible=None):
+        """
+        visible: quantas linhas exibir já (None = todas); as demais entram
+        com reveal() ou quando a view rola até o fim (fetchMore).
+        """
+        self.beginResetModel()
+        self.references = references
+        self.keys = list(references.keys())
+        self.visible = len(self.keys) if visible is None else min(visible, len(self.keys))
+        self.next_index = max(map(self._index_of, self.keys), default=0) + 1
+        self.endResetModel()
+
+    def pending(self):
+        return len(self.keys) - self.visible
+
+    def reveal(self, count=None):
+        """
+        Exibe mais count linhas (None = todas); retorna quantas ainda faltam.
+        """
+        if self.pending() > 0:
+            last = len(self.keys) if count is None else min(len(self.keys), self.visible + count)
+            self.beginInsertRows(QModelIndex(), self.visible, last - 1)
+            self.visible = last
+            self.endInsertRows()
+        return self.pending()
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.pending() > 0
+
+    def fetchMore(self, parent):
+        self.reveal(REFERENCES_BATCH)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.visible
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self.keys[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return key
+        if role == self.SearchRole:
+            ref = self.references.get(key) or {}
+            return key + "\n" + (ref.get("bibtex") or "")
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+
+        old_key = self.keys[index.row()]
+        new_key = str(value).strip()
+        if new_key == old_key:
+            return False
+        if not new_key:
+            self.rename_rejected.emit("invalid")
+            return False
+        if new_key in self.references:
+            self.rename_rejected.emit("duplicate")
+            return False
+
+        # Renomeia mantendo a ordem das referências
+        items = [((new_key if k == old_key else k), v) for k, v in self.references.items()]
+        self.references.clear()
+        self.references.update(items)
+
+        self.keys[index.row()] = new_key
+        self.next_index = max(self.next_index, self._index_of(new_key) + 1)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.key_renamed.emit(old_key, new_key)
+        return True
+
+    def key_at(self, row):
+        return self.keys[row]
+
+    def add_reference(self):
+        """
+        Acrescenta uma referência vazia "ref_N" e retorna sua linha.
+        """
+        self.reveal()
+
+        key = f"ref_{self.next_index}"
+        while key in self.references:
+            self.next_index += 1
+            key = f"ref_{self.next_index}"
+        self.next_index += 1
+
+        row = len(self.keys)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.references[key] = {}
+        self.keys.append(key)
+        self.visible += 1
+        self.endInsertRows()
+        return row
+
+    def remove_rows(self, rows):
+        for row in sorted(set(rows), reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.references.pop(self.keys.pop(row), None)
+            self.visible -= 1
+            self.endRemoveRows()
+
 
 # ---------- Main Window ----------
 
@@ -411,34 +902,113 @@ class JsonIntroductionEditor(QMainWindow):
 
         self.current_path = None
 
+        # ConsultationWorker ou CandidatesWorker da geração em andamento
+        self.worker = None
+        self.candidates_pending = 0
+
+        # Tokens e custo das gerações do artigo atual
+        self.ledger = Ledger()
+
+        # Artigo em memória: os widgets de cada aba são o provedor da seção
+        # e avisam o documento a cada edição (ver _mark_dirty)
+        self.document = PaperDocument()
+        self.document.observers.append(self._on_document_changed)
+
         self.references_data = {}
         
         self.current_reference_key = None
 
+        # Arquivo sendo lido em segundo plano (ver PaperLoader)
+        self.loading_path = None
+        self.paper_loader = PaperLoader(self)
+        self.paper_loader.loaded.connect(self._on_paper_loaded)
+        self.paper_loader.failed.connect(self._on_paper_load_failed)
+
+        # Gravação em segundo plano (ver PaperSaver): o arquivo, o documento
+        # (caminho e journal) cujo conteúdo foi copiado e a última gravação
+        # de cada arquivo, para não regravar um conteúdo igual
+        self.saving_path = None
+        self.saving_document = None
+        self.saving_quiet = False
+        self.queued_save = None
+        self.saved_records = {}
+        self.paper_saver = PaperSaver(self)
+        self.paper_saver.saved.connect(self._on_paper_saved)
+        self.paper_saver.failed.connect(self._on_paper_save_failed)
+
+        # Autosave: as edições vão para o journal do arquivo atual (modules.journal)
+        # e são compactadas nele de tempos em tempos
+        self.journal = None
+        self.dirty_paths = {}
+        self.journal_ops = []
+        self.tracking_suspended = 0
+
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(int(CONFIG["autosave_delay_ms"]))
+        self.autosave_timer.timeout.connect(self._flush_journal)
+
+        self.compact_timer = QTimer(self)
+        self.compact_timer.setInterval(int(CONFIG["autosave_compact_interval_s"] * 1000))
+        self.compact_timer.timeout.connect(self._compact_journal)
+        self.compact_timer.start()
+
+        # Acrescenta as referências de um arquivo grande em lotes
+        self.references_timer = QTimer(self)
+        self.references_timer.setInterval(0)
+        self.references_timer.timeout.connect(self._reveal_references)
+
+        self.prompt_note = None
+
+        # Estado da última geração por parágrafos (regeneração incremental)
+        self.generation_state = None
+        self.regenerated_note = None
+
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
 
         self._create_toolbar()
         self._create_status_bar()
+        self._create_output_dock()
 
         self._create_tabs()
         self._apply_styles()
 
+        # Conexão com o LLM aberta antes da primeira consulta
+        self._prewarm_llm()
+        self.config_llm_watcher = QFileSystemWatcher([CONFIG_LLM_PATH], self)
+        self.config_llm_watcher.fileChanged.connect(self.on_config_llm_changed)
+
+    def _prewarm_llm(self):
+        if CONFIG_LLM.get("api_key"):
+            get_background_loop().submit(prewarm_async(CONFIG_LLM))
+
+    def on_config_llm_changed(self, path):
+        global CONFIG_LLM
+        
+        CONFIG_LLM = load_llm_config()
+        
+        # Editores costumam substituir o arquivo, o que remove o watch
+        if CONFIG_LLM_PATH not in self.config_llm_watcher.files() and os.path.exists(CONFIG_LLM_PATH):
+            self.config_llm_watcher.addPath(CONFIG_LLM_PATH)
+        
+        self._prewarm_llm()
+
 
     # ---------- UI ----------
     def _apply_styles(self):
         self.setStyleSheet("""
-            QListWidget {
+            QListView {
                 border: 1px solid #999;
                 border-radius: 4px;
                 background-color: #f9f9f9;
             }
 
-            QListWidget::item {
+            QListView::item {
                 padding: 4px;
             }
 
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #cce5ff;
                 color: black;
             }
@@ -455,11 +1025,11 @@ class JsonIntroductionEditor(QMainWindow):
                 background-color: #ffffff;
                 padding: 2px;
             }
-            QListWidget:empty {
+            QListView:empty {
                 background-color: #f9f9f9;
             }
 
-            QListWidget:empty::item {
+            QListView:empty::item {
                 color: #999;
             }
         """)
@@ -469,7 +1039,7 @@ class JsonIntroductionEditor(QMainWindow):
         self.toolbar.setToolButtonStyle(Qt.ToolButtonTextUnderIcon)
 
         #
-        self.load_action = QAction( QIcon(resource_path('icons', 'open_file.png')), 
+        self.load_action = QAction( get_icon('open_file.png'), 
                                     CONFIG["toolbar_load_json"], 
                                     self )
         self.load_action.setToolTip(CONFIG["toolbar_load_json_tooltip"])
@@ -477,15 +1047,25 @@ class JsonIntroductionEditor(QMainWindow):
         self.toolbar.addAction(self.load_action)
         
         #
-        self.save_as_action = QAction(  QIcon(resource_path('icons', 'download.png')), 
+        self.save_action = QAction( get_icon('download.png'), 
+                                    CONFIG["toolbar_save"], 
+                                    self)
+        self.save_action.setToolTip(CONFIG["toolbar_save_tooltip"])
+        self.save_action.setShortcut(QKeySequence.Save)
+        self.save_action.triggered.connect(self.save_json)
+        self.toolbar.addAction(self.save_action)
+        
+        #
+        self.save_as_action = QAction(  get_icon('download.png'), 
                                         CONFIG["toolbar_save_as"], 
                                         self)
         self.save_as_action.setToolTip(CONFIG["toolbar_save_as_tooltip"])
+        self.save_as_action.setShortcut(QKeySequence.SaveAs)
         self.save_as_action.triggered.connect(self.save_as_json)
         self.toolbar.addAction(self.save_as_action)
         
         #
-        self.generate_intro_action = QAction(   QIcon(resource_path('icons', 'accessories-text-editor.png')), 
+        self.generate_intro_action = QAction(   get_icon('accessories-text-editor.png'), 
                                                 CONFIG["toolbar_gen_intro"], 
                                                 self)
         self.generate_intro_action.setToolTip(CONFIG["toolbar_gen_intro_tooltip"])
@@ -493,7 +1073,24 @@ class JsonIntroductionEditor(QMainWindow):
         self.toolbar.addAction(self.generate_intro_action)
         
         #
-        self.generate_cmd_action = QAction( QIcon(resource_path('icons', 'accessories-text-editor.png')), 
+        self.generate_candidates_action = QAction(  get_icon('accessories-text-editor.png'), 
+                                                    CONFIG["toolbar_gen_candidates"], 
+                                                    self)
+        self.generate_candidates_action.setToolTip(CONFIG["toolbar_gen_candidates_tooltip"])
+        self.generate_candidates_action.triggered.connect(self.generate_candidates)
+        self.toolbar.addAction(self.generate_candidates_action)
+        
+        #
+        self.cancel_action = QAction(   get_icon('button_remove_red.png'), 
+                                        CONFIG["toolbar_cancel"], 
+                                        self)
+        self.cancel_action.setToolTip(CONFIG["toolbar_cancel_tooltip"])
+        self.cancel_action.triggered.connect(self.cancel_intro)
+        self.cancel_action.setEnabled(False)
+        self.toolbar.addAction(self.cancel_action)
+        
+        #
+        self.generate_cmd_action = QAction( get_icon('accessories-text-editor.png'), 
                                             CONFIG["toolbar_gen_prompt"], 
                                             self)
         self.generate_cmd_action.setToolTip(CONFIG["toolbar_gen_prompt_tooltip"])
@@ -506,7 +1103,7 @@ class JsonIntroductionEditor(QMainWindow):
         self.toolbar.addWidget(spacer)
         
         #
-        self.llm_conf_action = QAction( QIcon(resource_path('icons', 'edit_file.png')), 
+        self.llm_conf_action = QAction( get_icon('edit_file.png'), 
                                         CONFIG["toolbar_llm_conf"], 
                                         self)
         self.llm_conf_action.setToolTip(CONFIG["toolbar_llm_conf_tooltip"])
@@ -514,7 +1111,7 @@ class JsonIntroductionEditor(QMainWindow):
         self.toolbar.addAction(self.llm_conf_action)
         
         #
-        self.url_usage_action = QAction(QIcon(resource_path('icons', 'web-browser.png')), 
+        self.url_usage_action = QAction(get_icon('web-browser.png'), 
                                         CONFIG["toolbar_url_usage"], 
                                         self)
         self.url_usage_action.setToolTip(CONFIG["toolbar_url_usage_tooltip"])
@@ -528,7 +1125,7 @@ class JsonIntroductionEditor(QMainWindow):
         self.toolbar.addWidget(separator)
         
         #
-        self.configure_action = QAction(QIcon(resource_path('icons', 'edit_file.png')), 
+        self.configure_action = QAction(get_icon('edit_file.png'), 
                                         CONFIG["toolbar_configure"], 
                                         self)
         self.configure_action.setToolTip(CONFIG["toolbar_configure_tooltip"])
@@ -536,7 +1133,7 @@ class JsonIntroductionEditor(QMainWindow):
         self.toolbar.addAction(self.configure_action)
         
         #
-        self.about_action = QAction(QIcon(resource_path('icons', 'status_help.png')), 
+        self.about_action = QAction(get_icon('status_help.png'), 
                                     CONFIG["toolbar_about"], 
                                     self)
         self.about_action.setToolTip(CONFIG["toolbar_about_tooltip"])
@@ -544,7 +1141,7 @@ class JsonIntroductionEditor(QMainWindow):
         self.toolbar.addAction(self.about_action)
         
         # Coffee
-        self.coffee_action = QAction(   QIcon(resource_path('icons', 'emote-love.png')), 
+        self.coffee_action = QAction(   get_icon('emote-love.png'), 
                                         CONFIG["toolbar_coffee"], 
                                         self)
         self.coffee_action.setToolTip(CONFIG["toolbar_coffee_tooltip"])
@@ -589,6 +1186,37 @@ class JsonIntroductionEditor(QMainWindow):
         self.status = QStatusBar()
         self.setStatusBar(self.status)
 
+        self.cost_label = QLabel()
+        self.cost_label.setToolTip(CONFIG["status_cost_tooltip"])
+        self.status.addPermanentWidget(self.cost_label)
+        self._update_cost_label()
+
+        self.load_progress = QProgressBar()
+        self.load_progress.setToolTip(CONFIG["status_loading_tooltip"])
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setFormat("%v/%m")
+        self.load_progress.hide()
+        self.status.addPermanentWidget(self.load_progress)
+
+    def _update_cost_label(self):
+        self.cost_label.setText(CONFIG["status_cost"] + ": " + format_cost(*self.ledger.totals()))
+
+    def _create_output_dock(self):
+        self.output_dock = OutputDock(  CONFIG["dock_llm_output"],
+                                        tooltip = CONFIG["dock_llm_output_tooltip"],
+                                        button_copy_text = CONFIG["message_dialog_copy_clipboard"],
+                                        parent = self )
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.output_dock)
+        self.output_dock.hide()
+
+        self.candidates_dock = CandidatesDock(  CONFIG["dock_candidates"],
+                                                tooltip = CONFIG["dock_candidates_tooltip"],
+                                                button_copy_text = CONFIG["message_dialog_copy_clipboard"],
+                                                parent = self )
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.candidates_dock)
+        self.tabifyDockWidget(self.output_dock, self.candidates_dock)
+        self.candidates_dock.hide()
+
     def _wrap_scroll(self, widget):
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
@@ -596,28 +1224,293 @@ class JsonIntroductionEditor(QMainWindow):
         return scroll
 
     def _create_tabs(self):
-        self.tabs.addTab(   self._wrap_scroll(self._paper_profile_tab()), 
-                            CONFIG["tab_paper_profile"] )
-        self.tabs.addTab(   self._wrap_scroll(self._research_problem_tab()), 
-                            CONFIG["tab_research_problem"] )
-        self.tabs.addTab(   self._wrap_scroll(self._contributions_tab()), 
-                            CONFIG["tab_contributions"] )
-        self.tabs.addTab(   self._related_work_tab(), 
-                            CONFIG["tab_related_work"] )
-        self.tabs.addTab(   self._wrap_scroll(self._writing_guidelines_tab()), 
-                            CONFIG["tab_writing_guidelines"] )
-        
-        self.tabs.setTabToolTip(0, CONFIG["tab_paper_profile_tooltip"])
-        self.tabs.setTabToolTip(1, CONFIG["tab_research_problem_tooltip"])
-        self.tabs.setTabToolTip(2, CONFIG["tab_contributions_tooltip"])
-        self.tabs.setTabToolTip(3, CONFIG["tab_related_work_tooltip"])
-        self.tabs.setTabToolTip(4, CONFIG["tab_writing_guidelines_tooltip"])
-        
+        # Cada aba é construída na primeira vez que é exibida; até lá, a seção
+        # do documento guarda os dados carregados
+        self.tab_specs = [
+            ("paper_profile",      self._paper_profile_tab,      "tab_paper_profile",      True),
+            ("research_problem",   self._research_problem_tab,   "tab_research_problem",   True),
+            ("contributions",      self._contributions_tab,      "tab_contributions",      True),
+            ("related_work",       self._related_work_tab,       "tab_related_work",       False),
+            ("writing_guidelines", self._writing_guidelines_tab, "tab_writing_guidelines", True)
+        ]
+        self.section_tabs = {spec[0]: index for index, spec in enumerate(self.tab_specs)}
+        self.tab_built = [False] * len(self.tab_specs)
+
+        for index, (section, builder, name, scroll) in enumerate(self.tab_specs):
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(page, CONFIG[name])
+            self.tabs.setTabToolTip(index, CONFIG[name + "_tooltip"])
+
+        self._ensure_tab(self.tabs.currentIndex())
         self.tabs.currentChanged.connect(self._on_tab_changed)
 
+    def _ensure_tab(self, index):
+        if index < 0 or self.tab_built[index]:
+            return
+        section, builder, name, scroll = self.tab_specs[index]
+
+        widget = builder()
+        if scroll:
+            widget = self._wrap_scroll(widget)
+        self.tabs.widget(index).layout().addWidget(widget)
+        self.tab_built[index] = True
+
+        with self._untracked():
+            self._fill_section(section, self.document.section(section), progressive=False)
+        self.document.bind(section, lambda: self._read_section(section))
+
+        for tracked, path in self._tracked_widgets(section):
+            tracked.changed.connect(lambda path=path: self._mark_dirty(path))
+
+    def _tracked_widgets(self, section):
+        """
+        (widget, caminho no JSON) dos campos da aba de section; None indica
+        a referência selecionada.
+        """
+        if section == "paper_profile":
+            widgets = [self.pp_title, self.pp_domain, self.pp_journal, self.pp_keywords, self.pp_summary]
+        elif section == "research_problem":
+            widgets = [self.rp_overview, self.rp_specific, self.rp_challenges, self.rp_insufficient]
+        elif section == "contributions":
+            widgets = [self.contributions]
+        elif section == "writing_guidelines":
+            widgets = [self.wg]
+        else:
+            synthesis = ("related_work", "human_curated_synthesis")
+            references = [  self.ref_bibtex, self.ref_abstract, self.ref_category, self.ref_contribution,
+                            self.ref_strengths, self.ref_limitations, self.ref_relevance, self.ref_role ]
+            return ( [(wdg, synthesis) for wdg in (self.syn_trends, self.syn_open, self.syn_gap)]
+                   + [(wdg, None) for wdg in references] )
+        return [(wdg, (section,)) for wdg in widgets]
+
+    @contextlib.contextmanager
+    def _untracked(self):
+        # Preenchimento feito pelo programa: não é edição do usuário
+        self.tracking_suspended += 1
+        try:
+            yield
+        finally:
+            self.tracking_suspended -= 1
+
+    def _set_section(self, section, value, progressive=False):
+        """
+        Com progressive, as referências entram na lista em lotes (ver _reveal_references).
+        """
+        value = fill_section(value, EMPTY_SECTIONS[section])
+        self.document.set(section, value)
+        if not self.tab_built[self.section_tabs[section]]:
+            return  # preenchida por _ensure_tab
+
+        with self._untracked():
+            self._fill_section(section, value, progressive)
+
+    def _fill_section(self, section, value, progressive):
+        if section == "paper_profile":
+            self.pp_title.set(value["title"])
+            self.pp_domain.set(value["domain"])
+            self.pp_journal.set(value["target_journal"])
+            self.pp_keywords.set(value["keywords"])
+            self.pp_summary.set(value["author_intended_summary"])
+
+        elif section == "research_problem":
+            self.rp_overview.set(value["research_domain_overview"])
+            self.rp_specific.set(value["specific_problem"])
+            self.rp_challenges.set(value["practical_challenges"])
+            self.rp_insufficient.set(value["why_existing_solutions_are_insufficient"])
+
+        elif section == "contributions":
+            self.contributions.set(value)
+
+        elif section == "related_work":
+            self.current_reference_key = None
+            # Cópia: o documento guarda o dicionário carregado como estava
+            self.references_data = dict(value["references"])
+            self.ref_model.set_references(  self.references_data, 
+                                            visible=REFERENCES_BATCH if progressive else None )
+            if self.ref_model.pending() > 0:
+                self.load_progress.setRange(0, len(self.references_data))
+                self.load_progress.setValue(self.ref_model.visible)
+                self.load_progress.show()
+                self.references_timer.start()
+
+            if self.ref_proxy.rowCount() > 0:
+                self.ref_list.setCurrentIndex(self.ref_proxy.index(0, 0))
+            else:
+                self._clear_reference_editor()
+
+            synth = value["human_curated_synthesis"]
+            self.syn_trends.set(synth["common_trends"])
+            self.syn_open.set(synth["open_problems"])
+            self.syn_gap.set(synth["explicit_research_gap"])
+
+        elif section == "writing_guidelines":
+            self.wg.set(value)
+
+    def _get_section(self, section):
+        return self.document.section(section)
+
+    def _read_section(self, section):
+        """
+        Valor da seção lido dos widgets da aba (provedor do documento).
+        """
+        if section == "paper_profile":
+            return {
+                "title": self.pp_title.get(),
+                "domain": self.pp_domain.get(),
+                "target_journal": self.pp_journal.get(),
+                "keywords": self.pp_keywords.get(),
+                "author_intended_summary": self.pp_summary.get()
+            }
+
+        if section == "research_problem":
+            return {
+                "research_domain_overview": self.rp_overview.get(),
+                "specific_problem": self.rp_specific.get(),
+                "practical_challenges": self.rp_challenges.get(),
+                "why_existing_solutions_are_insufficient": self.rp_insufficient.get()
+            }
+
+        if section == "contributions":
+            return self.contributions.get()
+
+        if section == "related_work":
+            self._save_current_reference()
+            # Cópia rasa: o dicionário pode ser serializado em outra thread
+            # enquanto referências são acrescentadas, removidas ou renomeadas
+            return {
+                "references": dict(self.references_data),
+                "human_curated_synthesis": {
+                    "common_trends": self.syn_trends.get(),
+                    "open_problems": self.syn_open.get(),
+                    "explicit_research_gap": self.syn_gap.get()
+                }
+            }
+
+        return self.wg.get()
+
+    def _reveal_references(self):
+        if self.ref_model.reveal(REFERENCES_BATCH) > 0:
+            self.load_progress.setValue(self.ref_model.visible)
+            return
+        self.references_timer.stop()
+        self.load_progress.hide()
+
+    # ---------- Autosave ----------
+
+    def _mark_dirty(self, path):
+        if self.tracking_suspended:
+            return
+        if path is None:
+            if not self.current_reference_key:
+                return
+            path = ("related_work", "references", self.current_reference_key)
+        self.document.invalidate(path)
+
+    def _on_document_changed(self, path):
+        # O valor de path vai para o journal em _flush_journal
+        self.dirty_paths[path] = None
+        self.autosave_timer.start()
+
+    def _journal_op(self, op):
+        if self.tracking_suspended:
+            return
+        # A própria operação vai para o journal; o documento só é avisado
+        self.document.invalidate(op["path"], notify=False)
+        self.journal_ops.append(op)
+        self.autosave_timer.start()
+
+    def _journal_value(self, path):
+        if path[0] != "related_work":
+            return self._get_section(path[0])
+        if path[1] == "references":
+            self._save_current_reference()
+            return self.references_data.get(path[2])
+        return self._get_section("related_work")["human_curated_synthesis"]
+
+    def _reset_journal(self, journal):
+        self.autosave_timer.stop()
+        self.journal = journal
+        self.dirty_paths.clear()
+        self.journal_ops.clear()
+
+    def _flush_journal(self, force=False):
+        """
+        Grava no journal só as seções (ou referências) editadas desde a última
+        vez: o custo acompanha a edição, não o tamanho do artigo.
+        """
+        if self.saving_path is not None:
+            if not force:
+                # O journal muda de base ao fim da gravação; ver _on_paper_saved
+                return
+            # Gravadas sobre o journal antigo, as edições seriam descartadas
+            # como obsoletas depois do os.replace
+            self._settle_saving()
+        self.autosave_timer.stop()
+        if self.journal is None:
+            # Artigo ainda sem arquivo: tudo será gravado pelo Save as
+            self.dirty_paths.clear()
+            self.journal_ops.clear()
+            return
+
+        ops = list(self.journal_ops)
+        for path in self.dirty_paths:
+            value = self._journal_value(path)
+            if value is not None:
+                ops.append({"op": "set", "path": list(path), "value": value})
+        self.dirty_paths.clear()
+        self.journal_ops.clear()
+
+        try:
+            self.journal.append(ops)
+        except OSError as e:
+            self.status.showMessage(CONFIG["message_autosave_error"]+": "+str(e))
+            return
+
+        if self.journal.count >= int(CONFIG["autosave_compact_every"]):
+            self._compact_journal()
+
+    def _compact_journal(self, wait=False):
+        """
+        Grava o artigo inteiro no arquivo atual e esvazia o journal; em
+        segundo plano, a menos que wait (ao fechar a janela).
+        """
+        if self.journal is None or self.journal.count == 0:
+            return
+        if not wait:
+            self.save_json_file_in_background(self.current_path, quiet=True)
+            return
+        try:
+            self._write_paper(self.current_path)
+        except OSError as e:
+            self.status.showMessage(CONFIG["message_autosave_error"]+": "+str(e))
+            return
+        self.journal.clear()
+        self._reset_journal(self.journal)
+
+    def recover_unsaved_edits(self):
+        """
+        Oferece abrir o artigo cujas últimas edições ficaram só no journal.
+        """
+        papers = pending_journals()
+        if not papers:
+            return
+
+        path = papers[0]
+        answer = QMessageBox.question(  self,
+                                        CONFIG["message_recover_title"],
+                                        CONFIG["message_recover_msg"] + "\n\n" + path,
+                                        QMessageBox.Yes | QMessageBox.No )
+        if answer == QMessageBox.Yes:
+            self.load_json_file_in_background(path)
+        else:
+            Journal(path).clear()
+
     # ---------- Tabs ----------
 
     def _on_tab_changed(self, index):
+        self._ensure_tab(index)
         self._save_current_reference()
 
     def _paper_profile_tab(self):
@@ -690,14 +1583,34 @@ class JsonIntroductionEditor(QMainWindow):
         # ---- Lista de referências + painel de edição ----
         content_layout = QHBoxLayout()
 
-        # Lista de referências
-        self.ref_list = QListWidget()
+        # Lista de referências (model/view: só as linhas visíveis são desenhadas)
+        self.ref_model = ReferenceListModel(self)
+        self.ref_model.set_references(self.references_data)
+        self.ref_model.key_renamed.connect(self._on_reference_renamed)
+        self.ref_model.rename_rejected.connect(self._on_reference_rename_rejected)
+
+        self.ref_proxy = QSortFilterProxyModel(self)
+        self.ref_proxy.setSourceModel(self.ref_model)
+        self.ref_proxy.setFilterRole(ReferenceListModel.SearchRole)
+        self.ref_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        self.ref_filter = QLineEdit()
+        self.ref_filter.setPlaceholderText(CONFIG["related_references_filter"])
+        self.ref_filter.setClearButtonEnabled(True)
+        self.ref_filter.textChanged.connect(self.ref_proxy.setFilterFixedString)
+
+        self.ref_list = QListView()
+        self.ref_list.setUniformItemSizes(True)
+        self.ref_list.setModel(self.ref_proxy)
         self.ref_list.setEditTriggers(
-            QListWidget.DoubleClicked | QListWidget.EditKeyPressed
+            QListView.DoubleClicked | QListView.EditKeyPressed
         )
-        self.ref_list.itemChanged.connect(self._on_reference_renamed)
-        self.ref_list.currentItemChanged.connect(self._load_reference)
-        content_layout.addWidget(self.ref_list, 1)
+        self.ref_list.selectionModel().currentChanged.connect(self._load_reference)
+
+        list_layout = QVBoxLayout()
+        list_layout.addWidget(self.ref_filter)
+        list_layout.addWidget(self.ref_list)
+        content_layout.addLayout(list_layout, 1)
 
         # Painel de edição (scrollable)
         right_widget = QWidget()
@@ -739,11 +1652,11 @@ class JsonIntroductionEditor(QMainWindow):
         btns = QHBoxLayout()
 
         add = QPushButton(CONFIG["related_references_add"])
-        add.setIcon(QIcon(resource_path('icons', 'button_add_green.png')))
+        add.setIcon(get_icon('button_add_green.png'))
         add.setIconSize(QSize(32, 32))
 
         remove = QPushButton(CONFIG["related_references_remove"])
-        remove.setIcon(QIcon(resource_path('icons', 'button_remove_red.png')))
+        remove.setIcon(get_icon('button_remove_red.png'))
         remove.setIconSize(QSize(32, 32))
 
         btns.addWidget(add)
@@ -759,35 +1672,25 @@ class JsonIntroductionEditor(QMainWindow):
 
     
     
-    def _on_reference_renamed(self, item: QListWidgetItem):
-        old_key = self.current_reference_key
-        new_key = item.text().strip()
-
-        if not old_key:
-            return
-
-        if not new_key:
-            QMessageBox.warning(self, 
-                                CONFIG["related_references_invalid_key"], 
-                                CONFIG["related_references_invalid_key_tip"])
-            self.ref_list.blockSignals(True)
-            item.setText(old_key)
-            self.ref_list.blockSignals(False)
-            return
-
-        if new_key in self.references_data and new_key != old_key:
+    def _on_reference_renamed(self, old_key, new_key):
+        if self.current_reference_key == old_key:
+            self.current_reference_key = new_key
+
+        self._journal_op({"op": "rename", "path": ["related_work", "references", old_key], "to": new_key})
+        old_path = ("related_work", "references", old_key)
+        if old_path in self.dirty_paths:
+            del self.dirty_paths[old_path]
+            self.dirty_paths[("related_work", "references", new_key)] = None
+
+    def _on_reference_rename_rejected(self, reason):
+        if reason == "duplicate":
             QMessageBox.warning(self, 
                                 CONFIG["related_references_duplicate_key"], 
                                 CONFIG["related_references_duplicate_key_tip"])
-            self.ref_list.blockSignals(True)
-            item.setText(old_key)
-            self.ref_list.blockSignals(False)
-            return
-
-        self._save_current_reference()
-
-        self.references_data[new_key] = self.references_data.pop(old_key)
-        self.current_reference_key = new_key
+        else:
+            QMessageBox.warning(self, 
+                                CONFIG["related_references_invalid_key"], 
+                                CONFIG["related_references_invalid_key_tip"])
 
 
     def _synthesis_tab(self):
@@ -820,59 +1723,49 @@ class JsonIntroductionEditor(QMainWindow):
     # ---------- Reference Helpers ----------
 
     def _add_reference(self):
-        if self.references_data:
-            indices = []
-            for k in self.references_data.keys():
-                try:
-                    indices.append(int(k.split("_")[1]))
-                except (IndexError, ValueError):
-                    pass
-            next_idx = max(indices) + 1 if indices else 1
-        else:
-            next_idx = 1
-
-        key = f"ref_{next_idx}"
-        self.references_data[key] = {}
-
-        self.ref_list.blockSignals(True)
-
-        item = QListWidgetItem(key)
-        item.setFlags(item.flags() | Qt.ItemIsEditable)
-        self.ref_list.addItem(item)
-        self.ref_list.setCurrentItem(item)
-
-        self.current_reference_key = key
-
-        self.ref_list.blockSignals(False)
+        # Um filtro ativo poderia esconder a referência nova
+        self.ref_filter.clear()
 
-        self._clear_reference_editor()
+        row = self.ref_model.add_reference()
+        key = self.ref_model.key_at(row)
+        self._journal_op({"op": "set", "path": ["related_work", "references", key], "value": {}})
+        self.ref_list.setCurrentIndex(self.ref_proxy.mapFromSource(self.ref_model.index(row)))
 
     def _clear_reference_editor(self):
-        self.ref_bibtex.set("")
-        self.ref_abstract.set("")
-        self.ref_category.set("")
-        self.ref_contribution.set("")
-        self.ref_strengths.set([])
-        self.ref_limitations.set([])
-        self.ref_relevance.set("")
-        self.ref_role.set("")
+        with self._untracked():
+            self.ref_bibtex.set("")
+            self.ref_abstract.set("")
+            self.ref_category.set("")
+            self.ref_contribution.set("")
+            self.ref_strengths.set([])
+            self.ref_limitations.set([])
+            self.ref_relevance.set("")
+            self.ref_role.set("")
 
     def _remove_reference(self):
-        for item in self.ref_list.selectedItems():
-            key = item.text()
-            self.references_data.pop(key, None)
-            self.ref_list.takeItem(self.ref_list.row(item))
+        rows = [self.ref_proxy.mapToSource(index).row()
+                for index in self.ref_list.selectionModel().selectedIndexes()]
+        if not rows:
+            return
+
+        for row in rows:
+            key = self.ref_model.key_at(row)
+            self.dirty_paths.pop(("related_work", "references", key), None)
+            self._journal_op({"op": "del", "path": ["related_work", "references", key]})
 
-            if key == self.current_reference_key:
-                self.current_reference_key = None
+        # Sem isso, a troca de linha salvaria o editor na referência removida
+        self.current_reference_key = None
+        self.ref_model.remove_rows(rows)
 
-        self._clear_reference_editor()
+        if self.current_reference_key is None:
+            self._load_reference(self.ref_list.currentIndex(), QModelIndex())
 
     def _save_current_reference(self):
         if not self.current_reference_key:
             return
 
-        self.references_data[self.current_reference_key] = {
+        key = self.current_reference_key
+        reference = {
             "bibtex": self.ref_bibtex.get(),
             "abstract": self.ref_abstract.get(),
             "methodological_category": self.ref_category.get(),
@@ -882,31 +1775,35 @@ class JsonIntroductionEditor(QMainWindow):
             "relevance_to_our_work": self.ref_relevance.get(),
             "introduction_paragraph_role": self.ref_role.get(),
         }
+        if self.references_data.get(key) == reference:
+            return
+        self.references_data[key] = reference
+        # O JSON guardado da referência (ver PaperDocument) deixa de valer;
+        # edições do usuário já avisaram os observadores pelo widget
+        self.document.invalidate(("related_work", "references", key), notify=False)
 
 
     def _load_reference(self, current, previous):
-        if previous and self.current_reference_key:
+        if self.current_reference_key:
             self._save_current_reference()
 
-        if not current:
+        if not current.isValid():
             self.current_reference_key = None
+            self._clear_reference_editor()
             return
 
-        self.ref_list.blockSignals(True)
-
-        self.current_reference_key = current.text()
+        self.current_reference_key = current.data(Qt.DisplayRole)
         ref = self.references_data.get(self.current_reference_key, {})
 
-        self.ref_bibtex.set(ref.get("bibtex"))
-        self.ref_abstract.set(ref.get("abstract"))
-        self.ref_category.set(ref.get("methodological_category"))
-        self.ref_contribution.set(ref.get("central_technical_idea"))
-        self.ref_strengths.set(ref.get("author_reported_strengths", []))
-        self.ref_limitations.set(ref.get("reported_limitations", []))
-        self.ref_relevance.set(ref.get("relevance_to_our_work"))
-        self.ref_role.set(ref.get("introduction_paragraph_role"))
-
-        self.ref_list.blockSignals(False)
+        with self._untracked():
+            self.ref_bibtex.set(ref.get("bibtex"))
+            self.ref_abstract.set(ref.get("abstract"))
+            self.ref_category.set(ref.get("methodological_category"))
+            self.ref_contribution.set(ref.get("central_technical_idea"))
+            self.ref_strengths.set(ref.get("author_reported_strengths", []))
+            self.ref_limitations.set(ref.get("reported_limitations", []))
+            self.ref_relevance.set(ref.get("relevance_to_our_work"))
+            self.ref_role.set(ref.get("introduction_paragraph_role"))
 
 
     # ---------- Load / Save ----------
@@ -918,81 +1815,63 @@ class JsonIntroductionEditor(QMainWindow):
         if not path:
             return
 
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        self.load_json_file_in_background(path)
+
+    def load_json_file_in_background(self, path):
+        """
+        Lê e interpreta o arquivo fora da thread da GUI; os campos são
+        preenchidos em _on_paper_loaded.
+        """
+        # O loader lê o journal do disco: as edições pendentes vão antes,
+        # senão reabrir o mesmo artigo as perderia
+        self._flush_journal(force=True)
+        self.loading_path = path
+        self.status.showMessage(CONFIG["message_loading"]+": "+path)
+        self.references_timer.stop()
+        self.load_progress.setRange(0, 0)
+        self.load_progress.show()
+        self.paper_loader.load(path)
+
+    def _on_paper_loaded(self, path, files):
+        if path != self.loading_path:
+            return  # outro arquivo foi aberto depois deste
+        self.loading_path = None
+        self.load_progress.hide()
+        self._apply_paper(path, *files, progressive=True)
+
+    def _on_paper_load_failed(self, path, message):
+        if path != self.loading_path:
+            return
+        self.loading_path = None
+        self.load_progress.hide()
+        self.status.clearMessage()
+        QMessageBox.warning(self, CONFIG["error_load_json"], path + "\n\n" + message)
 
-        self.current_path = path
-        self.status.showMessage(CONFIG["message_loaded_from"]+": "+path)
-
-        # ---- Paper Profile ----
-        pp = data.get("paper_profile", {})
-        self.pp_title.set(pp.get("title"))
-        self.pp_domain.set(pp.get("domain"))
-        self.pp_journal.set(pp.get("target_journal"))
-        self.pp_keywords.set(pp.get("keywords", []))
-        self.pp_summary.set(pp.get("author_intended_summary"))
-
-        # ---- Research Problem ----
-        rp = data.get("research_problem", {})
-        self.rp_overview.set(rp.get("research_domain_overview"))
-        self.rp_specific.set(rp.get("specific_problem"))
-        self.rp_challenges.set(rp.get("practical_challenges", []))
-        self.rp_insufficient.set(rp.get("why_existing_solutions_are_insufficient"))
-
-        # ---- Contributions ----
-        self.contributions.set(data.get("contributions", []))
-
-        # ---- Writing Guidelines ----
-        self.wg.set(data.get("writing_guidelines", ""))
-
-        # ---- Related Work: References ----
-        self.references_data = data.get("related_work", {}).get("references", {})
-        self.ref_list.clear()
-
-        for key in self.references_data.keys():
-            item = QListWidgetItem(key)
-            item.setFlags(item.flags() | Qt.ItemIsEditable)
-            self.ref_list.addItem(item)
+    def load_json_file(self, path):
+        self._apply_paper(path, *read_paper_files(path))
 
-        if self.ref_list.count() > 0:
-            self.ref_list.setCurrentRow(0)
+    def _apply_paper(self, path, data, state, ledger, journal, progressive=False):
+        # As edições do artigo anterior ficam no journal dele
+        self._flush_journal(force=True)
 
-        # ---- Related Work: Human Curated Synthesis ----
-        synth = data.get("related_work", {}).get("human_curated_synthesis", {})
-        self.syn_trends.set(synth.get("common_trends", []))
-        self.syn_open.set(synth.get("open_problems", []))
-        self.syn_gap.set(synth.get("explicit_research_gap"))
+        self.current_path = path
+        self.generation_state = state
+        self.ledger = ledger
+        self._update_cost_label()
+        self._reset_journal(journal)
+        if journal.count:
+            self.status.showMessage(CONFIG["message_journal_replayed"]+" ("+str(journal.count)+"): "+path)
+        else:
+            self.status.showMessage(CONFIG["message_loaded_from"]+": "+path)
 
-    def _obtaining_data(self):
-        self._save_current_reference()
+        # Primeiro as seções curtas; as referências por último
+        for section in EMPTY_SECTIONS:
+            if section != "related_work":
+                self._set_section(section, data.get(section))
+        self._set_section("related_work", data.get("related_work"), progressive=progressive)
 
-        data = {
-            "paper_profile": {
-                "title": self.pp_title.get(),
-                "domain": self.pp_domain.get(),
-                "target_journal": self.pp_journal.get(),
-                "keywords": self.pp_keywords.get(),
-                "author_intended_summary": self.pp_summary.get()
-            },
-            "research_problem": {
-                "research_domain_overview": self.rp_overview.get(),
-                "specific_problem": self.rp_specific.get(),
-                "practical_challenges": self.rp_challenges.get(),
-                "why_existing_solutions_are_insufficient": self.rp_insufficient.get()
-            },
-            "contributions": self.contributions.get(),
-            "related_work": {
-                "references": self.references_data,
-                "human_curated_synthesis": {
-                    "common_trends": self.syn_trends.get(),
-                    "open_problems": self.syn_open.get(),
-                    "explicit_research_gap": self.syn_gap.get()
-                }
-            },
-            "writing_guidelines": self.wg.get()
-        }
-        
-        return data
+    def _obtaining_data(self):
+        return self.document.data()
 
     def ensure_intro_json(self, path: str) -> str:
         if path.endswith(".intro.json"):
@@ -1002,6 +1881,12 @@ class JsonIntroductionEditor(QMainWindow):
         else:
             return path + ".intro.json"
 
+    def save_json(self):
+        if not self.current_path:
+            self.save_as_json()
+            return
+        self.save_json_file_in_background(self.current_path)
+
     def save_as_json(self):
 
         path, _ = QFileDialog.getSaveFileName(self, CONFIG["toolbar_save_as"], "", "JSON Files (*.intro.json)")
@@ -1010,30 +1895,140 @@ class JsonIntroductionEditor(QMainWindow):
         
         path = self.ensure_intro_json(path)
         
-        data = self._obtaining_data()
-
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        self.save_json_file_in_background(path)
+
+    def _write_paper(self, path):
+        """
+        Grava o artigo em path na thread da GUI; retorna se o arquivo foi escrito.
+        """
+        # Uma gravação em segundo plano usa o mesmo arquivo temporário
+        self._settle_saving()
+
+        key = os.path.abspath(path)
+        record, written = write_paper_content(path, self.document.serialize(), self.saved_records.get(key))
+        self.saved_records[key] = record
+        if self.generation_state:
+            self._save_generation_state(path, self.generation_state)
+        return written
+
+    def _save_generation_state(self, path, state):
+        # Sem o estado, a próxima geração só refaz todos os parágrafos
+        try:
+            save_state(path, state)
+        except OSError as e:
+            print(f"Generation state: {e}", file=sys.stderr)
+
+    def _saved(self, path, keep_edits=False):
+        """
+        Associa o documento a path, recém-gravado. Com keep_edits, as edições
+        feitas durante a gravação (que não estão no arquivo) continuam
+        pendentes para o novo journal.
+        """
+        # O arquivo gravado já contém as edições do journal
+        if self.journal is not None:
+            self.journal.clear()
+        journal = Journal(path)
+        # Um journal que sobrou de path (de outra sessão) tem uma base antiga:
+        # as próximas edições seriam gravadas sob ela e descartadas no replay
+        journal.clear()
+        if keep_edits:
+            self.journal = journal
+        else:
+            self._reset_journal(journal)
 
         self.current_path = path
-        self.status.showMessage(CONFIG["message_saved_to"]+": "+path)
+        if self.ledger.paper_path != path:
+            self.ledger.attach(path)
+            self._update_cost_label()
+
+    def save_json_file(self, path):
+        written = self._write_paper(path)
+        self._saved(path)
+        if written:
+            self.status.showMessage(CONFIG["message_saved_to"]+": "+path)
+        else:
+            self.status.showMessage(CONFIG["message_save_unchanged"]+": "+path)
+
+    def save_json_file_in_background(self, path, quiet=False):
+        """
+        Na thread da GUI só se serializa o que mudou desde a última vez (ver
+        PaperDocument); comparar com a última gravação e escrever ficam com
+        o PaperSaver. quiet é a compactação do journal, sem mensagens na
+        barra de status.
+        """
+        if self.saving_path is not None:
+            # Feita quando a atual terminar (_run_queued_save); um pedido do
+            # usuário prevalece sobre uma compactação
+            if self.queued_save is None or not quiet:
+                self.queued_save = (path, quiet)
+            if not quiet:
+                self.status.showMessage(CONFIG["message_saving"]+": "+path)
+            return
 
-    def is_data_empty(self, data: dict) -> bool:
-        def has_content(value):
-            if isinstance(value, str):
-                return bool(value.strip())
-            if isinstance(value, list):
-                return any(has_content(v) for v in value)
-            if isinstance(value, dict):
-                return any(has_content(v) for v in value.values())
-            return False
+        self.saving_path = path
+        self.saving_document = (self.current_path, self.journal)
+        self.saving_quiet = quiet
+        if not quiet:
+            self.status.showMessage(CONFIG["message_saving"]+": "+path)
+        self.paper_saver.save(  path,
+                                self.document.serialize(),
+                                self.saved_records.get(os.path.abspath(path)) )
+
+    def _finish_saving(self):
+        document = self.saving_document
+        self.saving_path = None
+        self.saving_document = None
+        if self.dirty_paths or self.journal_ops:
+            self.autosave_timer.start()
+        # Outro arquivo foi aberto durante a gravação?
+        return document == (self.current_path, self.journal)
+
+    def _run_queued_save(self):
+        if self.queued_save is None:
+            return
+        path, quiet = self.queued_save
+        self.queued_save = None
+        if quiet:
+            self._compact_journal()
+        else:
+            self.save_json_file_in_background(path)
+
+    def _settle_saving(self):
+        """
+        Conclui já as gravações em segundo plano (a atual e a da fila),
+        antes de mexer no journal ou no arquivo na thread da GUI.
+        """
+        while self.paper_saver.pending is not None:
+            self.paper_saver.finish()
+
+    def _on_paper_saved(self, path, record, written):
+        quiet = self.saving_quiet
+        self.saved_records[os.path.abspath(path)] = record
+        if self._finish_saving():
+            if self.generation_state:
+                self._save_generation_state(path, self.generation_state)
+            self._saved(path, keep_edits=True)
+            if not quiet and written:
+                self.status.showMessage(CONFIG["message_saved_to"]+": "+path)
+            elif not quiet:
+                self.status.showMessage(CONFIG["message_save_unchanged"]+": "+path)
+        self._run_queued_save()
+
+    def _on_paper_save_failed(self, path, message):
+        quiet = self.saving_quiet
+        self._finish_saving()
+        if quiet:
+            self.status.showMessage(CONFIG["message_autosave_error"]+": "+message)
+        else:
+            self.status.clearMessage()
+            QMessageBox.warning(self, CONFIG["error_save_json"], path + "\n\n" + message)
+        self._run_queued_save()
 
+    def is_data_empty(self, data: dict) -> bool:
         return not has_content(data)
 
     def generate_cmd(self):
-        data = self._obtaining_data()
-
-        if self.is_data_empty(data):
+        if self.document.is_empty():
             QMessageBox.warning(
                 self,
                 CONFIG["error_missing_data"],
@@ -1041,98 +2036,236 @@ class JsonIntroductionEditor(QMainWindow):
             )
             return
             
-        prompt = consultation_in_text(data)
+        encoding = get_prompt_encoding(CONFIG_LLM)
+
+        def build():
+            data, report = fit_prompt(CONFIG_LLM, self._obtaining_data())
+            return consultation_in_text(data, encoding=encoding), report
+
+        # Refeito só se o artigo ou o modelo e seu orçamento mudaram
+        key = ("prompt", encoding, CONFIG_LLM.get("model"), get_prompt_token_budget(CONFIG_LLM))
+        prompt, report = self.document.memo(key, build)
+        if report.cuts or not report.fits:
+            self.status.showMessage(CONFIG["message_prompt_trimmed"]+": "+report.summary())
         
         show_info_dialog(   prompt, 
                         title_message = CONFIG["message_prompt"], 
                         width = 800,
                         height = 600 )
     
-    def generate_intro(self):
+    def _ensure_llm_configured(self):
         global CONFIG_LLM
-        
-        data = self._obtaining_data()
-
-        if self.is_data_empty(data):
-            QMessageBox.warning(
-                self,
-                CONFIG["error_missing_data"],
-                CONFIG["error_missing_data_msg"]
-            )
-            return
 
         if CONFIG_LLM["api_key"]=="":
-            CONFIG_LLM = configure.load_config(CONFIG_LLM_PATH)
+            CONFIG_LLM = load_llm_config()
             
             if CONFIG_LLM["api_key"]=="":
                 self.status.showMessage(CONFIG["message_open"]+": " + CONFIG_LLM_PATH)
                 self._open_file_in_text_editor(CONFIG_LLM_PATH)
                 QDesktopServices.openUrl(QUrl(CONFIG_LLM["usage"]))
                 
-                return
+                return False
+        return True
+
+    def _set_generating(self, generating):
+        self.generate_intro_action.setEnabled(not generating)
+        self.generate_candidates_action.setEnabled(not generating)
+        self.cancel_action.setEnabled(generating)
+
+    def generate_intro(self):
+        trace = telemetry.Trace(CONFIG_LLM,
+                                source="gui",
+                                mode=CONFIG_LLM.get("generation_mode"))
+        with trace.span("collect"):
+            data = self._obtaining_data()
+
+        if self.document.is_empty():
+            QMessageBox.warning(
+                self,
+                CONFIG["error_missing_data"],
+                CONFIG["error_missing_data_msg"]
+            )
+            return
+
+        if not self._ensure_llm_configured():
+            return
 
         # Feedback visual
         self.status.showMessage(CONFIG["message_llm_consulting"])
-        self.generate_intro_action.setEnabled(False)
+        self._set_generating(True)
         
-        # Thread
-        self.thread = QThread()
-        self.worker = ConsultationWorker(CONFIG_LLM, data)
+        # Worker (roda no event loop compartilhado)
+        self.worker = ConsultationWorker(CONFIG_LLM, data, state=self.generation_state, trace=trace)
 
-        self.worker.moveToThread(self.thread)
+        # Painel de saída
+        self.prompt_note = None
+        self.regenerated_note = None
+        self.output_dock.clear()
+        self.output_dock.show()
+        self.output_dock.raise_()
 
         # Conexões
-        self.thread.started.connect(self.worker.run)
+        self.worker.chunk.connect(self.on_intro_chunk)
+        self.worker.prompt_report.connect(self.on_prompt_report)
+        self.worker.progress.connect(self.on_intro_progress)
+        self.worker.generation_state.connect(self.on_generation_state)
         self.worker.finished.connect(self.on_intro_ready)
         self.worker.error.connect(self.on_intro_error)
+        self.worker.cancelled.connect(self.on_intro_cancelled)
+        self.worker.usage.connect(self.on_usage)
 
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
+        self.worker.run()
 
-        self.thread.start()
+    def generate_candidates(self):
+        data = self._obtaining_data()
 
-    def on_intro_ready(self, out):
-        self.generate_intro_action.setEnabled(True)
+        if self.document.is_empty():
+            QMessageBox.warning(
+                self,
+                CONFIG["error_missing_data"],
+                CONFIG["error_missing_data_msg"]
+            )
+            return
+
+        if not self._ensure_llm_configured():
+            return
+
+        configs = candidate_configs(CONFIG_LLM)
+        self.candidates_pending = len(configs)
+
+        self.status.showMessage(CONFIG["message_llm_consulting"])
+        self._set_generating(True)
+
+        self.candidates_dock.set_candidates([label for label, _ in configs])
+        self.candidates_dock.show()
+        self.candidates_dock.raise_()
+
+        self.worker = CandidatesWorker( [config for _, config in configs],
+                                        data,
+                                        max_concurrency=CONFIG_LLM.get("candidates_concurrency", 0) )
+        self.worker.chunk.connect(self.on_candidate_chunk)
+        self.worker.candidate_done.connect(self.on_candidate_done)
+        self.worker.finished.connect(self.on_candidates_ready)
+        self.worker.cancelled.connect(self.on_intro_cancelled)
+        self.worker.usage.connect(self.on_usage)
+
+        self.worker.run()
+
+    def on_candidate_chunk(self, index, text):
+        if self.sender() is self.worker:
+            self.candidates_dock.append_text(index, text)
+
+    def on_candidate_done(self, index, text, error):
+        if self.sender() is not self.worker:
+            return
+        self.candidates_dock.set_done(index, error)
+        self.candidates_pending -= 1
+        self.status.showMessage(CONFIG["message_candidates_ready"]
+                                + f": {len(self.candidates_dock.labels) - self.candidates_pending}"
+                                + f"/{len(self.candidates_dock.labels)}")
+
+    def on_candidates_ready(self):
+        self._release_worker()
         self.status.showMessage(CONFIG["message_done"])
-        show_info_dialog(out, title_message=CONFIG["message_llm_response"]+": ")
+
+    def _status_with_prompt_note(self, message):
+        if self.prompt_note:
+            message += " | " + CONFIG["message_prompt_trimmed"] + ": " + self.prompt_note
+        self.status.showMessage(message)
+
+    def on_prompt_report(self, summary):
+        self.prompt_note = summary
+        self._status_with_prompt_note(CONFIG["message_llm_consulting"])
+
+    def on_intro_progress(self, progress):
+        self._status_with_prompt_note(CONFIG["message_paragraphs_ready"]+": "+progress)
+
+    def on_generation_state(self, state, regenerated):
+        self.generation_state = state
+        if self.current_path:
+            self._save_generation_state(self.current_path, state)
+        self.regenerated_note = ", ".join(regenerated) or CONFIG["message_paragraphs_none"]
+
+    def on_intro_chunk(self, text):
+        if self.sender() is not self.worker:
+            return  # pedaço ainda na fila de uma geração cancelada
+        if self.output_dock.text_edit.document().isEmpty():
+            self._status_with_prompt_note(CONFIG["message_llm_receiving"])
+        self.output_dock.append_text(text)
+
+    def _release_worker(self):
+        self._set_generating(False)
+        # Sem deleteLater: uma task cancelada ainda pode emitir usage ao terminar;
+        # o worker é liberado quando ela deixa de referenciá-lo
+        self.worker = None
+
+    def on_usage(self, entries):
+        try:
+            self.ledger.add(entries)
+        except OSError as e:
+            print(f"Ledger: {e}", file=sys.stderr)
+        self._update_cost_label()
+
+    def cancel_intro(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_intro_cancelled(self):
+        self._release_worker()
+        self._status_with_prompt_note(CONFIG["message_llm_cancelled"])
+
+    def on_intro_ready(self, out):
+        self._release_worker()
+        message = CONFIG["message_done"]
+        if self.regenerated_note:
+            message += " | " + CONFIG["message_paragraphs_regenerated"] + ": " + self.regenerated_note
+        self._status_with_prompt_note(message)
 
     def on_intro_error(self, error_msg):
-        self.generate_intro_action.setEnabled(True)
+        self._release_worker()
         self.status.showMessage(CONFIG["message_error"])
         show_error_dialog(error_msg)
 
+    def closeEvent(self, event):
+        # Cancela a geração em andamento e encerra o event loop compartilhado
+        if self.worker is not None:
+            self.worker.cancel()
+
+        # Fechamento normal: as edições do journal vão para o arquivo
+        self._flush_journal(force=True)
+        self._compact_journal(wait=True)
+
+        shutdown_background_loop(timeout=3, cleanup=close_async_clients)
+        super().closeEvent(event)
+
 # ---------- Main ----------
 
 def main():
     signal.signal(signal.SIGINT, signal.SIG_DFL)
-    
-    create_desktop_directory()    
-    create_desktop_menu()
-    create_desktop_file(os.path.join("~",".local","share","applications"), 
-                        program_name=about.__program_name__)
-    
+
+    # batch, tokens, bench... (ver cli.py) não precisam da interface
+    code = run_command(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
     for n in range(len(sys.argv)):
         if sys.argv[n] == "--autostart":
-            create_desktop_directory(overwrite = True)
-            create_desktop_menu(overwrite = True)
-            create_desktop_file(os.path.join("~",".config","autostart"), 
-                                overwrite=True, 
-                                program_name=about.__program_name__)
+            install_desktop_integration(APPLICATIONS_PATH)
+            install_desktop_integration(AUTOSTART_PATH, overwrite=True)
             return
         if sys.argv[n] == "--applications":
-            create_desktop_directory(overwrite = True)
-            create_desktop_menu(overwrite = True)
-            create_desktop_file(os.path.join("~",".local","share","applications"), 
-                                overwrite=True, 
-                                program_name=about.__program_name__)
+            install_desktop_integration(APPLICATIONS_PATH, overwrite=True)
             return
+
+    load_configs()
+    ensure_desktop_integration()
     
     app = QApplication(sys.argv)
     app.setApplicationName(about.__package__) 
     
     win = JsonIntroductionEditor()
     win.show()
+    QTimer.singleShot(0, win.recover_unsaved_edits)
     sys.exit(app.exec_())
     
     
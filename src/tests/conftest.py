@@ -0,0 +1,28 @@
+import pytest
+
+from article_introduction_generator.modules.fake_server import start_fake_server
+
+
+@pytest.fixture
+def fake_server():
+    # Respostas curtas e imediatas; os testes ajustam o que precisarem
+    server = start_fake_server(port=0, latency=0, tokens_per_second=0, response_tokens=20)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def llm_config(fake_server, tmp_path):
+    """
+    config.llm.json apontado para o servidor falso, sem esperas entre
+    tentativas e sem gravar nada em ~/.config.
+    """
+    return {    "base_url": fake_server.base_url,
+                "api_key": "test",
+                "model": "fake-model",
+                "request_timeout": 10,
+                "max_retries": 0,
+                "retry_backoff_base": 0,
+                "retry_backoff_max": 0,
+                "telemetry_path": str(tmp_path / "telemetry.jsonl") }
@@ -0,0 +1,31 @@
+import json
+
+from article_introduction_generator.modules import batch
+
+
+class NullLedger:
+    def __init__(self, path):
+        pass
+
+    def add(self, entries):
+        pass
+
+
+def test_state_error_does_not_fail_the_paper(llm_config, tmp_path, monkeypatch, capsys):
+    def failing_save_state(path, state):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(batch, "save_state", failing_save_state)
+    monkeypatch.setattr(batch, "Ledger", NullLedger)  # nada em ~/.config
+    llm_config["generation_mode"] = "paragraphs"
+
+    path = tmp_path / "paper.intro.json"
+    paper = {   "paper_profile": {"title": "A fast model", "domain": "Machine learning"},
+                "research_problem": {"specific_problem": "Models are slow."} }
+    path.write_text(json.dumps(paper), encoding="utf-8")
+
+    [(_, out_path, error)] = batch.run_batch(llm_config, [str(path)], use_cache=False)
+
+    assert error is None
+    assert open(out_path, encoding="utf-8").read()
+    assert "[state]" in capsys.readouterr().err
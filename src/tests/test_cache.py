@@ -0,0 +1,81 @@
+import os
+import time
+import threading
+
+from article_introduction_generator.modules.cache import ResponseCache, TMP_SUFFIX, cache_key
+
+
+def test_put_and_get(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get("a") is None
+    cache.put("a", "texto")
+    assert cache.get("a") == "texto"
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size_mb=250 / 1024 / 1024)
+    cache.put("a", "x" * 100)
+    cache.put("b", "x" * 100)
+    os.utime(cache._path("a"), (1000, 1000))
+    os.utime(cache._path("b"), (2000, 2000))
+
+    assert cache.get("a") is not None  # "a" passa a ser a mais recente
+    cache.put("c", "x" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_concurrent_puts_of_the_same_key(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    errors = []
+
+    def put(n):
+        try:
+            for _ in range(20):
+                cache.put("k", str(n) * 1000)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=put, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(cache.get("k"))) == 1
+    assert os.listdir(tmp_path) == ["k.txt"]
+
+
+def test_evict_removes_only_stale_tmp_files(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    stale = tmp_path / ("a.old" + TMP_SUFFIX)
+    fresh = tmp_path / ("a.new" + TMP_SUFFIX)
+    stale.write_text("x")
+    fresh.write_text("x")
+    old = time.time() - 2 * 3600
+    os.utime(stale, (old, old))
+
+    cache.evict()
+
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_clear(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.clear()
+    assert cache.entries() == []
+
+
+def test_cache_key_depends_on_sampling_and_not_on_json_key_order():
+    base = ("http://x/v1", "m", "system", "user")
+    assert cache_key(*base, {"a": 1, "b": 2}) == cache_key(*base, {"b": 2, "a": 1})
+    assert cache_key(*base, {"a": 1}) != cache_key(*base, {"a": 2})
+    assert cache_key(*base, {}, {"temperature": 0.2}) != cache_key(*base, {}, {"temperature": 0.9})
+    # Sem parâmetros de amostragem a chave é a mesma de antes
+    assert cache_key(*base, {}, {}) == cache_key(*base, {})
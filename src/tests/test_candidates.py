@@ -0,0 +1,20 @@
+from article_introduction_generator.modules.candidates import candidate_configs, candidate_label
+
+
+def test_candidate_label():
+    assert candidate_label({"model": "org/model", "temperature": 0.70, "top_p": 1}) == "model · T=0.7 · p=1"
+    assert candidate_label({"model": "m"}) == "m"
+
+
+def test_candidate_label_with_values_written_as_text():
+    assert candidate_label({"model": "m", "temperature": "0.70"}) == "m · T=0.7"
+    assert candidate_label({"model": "m", "top_p": "high"}) == "m · p=high"
+
+
+def test_candidate_configs():
+    system_data = {"model": "base", "temperature": 0.2}
+    configs = candidate_configs(dict(system_data, candidates=[  {"temperature": 0.9},
+                                                                {"model": "other", "label": "Other"},
+                                                                "ignored" ]))
+    assert [label for label, _ in configs] == ["base · T=0.9", "Other"]
+    assert configs[1][1]["temperature"] == 0.2
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from article_introduction_generator.modules.cassette import Cassette, CassetteMiss
+from article_introduction_generator.modules.consult import chat_complete_sync, chat_stream
+from article_introduction_generator.modules.llm_client import close_async_clients
+
+
+def stream_text(system_data, user_msg="user"):
+    async def run():
+        try:
+            return "".join([piece async for piece in chat_stream(system_data, "system", user_msg)])
+        finally:
+            await close_async_clients()
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def cassette_config(llm_config, tmp_path):
+    return dict(llm_config, cassette_path=str(tmp_path / "session.jsonl.gz"), cassette_latency_scale=0)
+
+
+def test_record_then_replay_without_the_server(fake_server, cassette_config):
+    recorded = stream_text(dict(cassette_config, cassette_mode="record"))
+    assert fake_server.request_count == 1
+
+    fake_server.shutdown()
+    # A resposta vem do cassette: o endpoint nem precisa existir
+    replay = dict(cassette_config, cassette_mode="replay", base_url="http://127.0.0.1:9/v1")
+    assert stream_text(replay) == recorded
+    assert chat_complete_sync(replay, "system", "user") == recorded
+
+
+def test_sync_record_is_replayed_by_the_stream(fake_server, cassette_config):
+    recorded = chat_complete_sync(dict(cassette_config, cassette_mode="record"), "system", "user")
+    assert stream_text(dict(cassette_config, cassette_mode="replay")) == recorded
+    assert fake_server.request_count == 1
+
+
+def test_replay_of_an_unknown_request(fake_server, cassette_config):
+    stream_text(dict(cassette_config, cassette_mode="record"))
+    with pytest.raises(CassetteMiss):
+        stream_text(dict(cassette_config, cassette_mode="replay"), user_msg="another question")
+
+
+def test_cassette_file(tmp_path):
+    path = str(tmp_path / "c.jsonl")
+    Cassette(path).record("k", "m", 10, [(0.1, "Hello"), (0.02, " world")])
+
+    cassette = Cassette(path, latency_scale=0)
+    assert cassette.get("k")["c"] == [[100, "Hello"], [20, " world"]]
+    assert cassette.replay_text("k") == "Hello world"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"k": "truncated')  # gravação interrompida
+    assert list(Cassette(path).entries()) == ["k"]
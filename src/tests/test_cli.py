@@ -0,0 +1,35 @@
+import os
+import sys
+import json
+import subprocess
+
+from article_introduction_generator.cli import run_command
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_unknown_arguments_open_the_editor():
+    assert run_command([]) is None
+    assert run_command(["paper.intro.json"]) is None
+
+
+def test_subcommands_do_not_load_qt(tmp_path):
+    paper = tmp_path / "p.intro.json"
+    paper.write_text(json.dumps({"paper_profile": {"title": "T"}}), encoding="utf-8")
+    code = ( "import sys\n"
+             "from article_introduction_generator.cli import run_command\n"
+             f"assert run_command(['tokens', {str(paper)!r}]) == 0\n"
+             f"assert run_command(['batch', {str(tmp_path / 'missing')!r}]) != 0\n"
+             "assert not [m for m in sys.modules if m.startswith('PyQt5')]\n" )
+    home = tmp_path / "home"
+    home.mkdir()
+
+    result = subprocess.run([sys.executable, "-c", code],
+                            cwd=SRC,
+                            env=dict(os.environ, HOME=str(home)),
+                            capture_output=True,
+                            text=True)
+
+    assert result.returncode == 0, result.stderr
+    # Nada de config.json ou config.llm.json em ~/.config
+    assert list(home.iterdir()) == []
@@ -0,0 +1,99 @@
+import copy
+
+from article_introduction_generator.core import PaperDocument, serialize_paper
+
+
+def paper(n_refs=5):
+    return {
+        "paper_profile": {"title": "Título", "keywords": ["a", "b"]},
+        "related_work": {
+            "references": {f"ref{i}": {"abstract": f"abstract {i}", "bibtex": ""} for i in range(n_refs)},
+            "common_trends": "trends",
+        },
+    }
+
+
+class Editor:
+    """
+    Widgets simulados: cada seção é lida de self.values, como _read_section.
+    """
+    def __init__(self, document):
+        self.document = document
+        self.values = copy.deepcopy(document.data())
+        for name in self.values:
+            document.bind(name, lambda name=name: copy.deepcopy(self.values[name]))
+
+    def references(self):
+        return self.values["related_work"]["references"]
+
+
+def check(document):
+    assert document.serialize() == serialize_paper(document.data())
+
+
+def test_serialize_matches_serialize_paper():
+    document = PaperDocument(paper())
+    check(document)
+    check(PaperDocument())
+
+
+def test_serialize_after_edits():
+    document = PaperDocument(paper())
+    editor = Editor(document)
+    check(document)
+
+    editor.values["paper_profile"]["title"] = "Outro título"
+    document.invalidate(("paper_profile",))
+    check(document)
+
+    editor.references()["ref2"]["abstract"] = "edited"
+    document.invalidate(("related_work", "references", "ref2"))
+    check(document)
+    assert b'"edited"' in document.serialize()
+
+    editor.references()["new"] = {"abstract": "added"}
+    del editor.references()["ref0"]
+    document.invalidate(("related_work",))
+    check(document)
+    assert b'"ref0"' not in document.serialize()
+
+    editor.values["related_work"]["common_trends"] = ""
+    document.invalidate(("related_work",), notify=False)
+    check(document)
+
+
+def test_set_and_reset():
+    document = PaperDocument(paper())
+    check(document)
+    document.set("research_problem", {"specific_problem": "p"})
+    check(document)
+    document.reset(paper(n_refs=1))
+    check(document)
+    assert document.dirty == set()
+
+
+def test_observers_and_memo():
+    document = PaperDocument(paper())
+    Editor(document)
+    seen = []
+    document.observers.append(seen.append)
+
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert document.memo("prompt", compute) == 1
+    assert document.memo("prompt", compute) == 1
+
+    document.invalidate(("related_work", "references", "ref1"))
+    document.invalidate(("paper_profile",), notify=False)
+    assert seen == [("related_work", "references", "ref1")]
+    assert document.memo("prompt", compute) == 2
+
+
+def test_has_content():
+    document = PaperDocument()
+    assert document.is_empty()
+    editor = Editor(document)
+    editor.values["research_problem"]["specific_problem"] = "problem"
+    document.invalidate(("research_problem",))
+    assert document.has_content("research_problem")
+    assert not document.is_empty()
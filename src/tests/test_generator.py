@@ -0,0 +1,72 @@
+import asyncio
+
+from article_introduction_generator.core import IntroGenerator
+from article_introduction_generator.modules import telemetry
+from article_introduction_generator.modules.llm_client import close_async_clients
+
+PAPER = {   "paper_profile": {"title": "A fast model", "keywords": ["speed"]},
+            "research_problem": {"specific_problem": "Models are slow."} }
+
+
+def test_prompt_does_not_need_the_llm():
+    prompt = IntroGenerator({"model": "m"}).prompt(PAPER)
+    assert "A fast model" in prompt
+
+
+def test_generate(fake_server, llm_config):
+    generator = IntroGenerator(llm_config, use_cache=False)
+    reports = []
+
+    text = generator.generate(PAPER, on_prompt_report=reports.append)
+
+    assert len(text.split()) == fake_server.response_tokens
+    assert len(reports) == 1 and reports[0].fits
+    assert generator.last_trace.finished
+    assert generator.last_trace.usage_estimated  # stream_usage vem desligado
+    assert {"prompt_build", "prompt_encode"} <= set(generator.last_trace.spans)
+    # O trace da geração não fica ativo para o que o chamador fizer depois
+    assert telemetry.current_trace() is None
+
+
+def test_generate_with_stream_usage(fake_server, llm_config):
+    llm_config["stream_usage"] = True
+    generator = IntroGenerator(llm_config, use_cache=False)
+
+    generator.generate(PAPER)
+
+    assert not generator.last_trace.usage_estimated
+    assert generator.last_trace.completion_tokens == fake_server.response_tokens
+
+
+def test_agenerate(fake_server, llm_config):
+    generator = IntroGenerator(llm_config, use_cache=False)
+    chunks = []
+
+    async def run():
+        try:
+            text = await generator.agenerate(PAPER, on_chunk=chunks.append)
+        finally:
+            await close_async_clients()
+        return text, telemetry.current_trace()
+
+    text, trace = asyncio.run(run())
+
+    assert text == "".join(chunks)
+    assert len(chunks) > 1
+    assert len(text.split()) == fake_server.response_tokens
+    assert trace is None
+    assert generator.last_trace.finished
+
+
+def test_sync_and_async_give_the_same_text(fake_server, llm_config):
+    # O servidor falso gera o texto a partir do número da requisição
+    first = IntroGenerator(llm_config, use_cache=False).generate(PAPER)
+    fake_server.request_count = 0
+
+    async def run():
+        try:
+            return await IntroGenerator(llm_config, use_cache=False).agenerate(PAPER)
+        finally:
+            await close_async_clients()
+
+    assert asyncio.run(run()) == first
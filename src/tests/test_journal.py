@@ -0,0 +1,61 @@
+import json
+
+from article_introduction_generator.modules.journal import Journal, apply_ops, pending_journals
+
+
+def test_apply_ops():
+    data = {"related_work": {"references": {"a": 1, "b": 2, "c": 3}}}
+    apply_ops(data, [
+        {"op": "set", "path": ["paper_profile", "title"], "value": "T"},
+        {"op": "rename", "path": ["related_work", "references", "b"], "to": "bb"},
+        {"op": "del", "path": ["related_work", "references", "a"]},
+        {"op": "set", "path": ["related_work", "references", "c"], "value": 30},
+        {"op": "del", "path": ["related_work", "references", "missing"]},
+        {"op": "set", "path": [], "value": "ignored"},
+    ])
+    assert data == {"related_work": {"references": {"bb": 2, "c": 30}}, "paper_profile": {"title": "T"}}
+    # rename mantém a posição da chave
+    assert list(data["related_work"]["references"]) == ["bb", "c"]
+
+
+def write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_replay_pending_edits(tmp_path):
+    paper = tmp_path / "p.intro.json"
+    write(paper, {"paper_profile": {"title": "old"}})
+    journals = str(tmp_path / "journals")
+
+    journal = Journal(str(paper), journals)
+    journal.append([{"op": "set", "path": ["paper_profile", "title"], "value": "new"}])
+    journal.append([{"op": "set", "path": ["research_problem"], "value": {"specific_problem": "p"}}])
+    assert pending_journals(journals) == [str(paper)]
+
+    data = json.loads(paper.read_text())
+    assert Journal(str(paper), journals).replay(data) == 2
+    assert data == {"paper_profile": {"title": "new"}, "research_problem": {"specific_problem": "p"}}
+
+
+def test_journal_of_another_version_is_discarded(tmp_path):
+    paper = tmp_path / "p.intro.json"
+    write(paper, {"paper_profile": {"title": "old"}})
+    journals = str(tmp_path / "journals")
+    Journal(str(paper), journals).append([{"op": "set", "path": ["paper_profile", "title"], "value": "new"}])
+
+    write(paper, {"paper_profile": {"title": "changed outside"}})
+    data = json.loads(paper.read_text())
+    journal = Journal(str(paper), journals)
+    assert journal.replay(data) == 0
+    assert data["paper_profile"]["title"] == "changed outside"
+    assert pending_journals(journals) == []
+
+
+def test_clear(tmp_path):
+    paper = tmp_path / "p.intro.json"
+    write(paper, {})
+    journal = Journal(str(paper), str(tmp_path))
+    journal.append([{"op": "set", "path": ["x"], "value": 1}])
+    journal.clear()
+    assert journal.count == 0
+    assert journal.replay({}) == 0
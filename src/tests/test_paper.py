@@ -0,0 +1,50 @@
+import os
+import json
+
+from article_introduction_generator.core import fill_paper, serialize_paper, write_paper, write_paper_content
+
+
+def test_skips_unchanged_content(tmp_path):
+    path = str(tmp_path / "p.intro.json")
+    content = serialize_paper(fill_paper({}))
+
+    record, written = write_paper_content(path, content)
+    assert written
+    mtime = os.stat(path).st_mtime_ns
+
+    again, written = write_paper_content(path, content, record)
+    assert not written
+    assert again == record
+    assert os.stat(path).st_mtime_ns == mtime
+
+
+def test_writes_changed_content(tmp_path):
+    path = str(tmp_path / "p.intro.json")
+    record, _ = write_paper(path, {"paper_profile": {"title": "a"}})
+
+    record, written = write_paper(path, {"paper_profile": {"title": "b"}}, record)
+
+    assert written
+    assert json.load(open(path, encoding="utf-8")) == {"paper_profile": {"title": "b"}}
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_rewrites_a_file_changed_outside(tmp_path):
+    path = str(tmp_path / "p.intro.json")
+    content = serialize_paper({"paper_profile": {"title": "a"}})
+    record, _ = write_paper_content(path, content)
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{}")
+
+    _, written = write_paper_content(path, content, record)
+    assert written
+    assert open(path, "rb").read() == content
+
+
+def test_keeps_file_mode(tmp_path):
+    path = str(tmp_path / "p.intro.json")
+    write_paper(path, {})
+    os.chmod(path, 0o600)
+    write_paper(path, {"x": 1})
+    assert os.stat(path).st_mode & 0o777 == 0o600
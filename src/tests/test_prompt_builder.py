@@ -0,0 +1,86 @@
+import copy
+import json
+
+from article_introduction_generator.modules.prompt_builder import (
+    ABSTRACT_LIMITS, estimate_tokens, fit_to_budget
+)
+
+
+def paper(n_refs=20, abstract_words=400):
+    references = {}
+    for i in range(n_refs):
+        references[f"ref{i}"] = {
+            "bibtex": f"@article{{ref{i}, author={{A. Author}}, title={{Title {i}}}, "
+                      f"year={{2020}}, journal={{J}}, pages={{1--10}}, doi={{10.1/{i}}}}}",
+            "abstract": " ".join(["representation"] * abstract_words),
+            "methodological_category": "deep learning",
+            "central_technical_idea": "idea " * 50,
+            "author_reported_strengths": "strong " * 20,
+            "reported_limitations": "slow",
+            "relevance_to_our_work": "relevant " * 50,
+        }
+    return {"paper_profile": {"title": "A paper"}, "related_work": {"references": references}}
+
+
+def render(json_data):
+    return json.dumps(json_data, indent=2)
+
+
+def tokens(json_data):
+    return estimate_tokens(render(json_data))
+
+
+def test_fits_without_changes():
+    data = paper(n_refs=2, abstract_words=10)
+    fitted, report = fit_to_budget(data, tokens(data) + 10, render)
+    assert fitted is data
+    assert report.cuts == []
+    assert report.fits
+
+
+def test_no_budget():
+    data = paper()
+    fitted, report = fit_to_budget(data, None, render)
+    assert fitted is data
+    assert report.fits
+
+
+def test_truncates_abstracts_first():
+    data = paper()
+    original = copy.deepcopy(data)
+    budget = tokens(data) - 100
+
+    fitted, report = fit_to_budget(data, budget, render)
+
+    assert data == original  # o json_data recebido não é alterado
+    assert report.fits and report.estimated_tokens <= budget
+    assert report.cuts == [f"abstracts truncated to {ABSTRACT_LIMITS[0]} characters"]
+    abstract = fitted["related_work"]["references"]["ref0"]["abstract"]
+    assert len(abstract) <= ABSTRACT_LIMITS[0] + 1 and abstract.endswith("…")
+
+
+def test_degrades_further_for_smaller_budgets():
+    data = paper()
+    without_abstracts = copy.deepcopy(data)
+    for reference in without_abstracts["related_work"]["references"].values():
+        del reference["abstract"]
+
+    fitted, report = fit_to_budget(data, tokens(without_abstracts), render)
+
+    assert report.fits
+    # Passos seguidos do mesmo grupo aparecem uma só vez, com o último limite
+    assert report.cuts == [ f"abstracts truncated to {ABSTRACT_LIMITS[-1]} characters",
+                            "bibtex reduced to author/title/year/journal/booktitle",
+                            "dropped references.abstract" ]
+    reference = fitted["related_work"]["references"]["ref0"]
+    assert "abstract" not in reference
+    assert "pages" not in reference["bibtex"] and "year={2020}" in reference["bibtex"]
+    assert reference["methodological_category"] == "deep learning"
+
+
+def test_reports_when_still_over_budget():
+    data = paper()
+    fitted, report = fit_to_budget(data, 10, render, fixed_tokens=5)
+    assert not report.fits
+    assert report.summary().endswith("still over budget")
+    assert report.estimated_tokens == 5 + tokens(fitted)
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from article_introduction_generator.modules.prompt_encoding import (
+    DEFAULT_ENCODING, ENCODING_ABBREVIATED, ENCODING_COMPACT, ENCODING_MINIFIED,
+    ENCODING_PRETTY, ENCODINGS, KEY_ABBREVIATIONS, USER_KEYED_FIELDS,
+    encode_json_data, system_prompt_addendum
+)
+
+PAPER = {
+    "paper_profile": {"title": "Fast  models", "keywords": ["a", "b"], "domain": ""},
+    "related_work": {
+        "references": {
+            # Chave de citação igual a um nome de campo: não pode ser abreviada
+            "title": {"bibtex": "@article{title, year={2020}}", "abstract": "Ação"},
+            "smith2020": {"abstract": "x", "relevance_to_our_work": "high"},
+        },
+        "common_trends": "",
+    },
+}
+
+
+def expand_keys(value, parent_key=None):
+    # Inverso de abbreviate_keys
+    names = {short: name for name, short in KEY_ABBREVIATIONS.items()}
+    if isinstance(value, list):
+        return [expand_keys(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    result = {}
+    for key, item in value.items():
+        name = key if parent_key in USER_KEYED_FIELDS else names.get(key, key)
+        result[name] = expand_keys(item, parent_key=None if parent_key in USER_KEYED_FIELDS else name)
+    return result
+
+
+def test_pretty_is_the_default():
+    assert DEFAULT_ENCODING == ENCODING_PRETTY
+    assert encode_json_data(PAPER) == ("json", json.dumps(PAPER, ensure_ascii=False, indent=2))
+
+
+@pytest.mark.parametrize("encoding", [ENCODING_PRETTY, ENCODING_MINIFIED])
+def test_json_round_trip(encoding):
+    language, text = encode_json_data(PAPER, encoding)
+    assert language == "json"
+    assert json.loads(text) == PAPER
+
+
+def test_minified_has_no_whitespace_between_tokens():
+    _, text = encode_json_data(PAPER, ENCODING_MINIFIED)
+    assert ": " not in text and "\n" not in text
+
+
+def test_abbreviated_round_trip():
+    _, text = encode_json_data(PAPER, ENCODING_ABBREVIATED)
+    encoded = json.loads(text)
+    assert "title" in encoded["rw"]["refs"]
+    assert expand_keys(encoded) == PAPER
+    assert "pp=paper_profile" in system_prompt_addendum(ENCODING_ABBREVIATED)
+
+
+def test_compact_keeps_values_and_drops_empty_fields():
+    language, text = encode_json_data(PAPER, ENCODING_COMPACT)
+    assert language == "yaml"
+    assert "title: Fast models" in text
+    assert "smith2020:" in text
+    assert "domain" not in text and "common_trends" not in text
+
+
+def test_every_encoding_is_known():
+    for encoding in ENCODINGS:
+        encode_json_data(PAPER, encoding)
+    with pytest.raises(ValueError):
+        encode_json_data(PAPER, "xml")
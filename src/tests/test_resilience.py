@@ -0,0 +1,225 @@
+import time
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from article_introduction_generator.modules import consult as consult_module
+from article_introduction_generator.modules.cache import ResponseCache
+from article_introduction_generator.modules.consult import chat_stream, consultation_in_depth_stream
+from article_introduction_generator.modules.fake_server import start_fake_server
+from article_introduction_generator.modules.llm_client import close_async_clients
+from article_introduction_generator.modules.resilience import RetryPolicy, resilient_stream
+
+POLICY = {  "model": "primary",
+            "request_timeout": 5,
+            "max_retries": 0,
+            "retry_backoff_base": 0,
+            "retry_backoff_max": 0 }
+
+
+def connection_error():
+    return openai.APIConnectionError(request=httpx.Request("POST", "http://llm.test/v1/chat/completions"))
+
+
+class Provider:
+    """
+    open_stream falso: as primeiras fail_first requisições levantam error;
+    a de número slow (começando em 1) demora delay segundos para responder.
+    """
+    def __init__(self, fail_first=0, error=connection_error, slow=None, delay=0):
+        self.fail_first = fail_first
+        self.error = error
+        self.slow = slow
+        self.delay = delay
+        self.requests = []
+
+    def open_stream(self, target, client, timeout):
+        self.requests.append(target["model"])
+        number = len(self.requests)
+
+        async def stream():
+            if number <= self.fail_first:
+                raise self.error()
+            if number == self.slow:
+                await asyncio.sleep(self.delay)
+            for piece in (target["model"], " answer ", str(number)):
+                yield piece
+        return stream()
+
+
+def consult(system_data, provider):
+    async def run():
+        return "".join([piece async for piece in resilient_stream(system_data, provider.open_stream)])
+    return asyncio.run(run())
+
+
+def test_retries_connection_errors():
+    provider = Provider(fail_first=2)
+    assert consult(dict(POLICY, max_retries=2), provider) == "primary answer 3"
+    assert provider.requests == ["primary"] * 3
+
+
+def test_gives_up_after_max_retries():
+    provider = Provider(fail_first=3)
+    with pytest.raises(openai.APIConnectionError):
+        consult(dict(POLICY, max_retries=1), provider)
+    assert len(provider.requests) == 2
+
+
+def test_does_not_retry_other_errors():
+    provider = Provider(fail_first=1, error=ValueError)
+    with pytest.raises(ValueError):
+        consult(dict(POLICY, max_retries=3), provider)
+    assert len(provider.requests) == 1
+
+
+def test_falls_back_to_the_next_model():
+    provider = Provider(fail_first=1)
+    system_data = dict(POLICY, fallbacks=[{"model": "backup"}, {"no_model": True}])
+    assert len(RetryPolicy(system_data).targets) == 2
+
+    assert consult(system_data, provider) == "backup answer 2"
+    assert provider.requests == ["primary", "backup"]
+
+
+def test_hedges_a_slow_request():
+    provider = Provider(slow=1, delay=3)
+    start = time.perf_counter()
+
+    assert consult(dict(POLICY, hedge_after=0.1), provider) == "primary answer 2"
+    assert provider.requests == ["primary", "primary"]
+    assert time.perf_counter() - start < 2
+
+
+def test_total_timeout():
+    provider = Provider(slow=1, delay=3)
+    with pytest.raises(asyncio.TimeoutError):
+        consult(dict(POLICY, request_timeout=0.1, total_timeout=0.2), provider)
+
+
+def test_backoff_respects_the_limit():
+    policy = RetryPolicy(dict(POLICY, retry_backoff_base=1, retry_backoff_max=2))
+    assert all(0 <= policy.backoff(attempt) <= 2 for attempt in range(10))
+
+
+# ---------- Contra o FakeChatServer ----------
+
+def chat(system_data):
+    """
+    Texto de chat_stream e os alvos (system_data ou fallback) que responderam.
+    """
+    answered = []
+
+    async def run():
+        try:
+            pieces = [piece async for piece in chat_stream(system_data, "system", "user", on_target=answered.append)]
+        finally:
+            await close_async_clients()
+        return "".join(pieces)
+
+    return asyncio.run(run()), answered
+
+
+@pytest.fixture
+def backup_server():
+    server = start_fake_server(port=0, latency=0, tokens_per_second=0, response_tokens=5)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_server_errors_are_retried(fake_server, llm_config):
+    fake_server.fail_first, fake_server.fail_status = 2, 500
+    llm_config["max_retries"] = 2
+
+    text, answered = chat(llm_config)
+
+    assert text
+    assert answered == [llm_config]
+    assert fake_server.request_count == 3
+
+
+def test_server_errors_after_max_retries(fake_server, llm_config):
+    fake_server.fail_first, fake_server.fail_status = 3, 500
+    llm_config["max_retries"] = 1
+
+    with pytest.raises(openai.InternalServerError):
+        chat(llm_config)
+    assert fake_server.request_count == 2
+
+
+def test_client_errors_are_not_retried(fake_server, llm_config):
+    fake_server.fail_first, fake_server.fail_status = 1, 401
+    llm_config["max_retries"] = 3
+
+    with pytest.raises(openai.AuthenticationError):
+        chat(llm_config)
+    assert fake_server.request_count == 1
+
+
+def test_rate_limited_model_falls_back(fake_server, backup_server, llm_config):
+    fake_server.fail_first, fake_server.fail_status = 1, 429
+    llm_config["fallbacks"] = [{"model": "backup-model", "base_url": backup_server.base_url}]
+
+    text, answered = chat(llm_config)
+
+    assert text
+    assert [target["model"] for target in answered] == ["backup-model"]
+    assert fake_server.request_count == 1
+    assert backup_server.request_count == 1
+
+
+def test_hanging_request_is_hedged(fake_server, llm_config):
+    # A primeira requisição fica sem resposta; a cópia enviada após hedge_after responde
+    fake_server.fail_first, fake_server.fail_status, fake_server.hang = 1, "timeout", 2
+    llm_config["hedge_after"] = 0.2
+
+    text, answered = chat(llm_config)
+
+    assert text
+    assert answered == [llm_config]
+    assert fake_server.request_count == 2
+
+
+def test_only_answers_of_the_main_model_are_cached(fake_server, backup_server, llm_config, tmp_path, monkeypatch):
+    monkeypatch.setattr(consult_module, "ResponseCache",
+                        lambda max_size_mb: ResponseCache(str(tmp_path / "cache"), max_size_mb))
+    cache = ResponseCache(str(tmp_path / "cache"))
+    paper = {"paper_profile": {"title": "T"}}
+
+    async def generate(system_data):
+        try:
+            return "".join([piece async for piece in consultation_in_depth_stream(system_data, paper)])
+        finally:
+            await close_async_clients()
+
+    fake_server.fail_first, fake_server.fail_status = 1, 429
+    llm_config["fallbacks"] = [{"model": "backup-model", "base_url": backup_server.base_url}]
+    assert asyncio.run(generate(llm_config))
+    assert cache.entries() == []
+
+    text = asyncio.run(generate(llm_config))
+    assert len(cache.entries()) == 1
+    assert asyncio.run(generate(llm_config)) == text
+    assert fake_server.request_count == 2
+
+
+def test_stream_options_rejected_by_the_provider(fake_server, llm_config):
+    # Com stream_usage, um 400 repete a requisição uma vez sem stream_options
+    fake_server.fail_first, fake_server.fail_status = 1, 400
+    llm_config["stream_usage"] = True
+
+    text, _ = chat(llm_config)
+
+    assert text
+    assert fake_server.request_count == 2
+
+
+def test_bad_request_without_stream_options(fake_server, llm_config):
+    fake_server.fail_first, fake_server.fail_status = 1, 400
+
+    with pytest.raises(openai.BadRequestError):
+        chat(llm_config)
+    assert fake_server.request_count == 1
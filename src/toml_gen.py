@@ -44,7 +44,8 @@ license-files = ["LICENSE"]
 keywords = ["writing", "article"]
 dependencies = [
     "PyQt5",
-    "deep-consultation"
+    "openai",
+    "httpx"
 ]
 
 [project.urls]
@@ -54,13 +55,17 @@ dependencies = [
 "Source" = "{__url_source__}"
 
 [project.scripts]
-"{__program_name__}" = "{__package__}.program:main"
+"{__program_name__}" = "{__package__}.cli:main"
 
 [tool.setuptools]
-packages = ["{__package__}", "{__package__}.modules"]
+packages = ["{__package__}", "{__package__}.modules", "{__package__}.core"]
 
 [tool.setuptools.package-data]
 "{__package__}" = ["icons/*.png"]
+
+[tool.pytest.ini_options]
+testpaths = ["tests"]
+pythonpath = ["."]
 """
 
 # Escreve o pyproject.toml